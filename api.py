@@ -3,7 +3,6 @@ Inicialización de la aplicación FastAPI
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
@@ -17,10 +16,12 @@ from app.services.estadisticas_service import EstadisticasService
 from app.services.notificacion_service import NotificacionService
 from app.services.trigger_service import TriggerService
 from app.services.auth_service import AuthService
-from app.repositories.trigger_repository import TriggerRepository
-from app.repositories.usuario_repository import UsuarioRepository
+from app.services.importacion_service import ImportacionService
+from app.services.importacion_job_service import ImportacionJobService
+from app.repositories.connection_pool import ConnectionPool
 from app.services.scheduler_service import start_scheduler, stop_scheduler
 from app.api.auth_middleware import AuthMiddleware
+from app.api.respuestas import RespuestaJSON
 
 # Importar routers
 from app.api.routes import (
@@ -34,7 +35,8 @@ from app.api.routes import (
     db_router,
     init_services
 )
-from app.web.views import views_router, get_static_files_app
+from app.web.views import views_router, get_static_files_app, init_views
+from app.web.compresion import CompresionMiddleware
 
 
 @asynccontextmanager
@@ -43,17 +45,32 @@ async def lifespan(app: FastAPI):
     Manejador del ciclo de vida de la aplicación
     Se ejecuta al iniciar y detener la aplicación
     """
-    # Startup: Iniciar el scheduler automático
+    # Startup: Esquema de base de datos al día y usuario root
+    if app.state.settings.DB_MIGRATE_ON_STARTUP:
+        app.state.db_factory.run_migrations()
+    app.state.usuario_repository.crear_usuario_admin_default()
+    
+    # Iniciar el scheduler automático
     print("\n" + "=" * 60)
     print("🚀 INICIANDO SCHEDULER AUTOMÁTICO DE TRIGGERS")
     print("=" * 60)
     try:
-        start_scheduler()
+        start_scheduler(app.state.db_factory)
         print("✅ Scheduler iniciado correctamente")
     except Exception as e:
         print(f"⚠️  Error iniciando scheduler: {str(e)}")
     print("=" * 60 + "\n")
     
+    # Cerrar las importaciones que quedaron a medias por un reinicio
+    # (solo las de este proceso o sin latido: las de otros workers siguen en curso)
+    try:
+        interrumpidas = app.state.importacion_jobs.recuperar_interrumpidos()
+        if interrumpidas:
+            print(f"⚠️  {interrumpidas} importación(es) interrumpida(s) marcadas como fallidas")
+    except Exception as e:
+        print(f"⚠️  Error revisando importaciones pendientes: {str(e)}")
+    app.state.importacion_jobs.iniciar_latido()
+    
     yield  # La aplicación está corriendo
     
     # Shutdown: Detener el scheduler
@@ -66,6 +83,10 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️  Error deteniendo scheduler: {str(e)}")
     print("=" * 60 + "\n")
+    
+    # Detener las importaciones en segundo plano y cerrar el pool de conexiones compartido
+    app.state.importacion_jobs.shutdown()
+    app.state.db_factory.close()
 
 
 def create_app() -> FastAPI:
@@ -85,7 +106,9 @@ def create_app() -> FastAPI:
         version="2.1.0",
         docs_url="/docs",
         redoc_url="/redoc",
-        lifespan=lifespan
+        lifespan=lifespan,
+        # Las respuestas JSON se codifican con orjson
+        default_response_class=RespuestaJSON
     )
     
     # Configurar CORS
@@ -100,8 +123,13 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # Pool de conexiones compartido por todos los repositorios
+    pool = ConnectionPool.from_settings(settings)
+    factory = DatabaseFactory(settings, pool)
+    app.state.db_factory = factory
+    app.state.settings = settings
+    
     # Inicializar servicios
-    factory = DatabaseFactory(settings)
     repository = factory.create_empresa_repository()
     
     empresa_service = EmpresaService(repository)
@@ -109,27 +137,31 @@ def create_app() -> FastAPI:
     notif_service = NotificacionService(repository)
     
     # Inicializar servicio de triggers con PostgreSQL
-    trigger_repository = TriggerRepository(
-        host=settings.DB_HOST,
-        port=settings.DB_PORT,
-        database=settings.DB_NAME,
-        user=settings.DB_USER,
-        password=settings.DB_PASSWORD
-    )
+    trigger_repository = factory.create_trigger_repository()
     trigger_service = TriggerService(trigger_repository)
     
     # Inicializar servicio de autenticación con PostgreSQL
-    usuario_repository = UsuarioRepository(
-        host=settings.DB_HOST,
-        port=settings.DB_PORT,
-        database=settings.DB_NAME,
-        user=settings.DB_USER,
-        password=settings.DB_PASSWORD
+    usuario_repository = factory.create_usuario_repository()
+    # Los tokens se guardan en el almacén de TOKEN_STORE, compartido entre workers
+    auth_service = AuthService(usuario_repository, factory.create_token_store(),
+                               cache_ttl=settings.TOKEN_CACHE_SECONDS)
+    app.state.usuario_repository = usuario_repository
+    
+    # Importaciones masivas en segundo plano
+    importacion_jobs = ImportacionJobService(
+        ImportacionService(repository),
+        factory.create_importacion_job_repository(),
+        max_workers=settings.IMPORT_WORKERS
     )
-    auth_service = AuthService(usuario_repository)
+    app.state.importacion_jobs = importacion_jobs
     
     # Inicializar servicios en las rutas
-    init_services(empresa_service, stats_service, notif_service, auth_service, trigger_service)
+    init_services(empresa_service, stats_service, notif_service, auth_service, trigger_service, factory, importacion_jobs)
+    
+    # Compresión de las respuestas de la API (dentro del middleware de autenticación,
+    # que reenvía el cuerpo por partes y no dejaría ver la respuesta completa)
+    if settings.COMPRESION_MIN_BYTES > 0:
+        app.add_middleware(CompresionMiddleware, minimum_size=settings.COMPRESION_MIN_BYTES)
     
     # Agregar middleware de autenticación
     app.add_middleware(AuthMiddleware, auth_service=auth_service)
@@ -147,13 +179,14 @@ def create_app() -> FastAPI:
     app.include_router(triggers_router)
     app.include_router(db_router)
     
-    # Montar archivos estáticos
+    # Plantillas renderizadas y archivos estáticos precomprimidos, en memoria
+    init_views(settings)
     app.mount("/static", get_static_files_app(), name="static")
     
     # Manejadores de errores personalizados
     @app.exception_handler(404)
     async def not_found_handler(request, exc):
-        return JSONResponse(
+        return RespuestaJSON(
             status_code=404,
             content={
                 'success': False,
@@ -163,7 +196,7 @@ def create_app() -> FastAPI:
     
     @app.exception_handler(500)
     async def internal_error_handler(request, exc):
-        return JSONResponse(
+        return RespuestaJSON(
             status_code=500,
             content={
                 'success': False,
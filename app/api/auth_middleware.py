@@ -3,6 +3,7 @@ Middleware de autenticación para proteger rutas
 """
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from typing import Callable
 
@@ -110,8 +111,11 @@ class AuthMiddleware(BaseHTTPMiddleware):
         
         print(f"🔐 Validando token: {token[:20]}...")
         
-        # Validar token
-        datos_token = self.auth_service.validar_token(token)
+        # Validar token: primero con la caché del worker; si no está, en un hilo,
+        # porque el almacén de tokens puede ser PostgreSQL o Redis
+        datos_token = self.auth_service.validar_token_local(token)
+        if not datos_token:
+            datos_token = await run_in_threadpool(self.auth_service.validar_token, token)
         
         if not datos_token:
             return JSONResponse(
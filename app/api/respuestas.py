@@ -0,0 +1,43 @@
+"""
+Respuestas JSON codificadas con orjson
+RespuestaJSON es la clase de respuesta por defecto de la aplicación y acepta
+también cuerpos ya codificados (bytes), p. ej. los guardados en la caché de lecturas.
+"""
+from decimal import Decimal
+from typing import Any
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+def _por_defecto(valor: Any) -> Any:
+    """Convierte los tipos que orjson no serializa de forma nativa"""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (set, frozenset)):
+        return list(valor)
+    raise TypeError(f"Tipo no serializable a JSON: {type(valor).__name__}")
+
+
+def codificar_json(contenido: Any) -> bytes:
+    """
+    Codifica un contenido a JSON con orjson (fechas en ISO 8601)
+
+    Args:
+        contenido: Diccionarios, listas y valores simples
+
+    Returns:
+        JSON codificado en UTF-8
+    """
+    return orjson.dumps(contenido, default=_por_defecto)
+
+
+class RespuestaJSON(ORJSONResponse):
+    """
+    Respuesta JSON con orjson que deja pasar sin tocar los cuerpos ya codificados.
+    Las rutas que la devuelven directamente se saltan además jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return codificar_json(content)
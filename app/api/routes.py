@@ -2,15 +2,17 @@
 Rutas de la API REST
 Contiene todos los endpoints de la API
 """
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
 from fastapi import APIRouter, HTTPException, Query, Path, Body, status, UploadFile, File, Request, Depends
-from fastapi.responses import JSONResponse, StreamingResponse
-from datetime import datetime
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from datetime import datetime, date, timezone
+from email.utils import format_datetime
 from io import BytesIO
 
 from app.api.schemas import EmpresaRequest, ActualizarModuloRequest
 from app.api.auth_schemas import LoginRequest, UsuarioCreate, UsuarioUpdate, CambiarPasswordRequest
 from app.api.auth_middleware import require_auth, require_admin
+from app.api.respuestas import RespuestaJSON, codificar_json
 from app.models.empresa import Empresa, ModuloEmpresa
 from app.models.usuario import Usuario
 from app.services.empresa_service import EmpresaService
@@ -19,8 +21,10 @@ from app.services.notificacion_service import NotificacionService
 from app.services.email_service import EmailService
 from app.services.trigger_service import TriggerService
 from app.services.importacion_service import ImportacionService
+from app.services.importacion_job_service import ImportacionJobService
 from app.services.auth_service import AuthService
 from app.services.database_service import DatabaseService
+from app.services.async_service import AsyncService
 
 
 # Crear routers
@@ -36,37 +40,48 @@ db_router = APIRouter(prefix="/api/database", tags=["Database Viewer"])
 
 
 # Variables globales para servicios (se inicializarán desde api.py)
-empresa_service: EmpresaService = None
-stats_service: EstadisticasService = None
-notif_service: NotificacionService = None
-email_service: EmailService = None
-trigger_service: TriggerService = None
-importacion_service: ImportacionService = None
-auth_service: AuthService = None
-db_service: DatabaseService = None
-
-
-def init_services(emp_service: EmpresaService, stat_service: EstadisticasService, notif_serv: NotificacionService, auth_serv: AuthService, trig_service: TriggerService = None):
+# Cada una es la contraparte asíncrona (AsyncService) del servicio indicado
+empresa_service: AsyncService = None  # EmpresaService
+stats_service: AsyncService = None  # EstadisticasService
+notif_service: AsyncService = None  # NotificacionService
+email_service: AsyncService = None  # EmailService
+trigger_service: AsyncService = None  # TriggerService
+importacion_service: AsyncService = None  # ImportacionService
+importacion_jobs: AsyncService = None  # ImportacionJobService
+auth_service: AsyncService = None  # AuthService
+db_service: AsyncService = None  # DatabaseService
+version_repository: AsyncService = None  # VersionRepository
+db_factory = None
+
+
+def init_services(emp_service: EmpresaService, stat_service: EstadisticasService, notif_serv: NotificacionService, auth_serv: AuthService, trig_service: TriggerService = None, factory=None, import_jobs: ImportacionJobService = None):
     """Inicializa los servicios para las rutas"""
-    global empresa_service, stats_service, notif_service, email_service, trigger_service, importacion_service, auth_service, db_service
-    empresa_service = emp_service
-    stats_service = stat_service
-    notif_service = notif_serv
-    auth_service = auth_serv
-    email_service = EmailService()  # Inicializar servicio de email
-    trigger_service = trig_service  # Inicializar servicio de triggers
-    importacion_service = ImportacionService(emp_service.repository)  # Inicializar servicio de importación
-    
-    # Inicializar servicio de base de datos
-    from app.config.settings import Settings
-    settings = Settings()
-    db_service = DatabaseService(
-        host=settings.DB_HOST,
-        port=settings.DB_PORT,
-        database=settings.DB_NAME,
-        user=settings.DB_USER,
-        password=settings.DB_PASSWORD
-    )
+    global empresa_service, stats_service, notif_service, email_service, trigger_service, importacion_service, importacion_jobs, auth_service, db_service, version_repository, db_factory
+    if factory is None:
+        from app.config.settings import Settings
+        from app.config.database_factory import DatabaseFactory
+        factory = DatabaseFactory(Settings())
+    db_factory = factory
+    
+    # Las rutas usan las contrapartes asíncronas de cada servicio
+    empresa_service = factory.create_async_service(emp_service)
+    stats_service = factory.create_async_service(stat_service)
+    notif_service = factory.create_async_service(notif_serv)
+    auth_service = factory.create_async_service(auth_serv)
+    email_service = factory.create_async_service(EmailService())  # Inicializar servicio de email
+    trigger_service = factory.create_async_service(trig_service) if trig_service else None  # Inicializar servicio de triggers
+    importacion_service = factory.create_async_service(ImportacionService(emp_service.repository))  # Inicializar servicio de importación
+    if import_jobs is None:
+        import_jobs = ImportacionJobService(importacion_service.service, factory.create_importacion_job_repository(),
+                                            max_workers=factory.settings.IMPORT_WORKERS)
+    importacion_jobs = factory.create_async_service(import_jobs)  # Importaciones en segundo plano
+    
+    # Inicializar servicio de base de datos (comparte el pool de conexiones)
+    db_service = factory.create_database_service()
+    db_service = factory.create_async_service(db_service)
+    
+    # Versiones de los datos para responder con ETag y 304
+    version_repository = factory.create_async_service(factory.create_version_repository())
 
 
 def normalize_response(resultado: Dict) -> Dict:
@@ -76,6 +91,92 @@ def normalize_response(resultado: Dict) -> Dict:
     return resultado
 
 
+async def respuesta_cacheada(clave: Tuple, obtener: Callable[[], Awaitable[Dict]]) -> RespuestaJSON:
+    """
+    Responde una consulta de solo lectura sobre empresas con el cuerpo ya codificado,
+    guardado en la caché de lecturas (se invalida con cada escritura de empresas).
+    Las consultas repetidas, como el sondeo del dashboard, no vuelven a consultar
+    ni a codificar.
+    
+    Args:
+        clave: Ruta y parámetros que identifican la respuesta
+        obtener: Corrutina que arma el contenido (si lanza HTTPException no se cachea)
+        
+    Returns:
+        Respuesta JSON con el cuerpo codificado
+    """
+    async def codificar() -> bytes:
+        return codificar_json(await obtener())
+    
+    cache = getattr(db_factory, 'cache', None)
+    if cache is None:
+        return RespuestaJSON(await codificar())
+    return RespuestaJSON(await cache.get_or_load_async(('respuesta',) + clave, codificar))
+
+
+def _etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara If-None-Match con el ETag actual (comparación débil, admite lista y '*')"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    actual = etag[2:] if etag.startswith('W/') else etag
+    for candidato in if_none_match.split(','):
+        candidato = candidato.strip()
+        if candidato.startswith('W/'):
+            candidato = candidato[2:]
+        if candidato == actual:
+            return True
+    return False
+
+
+async def respuesta_condicional(request: Request, conjuntos: Tuple[str, ...], clave: Tuple,
+                                obtener: Callable[[], Awaitable[Dict]]) -> Response:
+    """
+    Responde una consulta de solo lectura con ETag y Last-Modified calculados a partir
+    de la versión de los conjuntos de datos que usa (tabla datos_version).
+    Si el cliente envía If-None-Match con el ETag vigente se responde 304 sin
+    ejecutar la lógica del servicio; si no, se arma la respuesta con respuesta_cacheada.
+    Las escrituras de otros workers no invalidan la caché de lecturas de este proceso:
+    cuando la versión cambia respecto de la última vista, se invalida aquí antes de
+    armar el cuerpo (TTLCache.sincronizar), para no guardar datos anteriores bajo el
+    ETag nuevo.
+    
+    Args:
+        request: Petición (para leer If-None-Match)
+        conjuntos: Conjuntos de datos de los que depende la respuesta ('empresas', 'triggers')
+        clave: Ruta y parámetros que identifican la respuesta
+        obtener: Corrutina que arma el contenido
+        
+    Returns:
+        Respuesta 304 vacía o respuesta JSON con las cabeceras de validación
+    """
+    versiones = await version_repository.get_versiones(conjuntos)
+    
+    cache = getattr(db_factory, 'cache', None)
+    if cache is not None:
+        cache.sincronizar({conjunto: version for conjunto, (version, _) in versiones.items()})
+    
+    # La fecha forma parte del ETag: los días restantes de los vencimientos cambian a diario
+    hoy = date.today()
+    etag = 'W/"{}-{}"'.format(
+        '.'.join(f"{conjunto[0]}{versiones[conjunto][0]}" for conjunto in conjuntos),
+        hoy.strftime('%Y%m%d')
+    )
+    cabeceras = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    fechas = [fecha for _, fecha in versiones.values() if fecha is not None]
+    if fechas:
+        cabeceras['Last-Modified'] = format_datetime(max(fechas).astimezone(timezone.utc), usegmt=True)
+    
+    if _etag_coincide(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=cabeceras)
+    
+    # El ETag entra en la clave: una versión nueva nunca reutiliza un cuerpo anterior
+    respuesta = await respuesta_cacheada(clave + (etag,), obtener)
+    respuesta.headers.update(cabeceras)
+    return respuesta
+
+
 # ========================================
 # RUTAS DE AUTENTICACIÓN
 # ========================================
@@ -83,7 +184,7 @@ def normalize_response(resultado: Dict) -> Dict:
 @auth_router.post("/login")
 async def login(request: LoginRequest):
     """Login de usuario"""
-    resultado = auth_service.login(request.username, request.password)
+    resultado = await auth_service.login(request.username, request.password)
     
     if not resultado['success']:
         raise HTTPException(
@@ -107,7 +208,7 @@ async def logout(request: Request):
     token = request.state.token if hasattr(request.state, 'token') else None
     
     if token:
-        auth_service.logout(token)
+        await auth_service.logout(token)
     
     return {'success': True, 'mensaje': 'Sesión cerrada correctamente'}
 
@@ -115,7 +216,7 @@ async def logout(request: Request):
 @auth_router.get("/me")
 async def obtener_usuario_actual(request: Request, usuario=Depends(require_auth)):
     """Obtiene información del usuario autenticado"""
-    usuario_completo = auth_service.obtener_usuario_actual(request.state.token)
+    usuario_completo = await auth_service.obtener_usuario_actual(request.state.token)
     
     if not usuario_completo:
         raise HTTPException(
@@ -136,7 +237,7 @@ async def cambiar_password(
     usuario=Depends(require_auth)
 ):
     """Cambia la contraseña del usuario autenticado"""
-    resultado = auth_service.cambiar_password(
+    resultado = await auth_service.cambiar_password(
         usuario['usuario_id'],
         datos.password_actual,
         datos.password_nueva
@@ -169,7 +270,7 @@ async def index():
         'redoc': '/redoc',
         'endpoints': {
             'empresas': {
-                'GET /api/empresas': 'Obtener todas las empresas activas',
+                'GET /api/empresas': 'Listar empresas (paginado por cursor, con filtros y ordenamiento)',
                 'GET /api/empresas/{nit}': 'Obtener empresa por NIT',
                 'POST /api/empresas': 'Crear nueva empresa',
                 'PATCH /api/empresas/{nit}/modulo': 'Actualizar estado de módulo',
@@ -197,7 +298,9 @@ async def health():
     return {
         'status': 'ok',
         'timestamp': datetime.now().isoformat(),
-        'framework': 'FastAPI'
+        'framework': 'FastAPI',
+        'db_pool': db_factory.get_pool_stats() if db_factory else None,
+        'cache': db_factory.get_cache_stats() if db_factory else None
     }
 
 
@@ -220,7 +323,7 @@ async def descargar_plantilla_excel():
     print("🔥 EJECUTANDO ENDPOINT /plantilla-excel")
     try:
         # Generar plantilla
-        excel_content = importacion_service.generar_plantilla_excel()
+        excel_content = await importacion_service.generar_plantilla_excel()
         print(f"✅ Plantilla generada, tamaño: {len(excel_content)} bytes")
         
         # Crear respuesta con el archivo
@@ -237,12 +340,39 @@ async def descargar_plantilla_excel():
         raise HTTPException(status_code=500, detail=f"Error al generar plantilla: {str(e)}")
 
 
-@empresas_router.post("/importar")
+@empresas_router.get("/exportar")
+async def exportar_empresas(
+    formato: str = Query('xlsx', description="Formato del archivo: xlsx o csv"),
+    estado: Optional[str] = Query(None, description="Exportar solo empresas con este estado")
+):
+    """
+    Exporta las empresas con las mismas columnas de la plantilla de importación.
+    El archivo se envía por bloques a medida que se lee la tabla (memoria constante).
+    """
+    if formato not in ImportacionService.FORMATOS_EXPORTACION:
+        raise HTTPException(status_code=400, detail="El formato debe ser xlsx o csv")
+    
+    contenido = await importacion_service.exportar(formato, estado)
+    nombre_archivo = f"empresas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+    
+    return StreamingResponse(
+        contenido,
+        media_type=ImportacionService.FORMATOS_EXPORTACION[formato],
+        headers={
+            "Content-Disposition": f"attachment; filename={nombre_archivo}"
+        }
+    )
+
+
+@empresas_router.post("/importar", status_code=status.HTTP_202_ACCEPTED)
 async def importar_empresas_excel(
-    file: UploadFile = File(..., description="Archivo Excel con empresas")
+    file: UploadFile = File(..., description="Archivo Excel, CSV, Parquet o Arrow con empresas")
 ):
     """
-    Importa empresas masivamente desde un archivo Excel
+    Encola la importación masiva de empresas desde un archivo Excel, CSV, Parquet o Arrow.
+    Todos los formatos usan las mismas columnas.
+    Responde de inmediato con el trabajo creado; el progreso se consulta en
+    GET /api/empresas/importar/{job_id}
     
     El archivo debe tener las siguientes columnas:
     - NIT, RAZON_SOCIAL, ESTADO
@@ -252,46 +382,62 @@ async def importar_empresas_excel(
     """
     print(f"🔥 EJECUTANDO ENDPOINT /importar - Archivo: {file.filename}")
     # Validar tipo de archivo
-    if not file.filename.endswith(('.xlsx', '.xls')):
+    if not ImportacionService.formato_de_archivo(file.filename):
         raise HTTPException(
             status_code=400, 
-            detail="El archivo debe ser un Excel (.xlsx o .xls)"
+            detail="El archivo debe ser Excel (.xlsx, .xls), CSV (.csv), Parquet (.parquet) o Arrow (.arrow, .feather)"
         )
     
-    try:
-        # Leer contenido del archivo
-        contents = await file.read()
-        print(f"✅ Archivo leído, tamaño: {len(contents)} bytes")
-        
-        # Procesar importación
-        resultado = importacion_service.importar_desde_excel(contents)
-        
-        if not resultado['success']:
-            raise HTTPException(status_code=400, detail=resultado.get('error'))
-        
-        return resultado
-        
-    except Exception as e:
-        print(f"❌ Error al procesar archivo: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error al procesar archivo: {str(e)}")
+    # Copia el archivo y encola la importación; las filas se procesan en segundo plano
+    resultado = await importacion_jobs.encolar(file.file, file.filename)
+    
+    if not resultado['success']:
+        print(f"❌ Error al encolar archivo: {resultado.get('error')}")
+        raise HTTPException(status_code=500, detail=resultado.get('error'))
+    
+    return normalize_response(resultado)
+
+
+@empresas_router.get("/importar/{job_id}")
+async def obtener_estado_importacion(
+    job_id: str = Path(..., description="ID del trabajo de importación"),
+    desde_error: int = Query(0, ge=0, description="Posición del primer error a devolver")
+):
+    """
+    Obtiene el progreso de una importación (filas leídas, creadas, actualizadas y fallidas)
+    y los errores nuevos a partir de desde_error
+    """
+    resultado = await importacion_jobs.obtener_estado(job_id, desde_error)
+    if not resultado['success']:
+        raise HTTPException(status_code=404, detail=resultado.get('error'))
+    return normalize_response(resultado)
 
 
 @empresas_router.get("/buscar/nombre")
-async def buscar_por_nombre(nombre: str = Query(..., description="Nombre a buscar")):
-    """Busca empresas por nombre"""
-    resultado = empresa_service.buscar_por_nombre(nombre)
+async def buscar_por_nombre(
+    nombre: str = Query(..., min_length=1, description="Nombre o NIT a buscar"),
+    limit: int = Query(20, ge=1, le=200, description="Número máximo de resultados"),
+    offset: int = Query(0, ge=0, description="Resultados a omitir"),
+    estado: Optional[str] = Query(None, description="Estado de las empresas")
+):
+    """Busca empresas por nombre o NIT, ordenadas por relevancia"""
+    resultado = await empresa_service.buscar_por_nombre(nombre, limit, offset, estado)
     if not resultado['success']:
-        raise HTTPException(status_code=500, detail=resultado.get('error'))
-    return resultado
+        raise HTTPException(status_code=400, detail=resultado.get('error'))
+    return normalize_response(resultado)
 
 
 @empresas_router.get("/filtrar/estado")
-async def filtrar_por_estado(estado: str = Query(..., description="Estado a filtrar")):
-    """Filtra empresas por estado"""
-    resultado = empresa_service.filtrar_por_estado(estado)
+async def filtrar_por_estado(
+    estado: str = Query(..., description="Estado a filtrar"),
+    limit: int = Query(50, ge=1, le=200, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página anterior")
+):
+    """Filtra empresas por estado (paginado por cursor)"""
+    resultado = await empresa_service.filtrar_por_estado(estado, limit, cursor)
     if not resultado['success']:
-        raise HTTPException(status_code=500, detail=resultado.get('error'))
-    return resultado
+        raise HTTPException(status_code=400, detail=resultado.get('error'))
+    return normalize_response(resultado)
 
 
 # ========================================
@@ -299,18 +445,49 @@ async def filtrar_por_estado(estado: str = Query(..., description="Estado a filt
 # ========================================
 
 @empresas_router.get("")
-async def obtener_empresas():
-    """Obtiene todas las empresas activas"""
-    resultado = empresa_service.obtener_empresas_activas()
-    if not resultado['success']:
-        raise HTTPException(status_code=500, detail=resultado.get('error'))
-    return normalize_response(resultado)
+async def obtener_empresas(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página anterior"),
+    estado: Optional[str] = Query(None, description="Estado (por defecto empresas activas con módulos activos)"),
+    modulo: Optional[str] = Query(None, description="certificado, resolucion o documento"),
+    prioridad: Optional[str] = Query(None, description="CRITICA, ALTA o MEDIA"),
+    vencimiento_desde: Optional[datetime] = Query(None, description="Fecha final mínima del módulo"),
+    vencimiento_hasta: Optional[datetime] = Query(None, description="Fecha final máxima del módulo"),
+    q: Optional[str] = Query(None, description="Texto a buscar en nombre o NIT"),
+    orden: str = Query('nombre', description="nombre, nit, fecha_creacion o fecha_actualizacion"),
+    direccion: str = Query('asc', description="asc o desc")
+):
+    """Obtiene una página de empresas con filtros y ordenamiento en el servidor (respuesta cacheada, admite If-None-Match)"""
+    if estado:
+        filters = {'estado': estado}
+    else:
+        filters = {'estado': 'activo', 'activos_solamente': True}
+    
+    opcionales = {
+        'modulo': modulo,
+        'prioridad': prioridad,
+        'vencimiento_desde': vencimiento_desde,
+        'vencimiento_hasta': vencimiento_hasta,
+        'texto': q
+    }
+    filters.update({clave: valor for clave, valor in opcionales.items() if valor})
+    
+    async def obtener():
+        resultado = await empresa_service.listar_empresas(filters, limit, cursor, orden, direccion)
+        if not resultado['success']:
+            raise HTTPException(status_code=400, detail=resultado.get('error'))
+        return normalize_response(resultado)
+    
+    return await respuesta_condicional(
+        request, ('empresas',), ('empresas', tuple(sorted(filters.items())), limit, cursor, orden, direccion), obtener
+    )
 
 
 @empresas_router.get("/{nit}")
 async def obtener_empresa(nit: str = Path(..., description="NIT de la empresa")):
     """Obtiene una empresa por NIT"""
-    resultado = empresa_service.obtener_empresa_por_nit(nit)
+    resultado = await empresa_service.obtener_empresa_por_nit(nit)
     if not resultado['success']:
         raise HTTPException(status_code=404, detail=resultado.get('error'))
     return normalize_response(resultado)
@@ -342,7 +519,7 @@ async def crear_empresa(empresa_data: EmpresaRequest):
             documento=documento
         )
         
-        resultado = empresa_service.crear_empresa(empresa)
+        resultado = await empresa_service.crear_empresa(empresa)
         if not resultado['success']:
             raise HTTPException(status_code=400, detail=resultado.get('error'))
         return normalize_response(resultado)
@@ -359,7 +536,7 @@ async def actualizar_empresa(
     """Actualiza una empresa existente"""
     try:
         # Primero obtener la empresa existente para tener el ID
-        empresa_existente = empresa_service.obtener_empresa_por_nit(nit)
+        empresa_existente = await empresa_service.obtener_empresa_por_nit(nit)
         if not empresa_existente['success']:
             raise HTTPException(status_code=404, detail=f"Empresa con NIT {nit} no encontrada")
         
@@ -396,7 +573,7 @@ async def actualizar_empresa(
             documento=documento
         )
         
-        resultado = empresa_service.actualizar_empresa(empresa)
+        resultado = await empresa_service.actualizar_empresa(empresa)
         
         if not resultado['success']:
             raise HTTPException(status_code=400, detail=resultado.get('error'))
@@ -420,7 +597,7 @@ async def actualizar_estado_modulo(
     - **campo**: renovado o facturado
     - **valor**: 0 o 1
     """
-    resultado = empresa_service.actualizar_estado_modulo(
+    resultado = await empresa_service.actualizar_estado_modulo(
         nit, datos.modulo, datos.campo, datos.valor
     )
     if not resultado['success']:
@@ -432,7 +609,7 @@ async def actualizar_estado_modulo(
 async def eliminar_empresa(nit: str = Path(..., description="NIT de la empresa")):
     """Desactiva una empresa (soft delete)"""
     # Primero obtener la empresa para conseguir su ID
-    resultado_empresa = empresa_service.obtener_empresa_por_nit(nit)
+    resultado_empresa = await empresa_service.obtener_empresa_por_nit(nit)
     if not resultado_empresa['success']:
         raise HTTPException(status_code=404, detail=resultado_empresa.get('error'))
     
@@ -441,7 +618,7 @@ async def eliminar_empresa(nit: str = Path(..., description="NIT de la empresa")
     if not empresa_id:
         raise HTTPException(status_code=404, detail="No se pudo obtener el ID de la empresa")
     
-    resultado = empresa_service.eliminar_empresa(empresa_id)
+    resultado = await empresa_service.eliminar_empresa(empresa_id)
     if not resultado['success']:
         raise HTTPException(status_code=404, detail=resultado.get('error'))
     return resultado
@@ -451,161 +628,102 @@ async def eliminar_empresa(nit: str = Path(..., description="NIT de la empresa")
 # RUTAS DE ESTADÍSTICAS
 # ========================================
 
-@estadisticas_router.get("/resumen")
-async def obtener_resumen():
-    """Obtiene resumen general del sistema"""
-    resultado = stats_service.obtener_estadisticas_generales()
+async def _obtener_estadisticas() -> dict:
+    """Obtiene el resultado agregado que comparten todos los endpoints de estadísticas"""
+    resultado = await stats_service.obtener_estadisticas()
     if not resultado['success']:
         raise HTTPException(status_code=500, detail=resultado.get('error'))
-    
-    stats = resultado.get('data', {})
-    
-    # Calcular totales
-    total_empresas = stats.get('total_empresas', 0)
-    empresas_activas = total_empresas  # Todas son activas por el filtro
-    
-    cert = stats.get('certificados', {})
-    res = stats.get('resoluciones', {})
-    doc = stats.get('documentos', {})
-    
-    # Obtener estadísticas de vencimientos para alertas críticas
-    venc_cert = stats_service.obtener_estadisticas_vencimientos_certificados()
-    venc_res = stats_service.obtener_estadisticas_vencimientos_resoluciones()
-    venc_doc = stats_service.obtener_estadisticas_vencimientos_documentos()
-    
-    # Calcular alertas críticas (vencidos + por vencer)
-    alertas_criticas = 0
-    if venc_cert['success']:
-        alertas_criticas += venc_cert['data'].get('vencidos', 0) + venc_cert['data'].get('por_vencer', 0)
-    if venc_res['success']:
-        alertas_criticas += venc_res['data'].get('vencidos', 0) + venc_res['data'].get('por_vencer', 0)
-    if venc_doc['success']:
-        alertas_criticas += venc_doc['data'].get('vencidos', 0) + venc_doc['data'].get('por_vencer', 0)
-    
-    return {
-        'success': True,
-        'datos': {
-            'total_empresas': total_empresas,
-            'empresas_activas': empresas_activas,
-            'total_certificados': cert.get('activos', 0),
-            'total_resoluciones': res.get('activos', 0),
-            'total_documentos': doc.get('activos', 0),
-            'alertas_criticas': alertas_criticas,
-            'certificados': cert,
-            'resoluciones': res,
-            'documentos': doc
+    return resultado.get('data', {})
+
+
+@estadisticas_router.get("/resumen")
+async def obtener_resumen(request: Request):
+    """Obtiene resumen general del sistema (respuesta cacheada, admite If-None-Match)"""
+    async def obtener():
+        stats = await _obtener_estadisticas()
+        
+        # Calcular totales
+        total_empresas = stats.get('total_empresas', 0)
+        empresas_activas = total_empresas  # Todas son activas por el filtro
+        
+        cert = stats.get('certificados', {})
+        res = stats.get('resoluciones', {})
+        doc = stats.get('documentos', {})
+        
+        return {
+            'success': True,
+            'datos': {
+                'total_empresas': total_empresas,
+                'empresas_activas': empresas_activas,
+                'total_certificados': cert.get('activos', 0),
+                'total_resoluciones': res.get('activos', 0),
+                'total_documentos': doc.get('activos', 0),
+                'alertas_criticas': stats.get('alertas_criticas', 0),
+                'certificados': cert,
+                'resoluciones': res,
+                'documentos': doc
+            }
         }
-    }
+    
+    return await respuesta_condicional(request, ('empresas',), ('estadisticas', 'resumen'), obtener)
 
 
 @estadisticas_router.get("/por-estado")
-async def obtener_por_estado():
-    """Obtiene distribución de empresas por estado"""
-    # Obtener todas las empresas activas y contar por estado
-    empresas = empresa_service.obtener_empresas_activas()
-    if not empresas['success']:
-        raise HTTPException(status_code=500, detail=empresas.get('error'))
-    
-    # Contar por estado
-    estados = {}
-    for emp in empresas.get('data', []):
-        estado = emp.get('estado', 'inactivo')
-        estados[estado] = estados.get(estado, 0) + 1
+async def obtener_por_estado(request: Request):
+    """Obtiene distribución de empresas por estado (respuesta cacheada, admite If-None-Match)"""
+    async def obtener():
+        stats = await _obtener_estadisticas()
+        return {
+            'success': True,
+            'datos': stats.get('por_estado', {})
+        }
     
-    return {
-        'success': True,
-        'datos': estados
-    }
+    return await respuesta_condicional(request, ('empresas',), ('estadisticas', 'por-estado'), obtener)
 
 
 @estadisticas_router.get("/certificados")
-async def obtener_certificados():
-    """Obtiene estadísticas de certificados con información de vencimientos"""
-    # Obtener estadísticas generales
-    resultado_general = stats_service.obtener_estadisticas_generales()
-    if not resultado_general['success']:
-        raise HTTPException(status_code=500, detail=resultado_general.get('error'))
-    
-    cert_stats = resultado_general.get('data', {}).get('certificados', {})
-    
-    # Obtener estadísticas de vencimientos basadas en fechas
-    resultado_vencimientos = stats_service.obtener_estadisticas_vencimientos_certificados()
-    if not resultado_vencimientos['success']:
-        raise HTTPException(status_code=500, detail=resultado_vencimientos.get('error'))
-    
-    vencimientos = resultado_vencimientos.get('data', {})
-    
-    return {
-        'success': True,
-        'datos': {
-            **cert_stats,
-            'vencidos': vencimientos.get('vencidos', 0),
-            'por_vencer': vencimientos.get('por_vencer', 0),
-            'vigentes': vencimientos.get('vigentes', 0)
+async def obtener_certificados(request: Request):
+    """Obtiene estadísticas de certificados con información de vencimientos (respuesta cacheada, admite If-None-Match)"""
+    async def obtener():
+        stats = await _obtener_estadisticas()
+        return {
+            'success': True,
+            'datos': stats.get('certificados', {})
         }
-    }
+    
+    return await respuesta_condicional(request, ('empresas',), ('estadisticas', 'certificados'), obtener)
 
 
 @estadisticas_router.get("/resoluciones")
-async def obtener_resoluciones():
-    """Obtiene estadísticas de resoluciones con información de vencimientos"""
-    # Obtener estadísticas generales
-    resultado_general = stats_service.obtener_estadisticas_generales()
-    if not resultado_general['success']:
-        raise HTTPException(status_code=500, detail=resultado_general.get('error'))
-    
-    res_stats = resultado_general.get('data', {}).get('resoluciones', {})
-    
-    # Obtener estadísticas de vencimientos basadas en fechas
-    resultado_vencimientos = stats_service.obtener_estadisticas_vencimientos_resoluciones()
-    if not resultado_vencimientos['success']:
-        raise HTTPException(status_code=500, detail=resultado_vencimientos.get('error'))
-    
-    vencimientos = resultado_vencimientos.get('data', {})
-    
-    return {
-        'success': True,
-        'datos': {
-            **res_stats,
-            'vencidos': vencimientos.get('vencidos', 0),
-            'por_vencer': vencimientos.get('por_vencer', 0),
-            'vigentes': vencimientos.get('vigentes', 0)
+async def obtener_resoluciones(request: Request):
+    """Obtiene estadísticas de resoluciones con información de vencimientos (respuesta cacheada, admite If-None-Match)"""
+    async def obtener():
+        stats = await _obtener_estadisticas()
+        return {
+            'success': True,
+            'datos': stats.get('resoluciones', {})
         }
-    }
+    
+    return await respuesta_condicional(request, ('empresas',), ('estadisticas', 'resoluciones'), obtener)
 
 
 @estadisticas_router.get("/documentos")
-async def obtener_documentos():
-    """Obtiene estadísticas de documentos con información de vencimientos"""
-    # Obtener estadísticas generales
-    resultado_general = stats_service.obtener_estadisticas_generales()
-    if not resultado_general['success']:
-        raise HTTPException(status_code=500, detail=resultado_general.get('error'))
-    
-    doc_stats = resultado_general.get('data', {}).get('documentos', {})
-    
-    # Obtener estadísticas de vencimientos basadas en fechas
-    resultado_vencimientos = stats_service.obtener_estadisticas_vencimientos_documentos()
-    if not resultado_vencimientos['success']:
-        raise HTTPException(status_code=500, detail=resultado_vencimientos.get('error'))
-    
-    vencimientos = resultado_vencimientos.get('data', {})
-    
-    return {
-        'success': True,
-        'datos': {
-            **doc_stats,
-            'vencidos': vencimientos.get('vencidos', 0),
-            'por_vencer': vencimientos.get('por_vencer', 0),
-            'vigentes': vencimientos.get('vigentes', 0)
+async def obtener_documentos(request: Request):
+    """Obtiene estadísticas de documentos con información de vencimientos (respuesta cacheada, admite If-None-Match)"""
+    async def obtener():
+        stats = await _obtener_estadisticas()
+        return {
+            'success': True,
+            'datos': stats.get('documentos', {})
         }
-    }
+    
+    return await respuesta_condicional(request, ('empresas',), ('estadisticas', 'documentos'), obtener)
 
 
 @estadisticas_router.get("/pendientes")
 async def obtener_pendientes():
     """Obtiene empresas con pendientes de renovación o facturación"""
-    resultado = stats_service.obtener_empresas_pendientes()
+    resultado = await stats_service.obtener_empresas_pendientes()
     if not resultado['success']:
         raise HTTPException(status_code=500, detail=resultado.get('error'))
     return resultado
@@ -617,55 +735,51 @@ async def obtener_pendientes():
 
 @notificaciones_router.get("/vencimientos")
 async def obtener_vencimientos(
+    request: Request,
     dias: int = Query(30, ge=1, le=365, description="Días de anticipación")
 ):
-    """Obtiene notificaciones de vencimientos próximos"""
-    resultado = notif_service.obtener_notificaciones_pendientes(dias)
-    if not resultado['success']:
-        raise HTTPException(status_code=500, detail=resultado.get('error'))
-    return normalize_response(resultado)
+    """Obtiene notificaciones de vencimientos próximos (respuesta cacheada, admite If-None-Match)"""
+    async def obtener():
+        resultado = await notif_service.obtener_notificaciones_pendientes(dias)
+        if not resultado['success']:
+            raise HTTPException(status_code=500, detail=resultado.get('error'))
+        return normalize_response(resultado)
+    
+    return await respuesta_condicional(request, ('empresas',), ('notificaciones', 'vencimientos', dias), obtener)
 
 
 @notificaciones_router.get("/criticas")
-async def obtener_criticas():
-    """Obtiene notificaciones críticas (próximas a vencer en 7 días)"""
-    resultado = notif_service.obtener_notificaciones_pendientes(7)
-    if not resultado['success']:
-        raise HTTPException(status_code=500, detail=resultado.get('error'))
-    return normalize_response(resultado)
+async def obtener_criticas(request: Request):
+    """Obtiene notificaciones críticas (próximas a vencer en 7 días, respuesta cacheada, admite If-None-Match)"""
+    async def obtener():
+        resultado = await notif_service.obtener_notificaciones_pendientes(7)
+        if not resultado['success']:
+            raise HTTPException(status_code=500, detail=resultado.get('error'))
+        return normalize_response(resultado)
+    
+    return await respuesta_condicional(request, ('empresas',), ('notificaciones', 'vencimientos', 7), obtener)
 
 
 @notificaciones_router.get("/conteo")
-async def obtener_conteo():
-    """Obtiene el conteo de notificaciones por prioridad"""
-    resultado = notif_service.obtener_notificaciones_pendientes(30)
-    if not resultado['success']:
-        raise HTTPException(status_code=500, detail=resultado.get('error'))
-    
-    # Aplanar alertas para contar por prioridad
-    datos = resultado.get('data', [])
-    alertas_flat = []
-    for notif in datos:
-        for alerta in notif.get('alertas', []):
-            alertas_flat.append(alerta)
-    
-    conteo = {
-        'CRITICA': sum(1 for a in alertas_flat if a.get('prioridad') == 'CRITICA'),
-        'ALTA': sum(1 for a in alertas_flat if a.get('prioridad') == 'ALTA'),
-        'MEDIA': sum(1 for a in alertas_flat if a.get('prioridad') == 'MEDIA'),
-        'total': len(alertas_flat)
-    }
+async def obtener_conteo(request: Request):
+    """Obtiene el conteo de notificaciones por prioridad (respuesta cacheada, admite If-None-Match)"""
+    async def obtener():
+        resultado = await stats_service.obtener_conteo_alertas()
+        if not resultado['success']:
+            raise HTTPException(status_code=500, detail=resultado.get('error'))
+        
+        return {
+            'success': True,
+            'datos': resultado.get('data', {})
+        }
     
-    return {
-        'success': True,
-        'datos': conteo
-    }
+    return await respuesta_condicional(request, ('empresas',), ('notificaciones', 'conteo'), obtener)
 
 
 @notificaciones_router.get("/mes-actual")
 async def obtener_vencimientos_mes():
     """Obtiene vencimientos del mes actual"""
-    resultado = notif_service.obtener_vencimientos_mes_actual()
+    resultado = await notif_service.obtener_vencimientos_mes_actual()
     if not resultado['success']:
         raise HTTPException(status_code=500, detail=resultado.get('error'))
     return normalize_response(resultado)
@@ -695,7 +809,7 @@ async def enviar_notificaciones_email(
         )
     
     # Obtener notificaciones pendientes
-    resultado_notif = notif_service.obtener_notificaciones_pendientes()
+    resultado_notif = await notif_service.obtener_notificaciones_pendientes()
     if not resultado_notif['success']:
         raise HTTPException(
             status_code=500, 
@@ -705,7 +819,7 @@ async def enviar_notificaciones_email(
     notificaciones = resultado_notif.get('data', [])
     
     # Enviar email
-    resultado = email_service.enviar_notificaciones_vencimientos(
+    resultado = await email_service.enviar_notificaciones_vencimientos(
         destinatarios, 
         notificaciones
     )
@@ -745,7 +859,7 @@ async def enviar_email_simple(
             detail="Servicio de email no disponible"
         )
     
-    resultado = email_service.enviar_email_simple(
+    resultado = await email_service.enviar_email_simple(
         destinatario, 
         asunto, 
         mensaje
@@ -793,9 +907,9 @@ async def verificar_configuracion():
 # ========================================
 
 @triggers_router.get("")
-async def obtener_triggers():
+async def obtener_triggers(request: Request):
     """
-    Obtiene todos los triggers configurados
+    Obtiene todos los triggers configurados (admite If-None-Match)
     
     Returns:
         Lista de triggers
@@ -806,11 +920,13 @@ async def obtener_triggers():
             detail="Servicio de triggers no disponible"
         )
     
-    resultado = trigger_service.obtener_triggers()
-    if not resultado['success']:
-        raise HTTPException(status_code=500, detail=resultado.get('error'))
+    async def obtener():
+        resultado = await trigger_service.obtener_triggers()
+        if not resultado['success']:
+            raise HTTPException(status_code=500, detail=resultado.get('error'))
+        return normalize_response(resultado)
     
-    return normalize_response(resultado)
+    return await respuesta_condicional(request, ('triggers',), ('triggers',), obtener)
 
 
 @triggers_router.get("/{trigger_id}")
@@ -830,7 +946,7 @@ async def obtener_trigger(trigger_id: int):
             detail="Servicio de triggers no disponible"
         )
     
-    resultado = trigger_service.obtener_trigger(trigger_id)
+    resultado = await trigger_service.obtener_trigger(trigger_id)
     if not resultado['success']:
         raise HTTPException(status_code=404, detail=resultado.get('error'))
     
@@ -854,7 +970,7 @@ async def crear_trigger(datos: Dict[str, Any] = Body(...)):
             detail="Servicio de triggers no disponible"
         )
     
-    resultado = trigger_service.crear_trigger(datos)
+    resultado = await trigger_service.crear_trigger(datos)
     if not resultado['success']:
         raise HTTPException(status_code=400, detail=resultado.get('error'))
     
@@ -886,7 +1002,7 @@ async def actualizar_trigger(trigger_id: int, datos: Dict[str, Any] = Body(...))
             detail="Servicio de triggers no disponible"
         )
     
-    resultado = trigger_service.actualizar_trigger(trigger_id, datos)
+    resultado = await trigger_service.actualizar_trigger(trigger_id, datos)
     if not resultado['success']:
         raise HTTPException(status_code=400, detail=resultado.get('error'))
     
@@ -917,7 +1033,7 @@ async def eliminar_trigger(trigger_id: int):
             detail="Servicio de triggers no disponible"
         )
     
-    resultado = trigger_service.eliminar_trigger(trigger_id)
+    resultado = await trigger_service.eliminar_trigger(trigger_id)
     if not resultado['success']:
         raise HTTPException(status_code=404, detail=resultado.get('error'))
     
@@ -952,7 +1068,7 @@ async def cambiar_estado_trigger(
             detail="Servicio de triggers no disponible"
         )
     
-    resultado = trigger_service.cambiar_estado(trigger_id, activo)
+    resultado = await trigger_service.cambiar_estado(trigger_id, activo)
     if not resultado['success']:
         raise HTTPException(status_code=400, detail=resultado.get('error'))
     
@@ -980,7 +1096,7 @@ async def obtener_triggers_pendientes():
             detail="Servicio de triggers no disponible"
         )
     
-    resultado = trigger_service.obtener_triggers_pendientes()
+    resultado = await trigger_service.obtener_triggers_pendientes()
     if not resultado['success']:
         raise HTTPException(status_code=500, detail=resultado.get('error'))
     
@@ -993,6 +1109,7 @@ async def obtener_triggers_pendientes():
 
 @triggers_router.get("/ejecuciones")
 async def obtener_todas_ejecuciones(
+    request: Request,
     limit: int = Query(default=100, ge=1, le=500, description="Número máximo de registros")
 ):
     """
@@ -1010,15 +1127,18 @@ async def obtener_todas_ejecuciones(
             detail="Servicio de triggers no disponible"
         )
     
-    resultado = trigger_service.obtener_todas_ejecuciones(limit)
-    if not resultado['success']:
-        raise HTTPException(status_code=500, detail=resultado.get('error'))
+    async def obtener():
+        resultado = await trigger_service.obtener_todas_ejecuciones(limit)
+        if not resultado['success']:
+            raise HTTPException(status_code=500, detail=resultado.get('error'))
+        return normalize_response(resultado)
     
-    return normalize_response(resultado)
+    return await respuesta_condicional(request, ('triggers',), ('triggers', 'ejecuciones', limit), obtener)
 
 
 @triggers_router.get("/{trigger_id}/ejecuciones")
 async def obtener_historial_trigger(
+    request: Request,
     trigger_id: int = Path(..., description="ID del trigger"),
     limit: int = Query(default=50, ge=1, le=200, description="Número máximo de registros")
 ):
@@ -1038,11 +1158,15 @@ async def obtener_historial_trigger(
             detail="Servicio de triggers no disponible"
         )
     
-    resultado = trigger_service.obtener_historial_trigger(trigger_id, limit)
-    if not resultado['success']:
-        raise HTTPException(status_code=500, detail=resultado.get('error'))
+    async def obtener():
+        resultado = await trigger_service.obtener_historial_trigger(trigger_id, limit)
+        if not resultado['success']:
+            raise HTTPException(status_code=500, detail=resultado.get('error'))
+        return normalize_response(resultado)
     
-    return normalize_response(resultado)
+    return await respuesta_condicional(
+        request, ('triggers',), ('triggers', trigger_id, 'ejecuciones', limit), obtener
+    )
 
 
 @triggers_router.get("/{trigger_id}/estadisticas")
@@ -1064,7 +1188,7 @@ async def obtener_estadisticas_trigger(
             detail="Servicio de triggers no disponible"
         )
     
-    resultado = trigger_service.obtener_estadisticas_trigger(trigger_id)
+    resultado = await trigger_service.obtener_estadisticas_trigger(trigger_id)
     if not resultado['success']:
         raise HTTPException(status_code=404, detail=resultado.get('error'))
     
@@ -1094,7 +1218,7 @@ async def registrar_ejecucion(datos: Dict[str, Any] = Body(...)):
             detail="Servicio de triggers no disponible"
         )
     
-    resultado = trigger_service.registrar_ejecucion(datos)
+    resultado = await trigger_service.registrar_ejecucion(datos)
     if not resultado['success']:
         raise HTTPException(status_code=400, detail=resultado.get('error'))
     
@@ -1154,16 +1278,25 @@ async def recargar_scheduler():
 # ========================================
 
 @db_router.get("/tables", dependencies=[Depends(require_admin)])
-async def get_tables():
+async def get_tables(
+    exactos: Optional[str] = Query(None, description="Tablas separadas por coma con conteo exacto (COUNT)")
+):
     """
     Obtiene la lista de todas las tablas en la base de datos
     Solo accesible por administradores
     
+    El número de registros es la estimación de las estadísticas de PostgreSQL
+    (count_exact = false) salvo para las tablas indicadas en exactos
+    
+    Args:
+        exactos: Tablas para las que se cuenta exactamente (p. ej. "empresas,usuarios")
+    
     Returns:
-        Lista de tablas con información básica
+        Lista de tablas con registros, tamaños y columnas
     """
     try:
-        tables_info = db_service.get_all_table_info()
+        exact_counts = [t.strip() for t in exactos.split(',') if t.strip()] if exactos else None
+        tables_info = await db_service.get_all_table_info(exact_counts)
         return {
             'success': True,
             'datos': tables_info
@@ -1175,54 +1308,129 @@ async def get_tables():
 @db_router.get("/tables/{table_name}", dependencies=[Depends(require_admin)])
 async def get_table_data(
     table_name: str = Path(..., description="Nombre de la tabla"),
-    limit: int = Query(100, ge=1, le=10000, description="Número máximo de registros (1-10000)")
+    limit: int = Query(100, ge=1, le=DatabaseService.MAX_PREVIEW, description="Número máximo de registros (1-1000)"),
+    exact_count: bool = Query(False, description="Contar los registros con COUNT en lugar de estimarlos")
 ):
     """
-    Obtiene los datos de una tabla específica
+    Obtiene una vista previa de los datos de una tabla específica
     Solo accesible por administradores
+    Para recorrer tablas completas usar /tables/{table_name}/stream
     
     Args:
         table_name: Nombre de la tabla
-        limit: Número máximo de registros (1-10000)
+        limit: Número máximo de registros (1-1000)
+        exact_count: Si es True total_rows es exacto (recorre la tabla)
         
     Returns:
         Esquema y datos de la tabla
     """
     try:
-        data = db_service.preview_table(table_name, limit)
+        data = await db_service.preview_table(table_name, limit, exact_count)
         return {
             'success': True,
             'datos': data
         }
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@db_router.get("/tables/{table_name}/count", dependencies=[Depends(require_admin)])
+async def get_table_count(table_name: str = Path(..., description="Nombre de la tabla")):
+    """
+    Cuenta exactamente los registros de una tabla (COUNT)
+    Solo accesible por administradores
+    
+    Args:
+        table_name: Nombre de la tabla
+        
+    Returns:
+        Nombre de la tabla y número exacto de registros
+    """
+    try:
+        count = await db_service.get_table_count(table_name)
+        return {
+            'success': True,
+            'datos': {
+                'table': table_name,
+                'count': count
+            }
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@db_router.get("/tables/{table_name}/stream", dependencies=[Depends(require_admin)])
+async def stream_table_data(
+    table_name: str = Path(..., description="Nombre de la tabla"),
+    offset: int = Query(0, ge=0, description="Registros a omitir"),
+    limit: Optional[int] = Query(None, ge=1, description="Número máximo de registros (todos si se omite)")
+):
+    """
+    Entrega las filas de una tabla como NDJSON leyendo con un cursor del lado del servidor
+    Solo accesible por administradores
+    
+    Formato: {"columnas": [...]}, una lista de valores por fila y al final {"filas": n}
+    (o {"error": "..."} si la lectura falla a mitad)
+    """
+    try:
+        contenido = await db_service.stream_table(table_name, offset, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return StreamingResponse(contenido, media_type="application/x-ndjson")
+
+
 @db_router.post("/query", dependencies=[Depends(require_admin)])
 async def execute_query(query: str = Body(..., embed=True)):
     """
-    Ejecuta una consulta SQL de solo lectura (SELECT)
+    Ejecuta una consulta SQL de solo lectura (SELECT) y entrega el resultado como NDJSON
     Solo accesible por administradores
+    Corre en una transacción de solo lectura con statement_timeout (DB_QUERY_TIMEOUT_MS)
+    y devuelve como máximo DB_QUERY_MAX_ROWS filas
     
     Args:
         query: Consulta SQL (solo SELECT permitido)
         
     Returns:
-        Resultados de la consulta
+        Stream NDJSON: {"columnas": [...]}, una lista de valores por fila y al final
+        {"filas": n} (con "truncado" y "limite" si se alcanzó el máximo de filas)
+        o {"error": "..."} si la consulta falla
         
     Raises:
         HTTPException 400: Si la consulta no es válida
-        HTTPException 500: Si hay error en la ejecución
     """
     try:
-        results = db_service.execute_query(query)
+        contenido = await db_service.stream_query(query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(contenido, media_type="application/x-ndjson")
+
+
+@db_router.post("/query/explain", dependencies=[Depends(require_admin)])
+async def explain_query(query: str = Body(..., embed=True)):
+    """
+    Ejecuta EXPLAIN (ANALYZE, BUFFERS) sobre una consulta SELECT
+    Solo accesible por administradores
+    
+    Args:
+        query: Consulta SQL (solo SELECT permitido)
+        
+    Returns:
+        Plan de ejecución (JSON) con tiempos de planificación y ejecución
+        
+    Raises:
+        HTTPException 400: Si la consulta no es válida o PostgreSQL la rechaza
+    """
+    try:
+        plan = await db_service.explain_query(query)
         return {
             'success': True,
-            'datos': {
-                'query': query,
-                'rows': len(results),
-                'results': results
-            }
+            'datos': plan
         }
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1243,7 +1451,7 @@ async def get_table_schema(table_name: str = Path(..., description="Nombre de la
         Esquema de la tabla con nombres y tipos de columnas
     """
     try:
-        schema = db_service.get_table_schema(table_name)
+        schema = await db_service.get_table_schema(table_name)
         return {
             'success': True,
             'datos': {
@@ -3,7 +3,7 @@ Esquemas Pydantic para validación de datos en la API
 """
 from pydantic import BaseModel, Field
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 
 
 class ModuloRequest(BaseModel):
@@ -12,7 +12,7 @@ class ModuloRequest(BaseModel):
     fecha_inicio: Optional[datetime] = None
     fecha_final: Optional[datetime] = None
     fecha_vencimiento: Optional[datetime] = None  # Alias para fecha_final
-    notificacion: Optional[str] = None
+    notificacion: Optional[date] = None  # Se recalcula como fecha_final - 30 días
     renovado: int = Field(0, ge=0, le=1)
     facturado: int = Field(0, ge=0, le=1)
     comentarios: Optional[str] = None
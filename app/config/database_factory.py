@@ -2,14 +2,23 @@
 Factory para crear repositorios PostgreSQL
 Patrón Factory para desacoplar la creación de repositorios
 """
-from typing import Protocol
+from typing import Any, Protocol, Optional, Union
 from app.config.settings import Settings
+from app.repositories.connection_pool import ConnectionPool
+from app.repositories.async_repository import DatabaseExecutor
+from app.repositories.cached_repository import CachedEmpresaRepository, TTLCache
 from app.repositories.empresa_repository import EmpresaRepository
+from app.repositories.importacion_job_repository import ImportacionJobRepository
+from app.repositories.migrations import MigrationRunner
+from app.repositories.token_store import ITokenStore, MemoryTokenStore, PostgresTokenStore, RedisTokenStore
+from app.repositories.trigger_repository import TriggerRepository
+from app.repositories.usuario_repository import UsuarioRepository
+from app.repositories.version_repository import VersionRepository
 
 
 class IRepositoryFactory(Protocol):
     """Interfaz para factories de repositorios"""
-    
+
     def create_empresa_repository(self) -> EmpresaRepository:
         """Crea un repositorio de empresas"""
         ...
@@ -17,41 +26,181 @@ class IRepositoryFactory(Protocol):
 
 class DatabaseFactory:
     """
-    Factory que crea repositorios PostgreSQL
+    Factory que crea repositorios PostgreSQL.
+    Todos los repositorios creados comparten el mismo pool de conexiones.
+    Según DB_ACCESS_MODE entrega además las contrapartes asíncronas de los servicios.
+    Los repositorios de empresas comparten una caché de lecturas que se invalida con cada escritura.
     """
-    
-    def __init__(self, settings: Settings):
+
+    def __init__(self, settings: Settings, pool: Optional[ConnectionPool] = None):
         """
         Inicializa el factory con la configuración
-        
+
         Args:
             settings: Configuración del sistema
+            pool: Pool de conexiones compartido (si no se indica se crea desde settings)
         """
         self.settings = settings
-    
-    def create_empresa_repository(self) -> EmpresaRepository:
+        self.pool = pool or ConnectionPool.from_settings(settings)
+        self.executor: Optional[DatabaseExecutor] = None
+        if settings.DB_ACCESS_MODE == 'async':
+            self.executor = DatabaseExecutor(max_workers=self.pool.maxconn)
+        self.cache: Optional[TTLCache] = None
+        if settings.CACHE_TTL_SECONDS > 0:
+            self.cache = TTLCache(ttl=settings.CACHE_TTL_SECONDS, max_size=settings.CACHE_MAX_SIZE)
+        self._token_store: Optional[ITokenStore] = None
+
+    def _connection_kwargs(self) -> dict:
+        """Parámetros de conexión comunes a todos los repositorios"""
+        return {
+            'host': self.settings.DB_HOST,
+            'port': self.settings.DB_PORT,
+            'database': self.settings.DB_NAME,
+            'user': self.settings.DB_USER,
+            'password': self.settings.DB_PASSWORD,
+            'pool': self.pool
+        }
+
+    def create_empresa_repository(self) -> Union[EmpresaRepository, CachedEmpresaRepository]:
         """
         Crea un repositorio de empresas PostgreSQL
-        
+
+        Returns:
+            Repositorio de empresas configurado (envuelto en la caché compartida si está activa)
+        """
+        repository = EmpresaRepository(**self._connection_kwargs())
+        if self.cache is None:
+            return repository
+        return CachedEmpresaRepository(repository, self.cache, self.create_version_repository())
+
+    def create_async_service(self, service: Any):
+        """
+        Crea la contraparte asíncrona de un servicio
+
+        Args:
+            service: Servicio síncrono
+
+        Returns:
+            AsyncService cuyos métodos pueden esperarse desde las rutas
+        """
+        from app.services.async_service import AsyncService
+        return AsyncService(service, self.executor)
+
+    def create_trigger_repository(self) -> TriggerRepository:
+        """
+        Crea un repositorio de triggers PostgreSQL
+
+        Returns:
+            Repositorio de triggers configurado
+        """
+        return TriggerRepository(**self._connection_kwargs())
+
+    def create_usuario_repository(self) -> UsuarioRepository:
+        """
+        Crea un repositorio de usuarios PostgreSQL
+
+        Returns:
+            Repositorio de usuarios configurado
+        """
+        return UsuarioRepository(**self._connection_kwargs())
+
+    def create_importacion_job_repository(self) -> ImportacionJobRepository:
+        """
+        Crea un repositorio de trabajos de importación PostgreSQL
+
+        Returns:
+            Repositorio de trabajos de importación configurado
+        """
+        return ImportacionJobRepository(**self._connection_kwargs())
+
+    def create_token_store(self) -> ITokenStore:
+        """
+        Obtiene el almacén de tokens de sesión configurado en TOKEN_STORE.
+        Se crea una sola vez: la autenticación y la limpieza periódica usan el mismo.
+
+        Returns:
+            Almacén de tokens (PostgreSQL, Redis o memoria)
+
+        Raises:
+            ValueError: Si TOKEN_STORE no es un almacén conocido
+        """
+        if self._token_store is None:
+            tipo = self.settings.TOKEN_STORE
+            if tipo == 'postgresql':
+                self._token_store = PostgresTokenStore(**self._connection_kwargs())
+            elif tipo == 'redis':
+                self._token_store = RedisTokenStore.from_url(self.settings.REDIS_URL)
+            elif tipo == 'memoria':
+                self._token_store = MemoryTokenStore()
+            else:
+                raise ValueError(f"TOKEN_STORE no válido: {tipo} (use postgresql, redis o memoria)")
+        return self._token_store
+
+    def create_version_repository(self) -> VersionRepository:
+        """
+        Crea el repositorio de versiones de los datos (ETag de la API)
+
         Returns:
-            Repositorio de empresas configurado
+            Repositorio de versiones configurado
         """
-        return EmpresaRepository(
-            host=self.settings.DB_HOST,
-            port=self.settings.DB_PORT,
-            database=self.settings.DB_NAME,
-            user=self.settings.DB_USER,
-            password=self.settings.DB_PASSWORD
+        return VersionRepository(**self._connection_kwargs())
+
+    def create_database_service(self):
+        """
+        Crea el servicio de consultas del visor de base de datos
+
+        Returns:
+            DatabaseService configurado
+        """
+        from app.services.database_service import DatabaseService
+        return DatabaseService(
+            **self._connection_kwargs(),
+            statement_timeout_ms=self.settings.DB_QUERY_TIMEOUT_MS,
+            max_rows=self.settings.DB_QUERY_MAX_ROWS
         )
-    
+
+    def run_migrations(self) -> list:
+        """
+        Aplica las migraciones pendientes del esquema (ver MigrationRunner).
+        Los repositorios no crean tablas: esto debe correr antes de usarlos.
+
+        Returns:
+            Nombres de las migraciones aplicadas
+        """
+        return MigrationRunner(self.pool).migrar()
+
+    def get_pool_stats(self) -> dict:
+        """
+        Obtiene las estadísticas del pool de conexiones
+
+        Returns:
+            Diccionario con estadísticas del pool
+        """
+        return self.pool.get_stats()
+
+    def get_cache_stats(self) -> Optional[dict]:
+        """
+        Obtiene las estadísticas de la caché de lecturas
+
+        Returns:
+            Diccionario con aciertos, fallos y hit_ratio, o None si la caché está desactivada
+        """
+        return self.cache.get_stats() if self.cache else None
+
+    def close(self):
+        """Detiene el ejecutor y cierra todas las conexiones del pool"""
+        if self.executor is not None:
+            self.executor.shutdown()
+        self.pool.closeall()
+
     @classmethod
     def from_settings(cls, settings: Settings) -> 'DatabaseFactory':
         """
         Método de conveniencia para crear el factory desde settings
-        
+
         Args:
             settings: Configuración del sistema
-            
+
         Returns:
             DatabaseFactory configurado
         """
@@ -21,12 +21,32 @@ class Settings:
     DB_USER: str = os.getenv('DB_USER', 'postgres')
     DB_PASSWORD: str = os.getenv('DB_PASSWORD', '')
     
+    # Pool de conexiones
+    DB_POOL_MIN: int = int(os.getenv('DB_POOL_MIN', '1'))
+    DB_POOL_MAX: int = int(os.getenv('DB_POOL_MAX', '10'))
+    DB_POOL_TIMEOUT: float = float(os.getenv('DB_POOL_TIMEOUT', '30'))  # Segundos esperando conexión libre
+    DB_POOL_HEALTHCHECK_IDLE: float = float(os.getenv('DB_POOL_HEALTHCHECK_IDLE', '30'))  # Ping si estuvo inactiva más de N segundos
+    DB_POOL_MAX_LIFETIME: float = float(os.getenv('DB_POOL_MAX_LIFETIME', '3600'))  # Reciclar conexiones tras N segundos
+    
+    # Caché de lecturas de empresas (CACHE_TTL_SECONDS=0 la desactiva)
+    CACHE_TTL_SECONDS: float = float(os.getenv('CACHE_TTL_SECONDS', '30'))
+    CACHE_MAX_SIZE: int = int(os.getenv('CACHE_MAX_SIZE', '256'))
+    
+    # Aplicar las migraciones pendientes del esquema al iniciar (False si se corren al desplegar)
+    DB_MIGRATE_ON_STARTUP: bool = os.getenv('DB_MIGRATE_ON_STARTUP', 'True').lower() == 'true'
+    
+    # Acceso a datos desde las rutas: 'async' (ejecutor dedicado) o 'sync' (en el event loop)
+    DB_ACCESS_MODE: str = os.getenv('DB_ACCESS_MODE', 'async').lower()
+    
     # API
     API_HOST: str = os.getenv('API_HOST', '0.0.0.0')
     API_PORT: int = int(os.getenv('API_PORT', '5000'))
     API_DEBUG: bool = os.getenv('API_DEBUG', 'True').lower() == 'true'
     API_BASE_URL: str = os.getenv('API_BASE_URL', 'http://localhost:5000/api')
     
+    # Respuestas de la API comprimidas con brotli/gzip a partir de este tamaño (0 desactiva)
+    COMPRESION_MIN_BYTES: int = int(os.getenv('COMPRESION_MIN_BYTES', '1000'))
+    
     # CORS - Usar field con default_factory para tipos mutables
     CORS_ORIGINS: List[str] = field(
         default_factory=lambda: os.getenv('CORS_ORIGINS', '*').split(',')
@@ -34,9 +54,27 @@ class Settings:
     # Notificaciones
     NOTIFICACION_DIAS_ANTICIPACION: int = int(os.getenv('NOTIFICACION_DIAS_ANTICIPACION', '30'))
     
+    # Dashboard: minutos entre refrescos completos del snapshot de contadores
+    DASHBOARD_REFRESH_MINUTES: int = int(os.getenv('DASHBOARD_REFRESH_MINUTES', '15'))
+    
+    # Consola SQL del visor: tiempo máximo por sentencia (ms) y filas devueltas como máximo
+    DB_QUERY_TIMEOUT_MS: int = int(os.getenv('DB_QUERY_TIMEOUT_MS', '15000'))
+    DB_QUERY_MAX_ROWS: int = int(os.getenv('DB_QUERY_MAX_ROWS', '10000'))
+    
+    # Importación masiva: archivos procesados a la vez en segundo plano
+    IMPORT_WORKERS: int = int(os.getenv('IMPORT_WORKERS', '2'))
+    
     # Seguridad
     SECRET_KEY: str = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     
+    # Sesiones: almacén de tokens ('postgresql', 'redis' o 'memoria'; memoria solo sirve con un worker)
+    TOKEN_STORE: str = os.getenv('TOKEN_STORE', 'postgresql').lower()
+    REDIS_URL: str = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    # Segundos que cada worker reutiliza la validación de un token sin consultar el almacén
+    TOKEN_CACHE_SECONDS: float = float(os.getenv('TOKEN_CACHE_SECONDS', '10'))
+    # Minutos entre limpiezas de tokens vencidos
+    TOKEN_CLEANUP_MINUTES: int = int(os.getenv('TOKEN_CLEANUP_MINUTES', '30'))
+    
     # Usuario Root Inicial
     ROOT_USER: str = os.getenv('ROOT_USER', 'admin')
     ROOT_PASSWORD: str = os.getenv('ROOT_PASSWORD', 'admin123')
@@ -61,8 +99,20 @@ class Settings:
         """Convierte la configuración a diccionario (ocultando datos sensibles)"""
         return {
             'db_type': self.DB_TYPE,
+            'db_pool_min': self.DB_POOL_MIN,
+            'db_pool_max': self.DB_POOL_MAX,
+            'db_access_mode': self.DB_ACCESS_MODE,
+            'cache_ttl_seconds': self.CACHE_TTL_SECONDS,
+            'cache_max_size': self.CACHE_MAX_SIZE,
             'api_host': self.API_HOST,
             'api_port': self.API_PORT,
             'api_debug': self.API_DEBUG,
-            'notificacion_dias': self.NOTIFICACION_DIAS_ANTICIPACION
+            'compresion_min_bytes': self.COMPRESION_MIN_BYTES,
+            'notificacion_dias': self.NOTIFICACION_DIAS_ANTICIPACION,
+            'dashboard_refresh_minutes': self.DASHBOARD_REFRESH_MINUTES,
+            'import_workers': self.IMPORT_WORKERS,
+            'token_store': self.TOKEN_STORE,
+            'token_cache_seconds': self.TOKEN_CACHE_SECONDS,
+            'db_query_timeout_ms': self.DB_QUERY_TIMEOUT_MS,
+            'db_query_max_rows': self.DB_QUERY_MAX_ROWS
         }
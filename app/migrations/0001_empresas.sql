@@ -0,0 +1,44 @@
+-- Tabla de empresas con sus tres módulos (certificado, resolución y documentos soporte)
+CREATE TABLE IF NOT EXISTS empresas (
+    id SERIAL PRIMARY KEY,
+    nit TEXT UNIQUE NOT NULL,
+    nombre TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'activo',
+
+    -- Certificado de Facturación Electrónica
+    cert_activo INTEGER DEFAULT 0,
+    cert_fecha_inicio TIMESTAMP,
+    cert_fecha_final TIMESTAMP,
+    cert_notificacion TEXT,
+    cert_renovado INTEGER DEFAULT 0,
+    cert_facturado INTEGER DEFAULT 0,
+    cert_comentarios TEXT,
+
+    -- Resolución de Facturación
+    resol_activo INTEGER DEFAULT 0,
+    resol_fecha_inicio TIMESTAMP,
+    resol_fecha_final TIMESTAMP,
+    resol_notificacion TEXT,
+    resol_renovado INTEGER DEFAULT 0,
+    resol_facturado INTEGER DEFAULT 0,
+    resol_comentarios TEXT,
+
+    -- Resolución Documentos Soporte
+    doc_activo INTEGER DEFAULT 0,
+    doc_fecha_inicio TIMESTAMP,
+    doc_fecha_final TIMESTAMP,
+    doc_notificacion TEXT,
+    doc_renovado INTEGER DEFAULT 0,
+    doc_facturado INTEGER DEFAULT 0,
+    doc_comentarios TEXT,
+
+    -- Metadatos
+    fecha_creacion TIMESTAMP NOT NULL,
+    fecha_actualizacion TIMESTAMP NOT NULL
+);
+
+-- Índices para mejorar el rendimiento
+CREATE INDEX IF NOT EXISTS idx_nit ON empresas(nit);
+CREATE INDEX IF NOT EXISTS idx_estado ON empresas(estado);
+CREATE INDEX IF NOT EXISTS idx_empresas_nombre_id ON empresas(nombre, id);
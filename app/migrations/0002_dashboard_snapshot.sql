@@ -0,0 +1,11 @@
+-- Snapshot materializado de contadores del dashboard
+CREATE TABLE IF NOT EXISTS dashboard_snapshot (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    fecha_referencia TIMESTAMP NOT NULL,
+    actualizado_en TIMESTAMP NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS dashboard_contadores (
+    clave TEXT PRIMARY KEY,
+    valor BIGINT NOT NULL DEFAULT 0
+);
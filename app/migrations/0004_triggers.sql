@@ -0,0 +1,37 @@
+-- Triggers de notificación programados y su historial de ejecuciones
+CREATE TABLE IF NOT EXISTS triggers (
+    id SERIAL PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    descripcion TEXT,
+    frecuencia TEXT NOT NULL DEFAULT 'diaria',
+    hora TEXT NOT NULL DEFAULT '08:00',
+    dias_semana TEXT,
+    dia_mes INTEGER,
+    intervalo_horas INTEGER,
+    destinatarios TEXT NOT NULL,
+    prioridades TEXT NOT NULL DEFAULT 'CRITICA,ALTA,MEDIA',
+    activo INTEGER NOT NULL DEFAULT 1,
+    ultima_ejecucion TEXT,
+    proxima_ejecucion TEXT,
+    creado_en TEXT NOT NULL,
+    actualizado_en TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS trigger_ejecuciones (
+    id SERIAL PRIMARY KEY,
+    trigger_id INTEGER NOT NULL,
+    trigger_nombre TEXT NOT NULL,
+    fecha_ejecucion TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'exitoso',
+    notificaciones_enviadas INTEGER DEFAULT 0,
+    empresas_procesadas INTEGER DEFAULT 0,
+    error_mensaje TEXT,
+    detalles TEXT,
+    FOREIGN KEY (trigger_id) REFERENCES triggers(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_trigger_ejecuciones_trigger_id
+ON trigger_ejecuciones(trigger_id);
+
+CREATE INDEX IF NOT EXISTS idx_trigger_ejecuciones_fecha
+ON trigger_ejecuciones(fecha_ejecucion DESC);
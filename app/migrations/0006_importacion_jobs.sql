@@ -0,0 +1,24 @@
+-- Trabajos de importación masiva en segundo plano y sus errores numerados
+CREATE TABLE IF NOT EXISTS importacion_jobs (
+    id TEXT PRIMARY KEY,
+    nombre_archivo TEXT,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    total INTEGER NOT NULL DEFAULT 0,
+    exitosas INTEGER NOT NULL DEFAULT 0,
+    actualizadas INTEGER NOT NULL DEFAULT 0,
+    fallidas INTEGER NOT NULL DEFAULT 0,
+    duplicadas INTEGER NOT NULL DEFAULT 0,
+    total_errores INTEGER NOT NULL DEFAULT 0,
+    formatos_detectados TEXT,
+    mensaje TEXT,
+    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_finalizacion TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS importacion_job_errores (
+    job_id TEXT NOT NULL REFERENCES importacion_jobs(id) ON DELETE CASCADE,
+    orden INTEGER NOT NULL,
+    mensaje TEXT NOT NULL,
+    PRIMARY KEY (job_id, orden)
+);
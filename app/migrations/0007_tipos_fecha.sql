@@ -0,0 +1,36 @@
+-- Fechas como tipos nativos en lugar de texto ISO, para comparar por fecha (no
+-- lexicográficamente) y poder usar índices en los filtros por rango.
+-- Los textos sin zona horaria se interpretan en la zona horaria de la sesión.
+
+-- Fecha de notificación de cada módulo (vencimiento - 30 días)
+ALTER TABLE empresas
+    ALTER COLUMN cert_notificacion TYPE DATE USING
+        CASE WHEN cert_notificacion ~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}' THEN substr(cert_notificacion, 1, 10)::date END,
+    ALTER COLUMN resol_notificacion TYPE DATE USING
+        CASE WHEN resol_notificacion ~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}' THEN substr(resol_notificacion, 1, 10)::date END,
+    ALTER COLUMN doc_notificacion TYPE DATE USING
+        CASE WHEN doc_notificacion ~ '^[0-9]{4}-[0-9]{2}-[0-9]{2}' THEN substr(doc_notificacion, 1, 10)::date END;
+
+-- Rangos de vencimiento de módulos activos (filtros vencimiento_desde/hasta, vencimientos del mes)
+CREATE INDEX IF NOT EXISTS idx_empresas_cert_fecha_final ON empresas (cert_fecha_final) WHERE cert_activo = 1;
+CREATE INDEX IF NOT EXISTS idx_empresas_resol_fecha_final ON empresas (resol_fecha_final) WHERE resol_activo = 1;
+CREATE INDEX IF NOT EXISTS idx_empresas_doc_fecha_final ON empresas (doc_fecha_final) WHERE doc_activo = 1;
+
+-- Fechas de programación de los triggers
+ALTER TABLE triggers
+    ALTER COLUMN ultima_ejecucion TYPE TIMESTAMPTZ USING NULLIF(ultima_ejecucion, '')::timestamptz,
+    ALTER COLUMN proxima_ejecucion TYPE TIMESTAMPTZ USING NULLIF(proxima_ejecucion, '')::timestamptz,
+    ALTER COLUMN creado_en TYPE TIMESTAMPTZ USING creado_en::timestamptz,
+    ALTER COLUMN actualizado_en TYPE TIMESTAMPTZ USING actualizado_en::timestamptz;
+
+-- Triggers activos con ejecución vencida
+CREATE INDEX IF NOT EXISTS idx_triggers_proxima_ejecucion ON triggers (proxima_ejecucion) WHERE activo = 1;
+
+-- Historial de ejecuciones (idx_trigger_ejecuciones_fecha se reconstruye con el nuevo tipo)
+ALTER TABLE trigger_ejecuciones
+    ALTER COLUMN fecha_ejecucion TYPE TIMESTAMPTZ USING fecha_ejecucion::timestamptz;
+
+-- Historial de un trigger ordenado por fecha (reemplaza al índice solo por trigger_id)
+CREATE INDEX IF NOT EXISTS idx_trigger_ejecuciones_trigger_fecha
+ON trigger_ejecuciones (trigger_id, fecha_ejecucion DESC);
+DROP INDEX IF EXISTS idx_trigger_ejecuciones_trigger_id;
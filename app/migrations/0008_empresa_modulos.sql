@@ -0,0 +1,48 @@
+-- Módulos de cada empresa en una tabla hija (una fila por empresa y tipo de módulo)
+-- en lugar de siete columnas con prefijo cert_/resol_/doc_ por módulo en empresas.
+-- Agregar un tipo de módulo ya no requiere cambiar el esquema.
+CREATE TABLE IF NOT EXISTS empresa_modulos (
+    empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+    tipo TEXT NOT NULL,
+    activo INTEGER NOT NULL DEFAULT 0,
+    fecha_inicio TIMESTAMP,
+    fecha_final TIMESTAMP,
+    notificacion DATE,
+    renovado INTEGER NOT NULL DEFAULT 0,
+    facturado INTEGER NOT NULL DEFAULT 0,
+    comentarios TEXT,
+    PRIMARY KEY (empresa_id, tipo)
+);
+
+-- Copiar los módulos existentes (cada empresa conserva sus tres filas)
+INSERT INTO empresa_modulos (empresa_id, tipo, activo, fecha_inicio, fecha_final,
+                             notificacion, renovado, facturado, comentarios)
+SELECT e.id, m.tipo, COALESCE(m.activo, 0), m.fecha_inicio, m.fecha_final,
+       m.notificacion, COALESCE(m.renovado, 0), COALESCE(m.facturado, 0), m.comentarios
+FROM empresas e
+CROSS JOIN LATERAL (VALUES
+    ('certificado', e.cert_activo, e.cert_fecha_inicio, e.cert_fecha_final, e.cert_notificacion,
+     e.cert_renovado, e.cert_facturado, e.cert_comentarios),
+    ('resolucion', e.resol_activo, e.resol_fecha_inicio, e.resol_fecha_final, e.resol_notificacion,
+     e.resol_renovado, e.resol_facturado, e.resol_comentarios),
+    ('documento', e.doc_activo, e.doc_fecha_inicio, e.doc_fecha_final, e.doc_notificacion,
+     e.doc_renovado, e.doc_facturado, e.doc_comentarios)
+) AS m(tipo, activo, fecha_inicio, fecha_final, notificacion, renovado, facturado, comentarios)
+ON CONFLICT (empresa_id, tipo) DO NOTHING;
+
+-- Vencimientos por tipo de módulo (filtros vencimiento_desde/hasta, alertas, estadísticas):
+-- un solo índice sirve a todos los tipos en lugar de un índice parcial por módulo
+CREATE INDEX IF NOT EXISTS idx_empresa_modulos_tipo_activo_fecha_final
+ON empresa_modulos (tipo, activo, fecha_final);
+
+-- Las columnas con prefijo quedan reemplazadas (sus índices parciales se eliminan con ellas)
+ALTER TABLE empresas
+    DROP COLUMN cert_activo, DROP COLUMN cert_fecha_inicio, DROP COLUMN cert_fecha_final,
+    DROP COLUMN cert_notificacion, DROP COLUMN cert_renovado, DROP COLUMN cert_facturado,
+    DROP COLUMN cert_comentarios,
+    DROP COLUMN resol_activo, DROP COLUMN resol_fecha_inicio, DROP COLUMN resol_fecha_final,
+    DROP COLUMN resol_notificacion, DROP COLUMN resol_renovado, DROP COLUMN resol_facturado,
+    DROP COLUMN resol_comentarios,
+    DROP COLUMN doc_activo, DROP COLUMN doc_fecha_inicio, DROP COLUMN doc_fecha_final,
+    DROP COLUMN doc_notificacion, DROP COLUMN doc_renovado, DROP COLUMN doc_facturado,
+    DROP COLUMN doc_comentarios;
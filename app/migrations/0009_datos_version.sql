@@ -0,0 +1,52 @@
+-- Versión de cada conjunto de datos para las respuestas condicionales (ETag) de la API.
+-- Triggers de sentencia incrementan el contador dentro de la misma transacción que
+-- la escritura, así que cubren también la importación, los scripts y la consola SQL.
+CREATE TABLE IF NOT EXISTS datos_version (
+    clave TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    actualizado_en TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO datos_version (clave) VALUES ('empresas'), ('triggers')
+ON CONFLICT (clave) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION incrementar_datos_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE datos_version
+    SET version = version + 1, actualizado_en = CURRENT_TIMESTAMP
+    WHERE clave = TG_ARGV[0];
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Empresas: la tabla, sus módulos y el snapshot que lee el dashboard
+DROP TRIGGER IF EXISTS trg_version_empresas ON empresas;
+CREATE TRIGGER trg_version_empresas
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON empresas
+FOR EACH STATEMENT EXECUTE PROCEDURE incrementar_datos_version('empresas');
+
+DROP TRIGGER IF EXISTS trg_version_empresa_modulos ON empresa_modulos;
+CREATE TRIGGER trg_version_empresa_modulos
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON empresa_modulos
+FOR EACH STATEMENT EXECUTE PROCEDURE incrementar_datos_version('empresas');
+
+DROP TRIGGER IF EXISTS trg_version_dashboard_snapshot ON dashboard_snapshot;
+CREATE TRIGGER trg_version_dashboard_snapshot
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON dashboard_snapshot
+FOR EACH STATEMENT EXECUTE PROCEDURE incrementar_datos_version('empresas');
+
+DROP TRIGGER IF EXISTS trg_version_dashboard_contadores ON dashboard_contadores;
+CREATE TRIGGER trg_version_dashboard_contadores
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON dashboard_contadores
+FOR EACH STATEMENT EXECUTE PROCEDURE incrementar_datos_version('empresas');
+
+-- Triggers programados y su historial de ejecuciones
+DROP TRIGGER IF EXISTS trg_version_triggers ON triggers;
+CREATE TRIGGER trg_version_triggers
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON triggers
+FOR EACH STATEMENT EXECUTE PROCEDURE incrementar_datos_version('triggers');
+
+DROP TRIGGER IF EXISTS trg_version_trigger_ejecuciones ON trigger_ejecuciones;
+CREATE TRIGGER trg_version_trigger_ejecuciones
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON trigger_ejecuciones
+FOR EACH STATEMENT EXECUTE PROCEDURE incrementar_datos_version('triggers');
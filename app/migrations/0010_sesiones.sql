@@ -0,0 +1,13 @@
+-- Sesiones de usuario compartidas por todos los workers (TOKEN_STORE=postgresql).
+-- Se guarda el hash SHA-256 del token, nunca el token.
+CREATE TABLE IF NOT EXISTS sesiones (
+    token_hash TEXT PRIMARY KEY,
+    usuario_id INTEGER NOT NULL REFERENCES usuarios(id) ON DELETE CASCADE,
+    username TEXT NOT NULL,
+    rol TEXT NOT NULL,
+    expiracion TIMESTAMPTZ NOT NULL,
+    fecha_creacion TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Limpieza periódica de sesiones vencidas
+CREATE INDEX IF NOT EXISTS idx_sesiones_expiracion ON sesiones (expiracion);
@@ -0,0 +1,9 @@
+-- Proceso (host:pid) que procesa cada importación. Junto con fecha_actualizacion,
+-- que el proceso renueva periódicamente, permite distinguir las importaciones
+-- de otro worker en curso de las que quedaron huérfanas al caer su proceso.
+ALTER TABLE importacion_jobs ADD COLUMN IF NOT EXISTS propietario TEXT;
+
+-- Búsqueda de importaciones sin terminar con el latido vencido
+CREATE INDEX IF NOT EXISTS idx_importacion_jobs_activos
+    ON importacion_jobs (fecha_actualizacion)
+    WHERE estado IN ('pendiente', 'procesando');
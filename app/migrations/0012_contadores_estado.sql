@@ -0,0 +1,5 @@
+-- El snapshot del dashboard incluye ahora los contadores 'estado.<estado>'.
+-- Se descarta el snapshot existente para que se regenere completo en la próxima lectura
+-- (mientras no existe, las escrituras no aplican deltas sobre contadores incompletos).
+DELETE FROM dashboard_contadores;
+DELETE FROM dashboard_snapshot;
@@ -0,0 +1,7 @@
+-- El snapshot del dashboard se deriva de empresas y empresa_modulos, cuyas escrituras ya
+-- incrementan la versión 'empresas'. El refresco periódico lo reescribe completo aunque
+-- nada haya cambiado, y con estos triggers cambiaba todos los ETag e invalidaba la caché
+-- de lecturas de cada worker. Los vencimientos que cambian con el día ya están cubiertos
+-- por la fecha que forma parte del ETag.
+DROP TRIGGER IF EXISTS trg_version_dashboard_snapshot ON dashboard_snapshot;
+DROP TRIGGER IF EXISTS trg_version_dashboard_contadores ON dashboard_contadores;
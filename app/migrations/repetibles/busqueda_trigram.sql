@@ -0,0 +1,20 @@
+-- Búsqueda por similitud: extensiones pg_trgm y unaccent, una función inmutable
+-- para normalizar nombres y los índices GIN trigram sobre nombre y NIT.
+-- Es opcional: si el usuario no puede crear las extensiones el paso se revierte,
+-- el repositorio usa la búsqueda simple (ver EmpresaRepository.busqueda_trgm) y se
+-- vuelve a intentar en cada ejecución de las migraciones (al iniciar la aplicación
+-- o con python -m app.repositories.migrations), p. ej. después de que un DBA
+-- instale las extensiones.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() no es IMMUTABLE; el envoltorio permite usarla en índices
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS
+$$ SELECT public.unaccent('public.unaccent', $1) $$
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+CREATE INDEX IF NOT EXISTS idx_empresas_nombre_trgm
+ON empresas USING gin (f_unaccent(lower(nombre)) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_empresas_nit_trgm
+ON empresas USING gin (nit gin_trgm_ops);
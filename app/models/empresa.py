@@ -1,12 +1,17 @@
 """
 Modelo de datos para Empresa
+Las clases usan __slots__: los listados crean miles de instancias por petición.
 """
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Dict, Optional
 
 
-@dataclass
+# Tipos de módulo en orden de presentación; cada uno es un atributo de Empresa
+TIPOS_MODULO = ('certificado', 'resolucion', 'documento')
+
+
+@dataclass(slots=True)
 class ModuloEmpresa:
     """
     Representa un módulo (certificado, resolución o documento) asociado a una empresa
@@ -14,7 +19,7 @@ class ModuloEmpresa:
     activo: int = 0  # 0 o 1
     fecha_inicio: Optional[datetime] = None
     fecha_final: Optional[datetime] = None
-    notificacion: Optional[str] = None
+    notificacion: Optional[date] = None  # fecha_final - 30 días (la calcula el repositorio)
     renovado: int = 0  # 0 o 1
     facturado: int = 0  # 0 o 1
     comentarios: Optional[str] = None
@@ -25,14 +30,14 @@ class ModuloEmpresa:
             'activo': self.activo,
             'fecha_inicio': self.fecha_inicio.isoformat() if self.fecha_inicio else None,
             'fecha_final': self.fecha_final.isoformat() if self.fecha_final else None,
-            'notificacion': self.notificacion,
+            'notificacion': self.notificacion.isoformat() if self.notificacion else None,
             'renovado': self.renovado,
             'facturado': self.facturado,
             'comentarios': self.comentarios
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Empresa:
     """
     Modelo de datos para Empresa
@@ -53,13 +58,15 @@ class Empresa:
     fecha_creacion: Optional[datetime] = None
     fecha_actualizacion: Optional[datetime] = None
 
+    def modulos(self) -> Dict[str, ModuloEmpresa]:
+        """Devuelve los módulos presentes de la empresa por tipo, en el orden de TIPOS_MODULO"""
+        return {
+            tipo: getattr(self, tipo) for tipo in TIPOS_MODULO if getattr(self, tipo)
+        }
+
     def tiene_modulos_activos(self) -> bool:
         """Verifica si la empresa tiene al menos un módulo activo"""
-        return (
-            (self.certificado and self.certificado.activo == 1) or 
-            (self.resolucion and self.resolucion.activo == 1) or 
-            (self.documento and self.documento.activo == 1)
-        )
+        return any(modulo.activo == 1 for modulo in self.modulos().values())
 
     def to_dict(self) -> dict:
         """Convierte la empresa a diccionario"""
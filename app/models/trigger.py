@@ -1,18 +1,31 @@
 """
 Modelos para gestión de triggers de notificaciones
+Las clases usan __slots__ (sin __dict__ por instancia) para ocupar menos memoria.
 """
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime
 
 
-@dataclass
+def _parse_fecha(valor: Union[datetime, str, None]) -> Optional[datetime]:
+    """Acepta una fecha ya convertida (TIMESTAMPTZ) o un texto ISO"""
+    if isinstance(valor, str):
+        return datetime.fromisoformat(valor) if valor else None
+    return valor
+
+
+def _iso(valor: Optional[datetime]) -> Optional[str]:
+    """Fecha en formato ISO (con zona horaria) o None"""
+    return valor.isoformat() if valor else None
+
+
+@dataclass(slots=True)
 class TriggerEjecucion:
     """Representa una ejecución de un trigger"""
     id: Optional[int] = None
     trigger_id: int = 0
     trigger_nombre: str = ""
-    fecha_ejecucion: Optional[str] = None
+    fecha_ejecucion: Optional[datetime] = None
     estado: str = "exitoso"  # exitoso, fallido
     notificaciones_enviadas: int = 0
     empresas_procesadas: int = 0
@@ -25,7 +38,7 @@ class TriggerEjecucion:
             'id': self.id,
             'trigger_id': self.trigger_id,
             'trigger_nombre': self.trigger_nombre,
-            'fecha_ejecucion': self.fecha_ejecucion,
+            'fecha_ejecucion': _iso(self.fecha_ejecucion),
             'estado': self.estado,
             'notificaciones_enviadas': self.notificaciones_enviadas,
             'empresas_procesadas': self.empresas_procesadas,
@@ -40,7 +53,7 @@ class TriggerEjecucion:
             id=data.get('id'),
             trigger_id=data.get('trigger_id', 0),
             trigger_nombre=data.get('trigger_nombre', ''),
-            fecha_ejecucion=data.get('fecha_ejecucion'),
+            fecha_ejecucion=_parse_fecha(data.get('fecha_ejecucion')),
             estado=data.get('estado', 'exitoso'),
             notificaciones_enviadas=data.get('notificaciones_enviadas', 0),
             empresas_procesadas=data.get('empresas_procesadas', 0),
@@ -49,7 +62,7 @@ class TriggerEjecucion:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Trigger:
     """Representa un trigger de notificación programada"""
     id: Optional[int] = None
@@ -63,10 +76,10 @@ class Trigger:
     destinatarios: str = ""  # Emails separados por comas
     prioridades: str = "CRITICA,ALTA,MEDIA"  # Prioridades a incluir
     activo: int = 1
-    ultima_ejecucion: Optional[str] = None
-    proxima_ejecucion: Optional[str] = None
-    creado_en: Optional[str] = None
-    actualizado_en: Optional[str] = None
+    ultima_ejecucion: Optional[datetime] = None
+    proxima_ejecucion: Optional[datetime] = None
+    creado_en: Optional[datetime] = None
+    actualizado_en: Optional[datetime] = None
     
     def to_dict(self) -> dict:
         """Convierte el trigger a diccionario"""
@@ -82,10 +95,10 @@ class Trigger:
             'destinatarios': self.destinatarios,
             'prioridades': self.prioridades,
             'activo': self.activo,
-            'ultima_ejecucion': self.ultima_ejecucion,
-            'proxima_ejecucion': self.proxima_ejecucion,
-            'creado_en': self.creado_en,
-            'actualizado_en': self.actualizado_en
+            'ultima_ejecucion': _iso(self.ultima_ejecucion),
+            'proxima_ejecucion': _iso(self.proxima_ejecucion),
+            'creado_en': _iso(self.creado_en),
+            'actualizado_en': _iso(self.actualizado_en)
         }
     
     @staticmethod
@@ -103,8 +116,8 @@ class Trigger:
             destinatarios=data.get('destinatarios', ''),
             prioridades=data.get('prioridades', 'CRITICA,ALTA,MEDIA'),
             activo=data.get('activo', 1),
-            ultima_ejecucion=data.get('ultima_ejecucion'),
-            proxima_ejecucion=data.get('proxima_ejecucion'),
-            creado_en=data.get('creado_en'),
-            actualizado_en=data.get('actualizado_en')
+            ultima_ejecucion=_parse_fecha(data.get('ultima_ejecucion')),
+            proxima_ejecucion=_parse_fecha(data.get('proxima_ejecucion')),
+            creado_en=_parse_fecha(data.get('creado_en')),
+            actualizado_en=_parse_fecha(data.get('actualizado_en'))
         )
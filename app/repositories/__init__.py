@@ -3,5 +3,6 @@ Repositorios - Capa de abstracción de base de datos
 """
 from .base_repository import IRepository
 from .empresa_repository import EmpresaRepository
+from .cached_repository import CachedEmpresaRepository, TTLCache
 
-__all__ = ['IRepository', 'EmpresaRepository']
+__all__ = ['IRepository', 'EmpresaRepository', 'CachedEmpresaRepository', 'TTLCache']
@@ -0,0 +1,46 @@
+"""
+Ejecutor de las operaciones de base de datos
+Ejecuta las operaciones de psycopg2 en hilos dedicados para no bloquear el event loop
+(lo usa AsyncService, la contraparte asíncrona de los servicios)
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class DatabaseExecutor:
+    """
+    Ejecutor de hilos reservado para operaciones de base de datos.
+    Su tamaño debe coincidir con el máximo del pool de conexiones: más hilos
+    solo quedarían esperando una conexión libre.
+    """
+
+    def __init__(self, max_workers: int):
+        """
+        Inicializa el ejecutor
+
+        Args:
+            max_workers: Número máximo de operaciones simultáneas
+        """
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db')
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Ejecuta una función bloqueante en el ejecutor y espera su resultado
+
+        Args:
+            func: Función a ejecutar
+            *args, **kwargs: Argumentos de la función
+
+        Returns:
+            Resultado de la función
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        """Detiene el ejecutor esperando las operaciones en curso"""
+        self._executor.shutdown(wait=True)
+
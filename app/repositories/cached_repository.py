@@ -0,0 +1,277 @@
+"""
+Caché en memoria para las lecturas frecuentes del repositorio de empresas.
+Se ubica entre los servicios y EmpresaRepository y se invalida con cada escritura
+del proceso y, antes de cada lectura, si la versión de los datos (tabla
+datos_version) cambió por escrituras de otros workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+from app.models.empresa import Empresa
+from app.repositories.empresa_repository import EmpresaRepository
+from app.repositories.version_repository import VersionRepository
+
+
+def _congelar(valor: Any) -> Any:
+    """Convierte argumentos (dicts, listas) en una forma hashable y estable para la clave"""
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _congelar(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple, set)):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+
+class TTLCache:
+    """
+    Caché LRU con expiración por tiempo (TTL) y contadores de aciertos/fallos.
+    Es segura entre hilos: los repositorios se usan desde el ejecutor de base de datos.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 256):
+        """
+        Inicializa la caché
+
+        Args:
+            ttl: Segundos que una entrada se considera vigente
+            max_size: Número máximo de entradas antes de desalojar la menos usada
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entradas: 'OrderedDict[Tuple, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self._versiones: Dict[str, int] = {}
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    def get(self, clave: Tuple) -> Any:
+        """
+        Devuelve el valor vigente de una clave sin cargarlo
+
+        Args:
+            clave: Clave hashable de la consulta
+
+        Returns:
+            Valor cacheado, None si no está o ya venció
+        """
+        return self._consultar(clave)[1]
+
+    def get_or_load(self, clave: Tuple, cargar: Callable[[], Any]) -> Any:
+        """
+        Devuelve el valor en caché o lo carga y lo almacena
+
+        Args:
+            clave: Clave hashable de la consulta
+            cargar: Función que obtiene el valor desde el repositorio
+
+        Returns:
+            Valor cacheado o recién cargado
+        """
+        encontrado, valor, generacion = self._consultar(clave)
+        if encontrado:
+            return valor
+
+        valor = cargar()
+        self._almacenar(clave, valor, generacion)
+        return valor
+
+    async def get_or_load_async(self, clave: Tuple, cargar: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Igual que get_or_load para cargas asíncronas (p. ej. respuestas ya codificadas
+        que arman las rutas a partir de los servicios)
+
+        Args:
+            clave: Clave hashable de la consulta
+            cargar: Corrutina que obtiene el valor
+
+        Returns:
+            Valor cacheado o recién cargado
+        """
+        encontrado, valor, generacion = self._consultar(clave)
+        if encontrado:
+            return valor
+
+        valor = await cargar()
+        self._almacenar(clave, valor, generacion)
+        return valor
+
+    def _consultar(self, clave: Tuple) -> Tuple[bool, Any, int]:
+        """
+        Busca una entrada vigente y registra el acierto o el fallo
+
+        Returns:
+            Tupla (encontrado, valor, generación vigente al consultar)
+        """
+        ahora = time.monotonic()
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] > ahora:
+                self._entradas.move_to_end(clave)
+                self._stats['hits'] += 1
+                return True, entrada[1], self._generacion
+
+            if entrada is not None:
+                del self._entradas[clave]
+            self._stats['misses'] += 1
+            return False, None, self._generacion
+
+    def _almacenar(self, clave: Tuple, valor: Any, generacion: int):
+        """Guarda un valor recién cargado si no hubo escrituras desde la consulta"""
+        with self._lock:
+            # Si hubo una escritura mientras se cargaba, el valor puede estar desactualizado
+            if generacion == self._generacion:
+                self._entradas[clave] = (time.monotonic() + self.ttl, valor)
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.max_size:
+                    self._entradas.popitem(last=False)
+                    self._stats['evictions'] += 1
+
+    def invalidate(self):
+        """Descarta todas las entradas (se llama tras cualquier escritura)"""
+        with self._lock:
+            self._entradas.clear()
+            self._generacion += 1
+            self._stats['invalidations'] += 1
+
+    def sincronizar(self, versiones: Dict[str, int]) -> bool:
+        """
+        Compara las versiones de los datos con las últimas vistas por este proceso
+        y descarta todas las entradas si alguna cambió (escrituras de otros workers).
+        La primera vez que se ve una versión también se invalida, porque no se sabe
+        con qué versión se cargaron las entradas existentes.
+
+        Args:
+            versiones: Versión actual de cada conjunto de datos ('empresas', 'triggers')
+
+        Returns:
+            True si se invalidó la caché
+        """
+        with self._lock:
+            if all(self._versiones.get(clave) == version for clave, version in versiones.items()):
+                return False
+            self._versiones.update(versiones)
+            self._entradas.clear()
+            self._generacion += 1
+            self._stats['invalidations'] += 1
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las estadísticas de la caché
+
+        Returns:
+            Diccionario con aciertos, fallos, hit_ratio, tamaño y configuración
+        """
+        with self._lock:
+            consultas = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_ratio': round(self._stats['hits'] / consultas, 4) if consultas else 0.0,
+                'size': len(self._entradas),
+                'max_size': self.max_size,
+                'ttl': self.ttl
+            }
+
+
+class CachedEmpresaRepository:
+    """
+    Decorador de EmpresaRepository que cachea las lecturas de solo consulta
+    (listados, búsqueda, alertas y snapshot del dashboard).
+
+    get_by_id, get_by_nit, exists y exists_by_nit no se cachean: son búsquedas por
+    índice, los servicios modifican la entidad devuelta antes de actualizarla y las
+    verificaciones de existencia protegen escrituras.
+
+    Antes de cada lectura se consulta la versión de 'empresas' (una fila por clave
+    primaria): las escrituras de otros workers no pasan por este decorador.
+    """
+
+    def __init__(self, repository: EmpresaRepository, cache: TTLCache,
+                 version_repository: Optional[VersionRepository] = None):
+        """
+        Inicializa el decorador
+
+        Args:
+            repository: Repositorio de empresas real
+            cache: Caché compartida por todos los repositorios del factory
+            version_repository: Repositorio de versiones de los datos (sin él solo
+                se invalida con las escrituras de este proceso)
+        """
+        self.repository = repository
+        self.cache = cache
+        self.version_repository = version_repository
+
+    def _leer(self, nombre: str, *args, **kwargs) -> Any:
+        """Ejecuta una lectura del repositorio a través de la caché"""
+        if self.version_repository is not None:
+            versiones = self.version_repository.get_versiones(('empresas',))
+            self.cache.sincronizar({clave: version for clave, (version, _) in versiones.items()})
+        clave = (nombre, _congelar(args), _congelar(kwargs))
+        metodo = getattr(self.repository, nombre)
+        return self.cache.get_or_load(clave, lambda: metodo(*args, **kwargs))
+
+    def _escribir(self, nombre: str, *args, **kwargs) -> Any:
+        """Ejecuta una escritura del repositorio e invalida la caché"""
+        resultado = getattr(self.repository, nombre)(*args, **kwargs)
+        self.cache.invalidate()
+        return resultado
+
+    # Lecturas cacheadas
+
+    def get_all(self, filters: Optional[Dict[str, Any]] = None, **kwargs) -> List[Empresa]:
+        """Obtiene empresas con filtros y paginación opcionales (cacheado)"""
+        return self._leer('get_all', filters, **kwargs)
+
+    def get_all_dicts(self, filters: Optional[Dict[str, Any]] = None, **kwargs) -> List[Dict[str, Any]]:
+        """Obtiene empresas ya serializadas con filtros y paginación opcionales (cacheado)"""
+        return self._leer('get_all_dicts', filters, **kwargs)
+
+    def buscar(self, texto: str, limit: int = 20, offset: int = 0,
+               estado: Optional[str] = None) -> List[Tuple[Empresa, float]]:
+        """Busca empresas por nombre o NIT ordenadas por relevancia (cacheado)"""
+        return self._leer('buscar', texto, limit, offset, estado)
+
+    def get_alertas_notificacion(self, fecha_referencia: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Obtiene los módulos que requieren notificación (cacheado)"""
+        return self._leer('get_alertas_notificacion', fecha_referencia)
+
+    def get_snapshot_dashboard(self) -> Optional[Dict[str, Any]]:
+        """Lee el snapshot de contadores del dashboard (cacheado)"""
+        return self._leer('get_snapshot_dashboard')
+
+    # Escrituras (invalidan la caché)
+
+    def create(self, empresa: Empresa) -> Empresa:
+        """Crea una nueva empresa e invalida la caché"""
+        return self._escribir('create', empresa)
+
+    def update(self, empresa: Empresa) -> bool:
+        """Actualiza una empresa existente e invalida la caché"""
+        return self._escribir('update', empresa)
+
+    def update_field(self, nit: str, modulo: str, campo: str, valor: Any) -> bool:
+        """Actualiza un campo de un módulo e invalida la caché"""
+        return self._escribir('update_field', nit, modulo, campo, valor)
+
+    def upsert_many(self, empresas: List[Empresa]) -> List[Dict[str, Any]]:
+        """Crea o actualiza un lote de empresas e invalida la caché"""
+        return self._escribir('upsert_many', empresas)
+
+    def delete(self, entity_id: int) -> bool:
+        """Elimina una empresa e invalida la caché"""
+        return self._escribir('delete', entity_id)
+
+    def refrescar_snapshot_dashboard(self, fecha_referencia: Optional[datetime] = None) -> datetime:
+        """Recalcula el snapshot del dashboard e invalida la caché"""
+        return self._escribir('refrescar_snapshot_dashboard', fecha_referencia)
+
+    def __getattr__(self, nombre: str):
+        """El resto de métodos se delegan sin caché al repositorio real"""
+        return getattr(self.repository, nombre)
@@ -0,0 +1,289 @@
+"""
+Pool de conexiones PostgreSQL compartido por todos los repositorios
+Evita abrir una conexión (TCP + autenticación) por cada operación
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+import psycopg2
+import psycopg2.extensions
+
+
+class PoolAgotadoError(Exception):
+    """Se lanza cuando no hay conexiones disponibles dentro del tiempo de espera"""
+    pass
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones thread-safe para psycopg2.
+
+    - Mantiene entre ``minconn`` y ``maxconn`` conexiones abiertas
+    - Verifica la salud de la conexión al entregarla (``SELECT 1`` si estuvo
+      inactiva más de ``healthcheck_idle`` segundos)
+    - Recicla conexiones rotas o que superan ``max_lifetime`` segundos
+    - Lleva estadísticas de uso para exponerlas en ``/health``
+    """
+
+    def __init__(
+        self,
+        connection_params: Dict[str, Any],
+        minconn: int = 1,
+        maxconn: int = 10,
+        timeout: float = 30.0,
+        healthcheck_idle: float = 30.0,
+        max_lifetime: float = 3600.0
+    ):
+        """
+        Inicializa el pool
+
+        Args:
+            connection_params: Parámetros para psycopg2.connect
+            minconn: Conexiones que se mantienen abiertas como mínimo
+            maxconn: Conexiones simultáneas como máximo
+            timeout: Segundos máximos esperando una conexión libre
+            healthcheck_idle: Segundos de inactividad tras los cuales se verifica la conexión
+            max_lifetime: Segundos de vida máxima de una conexión antes de reciclarla
+        """
+        if maxconn < 1 or minconn < 0 or minconn > maxconn:
+            raise ValueError("Configuración de pool inválida: se requiere 0 <= minconn <= maxconn y maxconn >= 1")
+
+        self.connection_params = connection_params
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.healthcheck_idle = healthcheck_idle
+        self.max_lifetime = max_lifetime
+
+        self._lock = threading.Condition()
+        # Conexiones libres: lista de (conexión, creada_en, liberada_en)
+        self._idle: List[tuple] = []
+        # Conexiones entregadas: id(conexión) -> creada_en
+        self._in_use: Dict[int, float] = {}
+        # Cupos ocupados (conexiones entregadas + aperturas en curso)
+        self._checked_out = 0
+        self._closed = False
+
+        self._stats = {
+            'created': 0,
+            'recycled': 0,
+            'checkouts': 0,
+            'waiting': 0,
+            'timeouts': 0
+        }
+
+        for _ in range(minconn):
+            conn = self._connect()
+            self._idle.append((conn, time.monotonic(), time.monotonic()))
+
+    def _connect(self):
+        """Abre una nueva conexión física"""
+        conn = psycopg2.connect(**self.connection_params)
+        with self._lock:
+            self._stats['created'] += 1
+        return conn
+
+    def _discard(self, conn) -> None:
+        """Cierra una conexión que no debe volver al pool"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats['recycled'] += 1
+
+    def _is_healthy(self, conn, creada_en: float, liberada_en: float) -> bool:
+        """Verifica si una conexión libre puede entregarse"""
+        if conn.closed:
+            return False
+
+        ahora = time.monotonic()
+        if self.max_lifetime and ahora - creada_en > self.max_lifetime:
+            return False
+
+        if ahora - liberada_en > self.healthcheck_idle:
+            try:
+                cursor = conn.cursor()
+                cursor.execute('SELECT 1')
+                cursor.close()
+                conn.rollback()
+            except Exception:
+                return False
+
+        return True
+
+    def getconn(self):
+        """
+        Obtiene una conexión del pool (bloquea hasta ``timeout`` si está agotado)
+
+        Returns:
+            Conexión psycopg2 lista para usar
+
+        Raises:
+            PoolAgotadoError: Si no se liberó ninguna conexión a tiempo
+        """
+        limite = time.monotonic() + self.timeout
+
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise PoolAgotadoError("El pool de conexiones está cerrado")
+
+                while not self._idle and self._checked_out >= self.maxconn:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolAgotadoError(
+                            f"No hay conexiones disponibles (máximo {self.maxconn}) tras {self.timeout}s"
+                        )
+                    self._stats['waiting'] += 1
+                    try:
+                        self._lock.wait(restante)
+                    finally:
+                        self._stats['waiting'] -= 1
+
+                # Reservar el cupo antes de soltar el lock
+                self._checked_out += 1
+                candidata = self._idle.pop() if self._idle else None
+
+            try:
+                if candidata is None:
+                    conn = self._connect()
+                    creada_en = time.monotonic()
+                else:
+                    conn, creada_en, liberada_en = candidata
+                    if not self._is_healthy(conn, creada_en, liberada_en):
+                        self._discard(conn)
+                        self._release_slot()
+                        continue
+            except Exception:
+                self._release_slot()
+                raise
+
+            with self._lock:
+                self._in_use[id(conn)] = creada_en
+                self._stats['checkouts'] += 1
+            return conn
+
+    def _release_slot(self) -> None:
+        """Libera un cupo reservado y despierta a quien esté esperando"""
+        with self._lock:
+            self._checked_out -= 1
+            self._lock.notify()
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """
+        Devuelve una conexión al pool
+
+        Args:
+            conn: Conexión obtenida con getconn
+            discard: Si es True la conexión se cierra en lugar de reutilizarse
+        """
+        with self._lock:
+            creada_en = self._in_use.pop(id(conn), None)
+
+        if creada_en is None:
+            # No pertenece a este pool
+            conn.close()
+            return
+
+        if not discard and not conn.closed:
+            try:
+                estado = conn.get_transaction_status()
+                if estado == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif estado != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    # Transacción abierta sin commit: descartar los cambios
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        if discard or conn.closed or self._closed:
+            self._discard(conn)
+            self._release_slot()
+            return
+
+        with self._lock:
+            self._checked_out -= 1
+            self._idle.append((conn, creada_en, time.monotonic()))
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager que entrega una conexión y la devuelve al terminar.
+        Si ocurre un error se hace rollback antes de devolverla.
+        """
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def closeall(self) -> None:
+        """Cierra todas las conexiones libres y marca el pool como cerrado"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._lock.notify_all()
+
+        for conn, _, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene las estadísticas del pool
+
+        Returns:
+            Diccionario con conexiones en uso, en espera, creadas y recicladas
+        """
+        with self._lock:
+            return {
+                'min': self.minconn,
+                'max': self.maxconn,
+                'checked_out': self._checked_out,
+                'idle': len(self._idle),
+                'waiting': self._stats['waiting'],
+                'created': self._stats['created'],
+                'recycled': self._stats['recycled'],
+                'checkouts': self._stats['checkouts'],
+                'timeouts': self._stats['timeouts']
+            }
+
+    @classmethod
+    def from_settings(cls, settings) -> 'ConnectionPool':
+        """
+        Crea el pool a partir de la configuración del sistema
+
+        Args:
+            settings: Configuración del sistema
+
+        Returns:
+            ConnectionPool configurado
+        """
+        return cls(
+            connection_params={
+                'host': settings.DB_HOST,
+                'port': settings.DB_PORT,
+                'database': settings.DB_NAME,
+                'user': settings.DB_USER,
+                'password': settings.DB_PASSWORD
+            },
+            minconn=settings.DB_POOL_MIN,
+            maxconn=settings.DB_POOL_MAX,
+            timeout=settings.DB_POOL_TIMEOUT,
+            healthcheck_idle=settings.DB_POOL_HEALTHCHECK_IDLE,
+            max_lifetime=settings.DB_POOL_MAX_LIFETIME
+        )
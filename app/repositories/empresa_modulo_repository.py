@@ -0,0 +1,154 @@
+"""
+Repositorio PostgreSQL para los módulos de las empresas (tabla empresa_modulos)
+Cada empresa tiene una fila por tipo de módulo. Las operaciones reciben el cursor
+de la transacción de EmpresaRepository para que la empresa y sus módulos se
+lean y escriban juntos.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import psycopg2.extras
+from app.models.empresa import Empresa, ModuloEmpresa, TIPOS_MODULO
+
+
+# Columnas de un módulo en el orden de los campos de ModuloEmpresa
+COLUMNAS_MODULO = ('activo', 'fecha_inicio', 'fecha_final', 'notificacion',
+                   'renovado', 'facturado', 'comentarios')
+
+# Módulo sin registrar tal como lo serializa ModuloEmpresa.to_dict()
+MODULO_VACIO = ModuloEmpresa().to_dict()
+
+# Campos de un módulo que se pueden cambiar individualmente
+CAMPOS_EDITABLES = ('activo', 'renovado', 'facturado')
+
+# Alta o actualización de los módulos de varias empresas (VALUES lo completa execute_values)
+GUARDAR_SQL = '''
+    INSERT INTO empresa_modulos (empresa_id, tipo, {columnas})
+    VALUES %s
+    ON CONFLICT (empresa_id, tipo) DO UPDATE SET {asignaciones}
+'''.format(
+    columnas=', '.join(COLUMNAS_MODULO),
+    asignaciones=', '.join(f'{columna} = EXCLUDED.{columna}' for columna in COLUMNAS_MODULO)
+)
+
+
+class FechasISO(dict):
+    """
+    Memo de fechas a texto ISO para serializar un listado: muchas filas comparten
+    las mismas fechas de vencimiento y notificación, así que cada valor distinto
+    se convierte una sola vez (None se mantiene como None)
+    """
+
+    def __missing__(self, valor):
+        texto = self[valor] = valor.isoformat() if valor else None
+        return texto
+
+
+class EmpresaModuloRepository:
+    """
+    Repositorio de los módulos de las empresas.
+    No abre conexiones propias: trabaja dentro de la transacción del llamador.
+    """
+
+    def cargar(self, cursor, empresa_ids: List[int]) -> Dict[int, Dict[str, ModuloEmpresa]]:
+        """
+        Lee en una sola consulta los módulos de varias empresas
+
+        Args:
+            cursor: Cursor de la transacción
+            empresa_ids: IDs de las empresas
+
+        Returns:
+            Diccionario empresa_id -> {tipo: módulo}
+        """
+        if not empresa_ids:
+            return {}
+
+        cursor.execute(
+            f"SELECT empresa_id, tipo, {', '.join(COLUMNAS_MODULO)} "
+            "FROM empresa_modulos WHERE empresa_id = ANY(%s)",
+            (list(empresa_ids),)
+        )
+
+        modulos: Dict[int, Dict[str, ModuloEmpresa]] = {}
+        for empresa_id, tipo, *valores in cursor.fetchall():
+            modulos.setdefault(empresa_id, {})[tipo] = ModuloEmpresa(*valores)
+        return modulos
+
+    def cargar_dicts(self, cursor, empresa_ids: List[int],
+                     iso: Optional[FechasISO] = None) -> Dict[int, Dict[str, Dict[str, Any]]]:
+        """
+        Lee los módulos de varias empresas directamente con la forma de
+        ModuloEmpresa.to_dict(), sin crear objetos intermedios
+
+        Args:
+            cursor: Cursor de la transacción
+            empresa_ids: IDs de las empresas
+            iso: Memo de fechas compartido con el resto del listado
+
+        Returns:
+            Diccionario empresa_id -> {tipo: módulo serializado}
+        """
+        if not empresa_ids:
+            return {}
+
+        cursor.execute(
+            f"SELECT empresa_id, tipo, {', '.join(COLUMNAS_MODULO)} "
+            "FROM empresa_modulos WHERE empresa_id = ANY(%s)",
+            (list(empresa_ids),)
+        )
+
+        iso = FechasISO() if iso is None else iso
+        modulos: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        for empresa_id, tipo, activo, inicio, final, notificacion, renovado, facturado, comentarios in cursor.fetchall():
+            modulos.setdefault(empresa_id, {})[tipo] = {
+                'activo': activo,
+                'fecha_inicio': iso[inicio],
+                'fecha_final': iso[final],
+                'notificacion': iso[notificacion],
+                'renovado': renovado,
+                'facturado': facturado,
+                'comentarios': comentarios
+            }
+        return modulos
+
+    def guardar(self, cursor, empresas: List[Tuple[int, Empresa]]) -> None:
+        """
+        Crea o reemplaza todos los módulos de las empresas indicadas
+
+        Args:
+            cursor: Cursor de la transacción
+            empresas: Pares (empresa_id, empresa) con los módulos a guardar
+        """
+        valores = []
+        for empresa_id, empresa in empresas:
+            for tipo in TIPOS_MODULO:
+                modulo = getattr(empresa, tipo) or ModuloEmpresa()
+                valores.append((empresa_id, tipo, *(getattr(modulo, columna) for columna in COLUMNAS_MODULO)))
+
+        if valores:
+            psycopg2.extras.execute_values(cursor, GUARDAR_SQL, valores, page_size=1000)
+
+    def actualizar_campo(self, cursor, empresa_id: int, tipo: str, campo: str, valor: Any) -> bool:
+        """
+        Cambia un campo de un módulo de una empresa
+
+        Args:
+            cursor: Cursor de la transacción
+            empresa_id: ID de la empresa
+            tipo: Tipo de módulo (ver TIPOS_MODULO)
+            campo: Campo a cambiar (ver CAMPOS_EDITABLES)
+            valor: Nuevo valor
+
+        Returns:
+            True si el módulo existía y se actualizó
+
+        Raises:
+            ValueError: Si el tipo o el campo no son válidos
+        """
+        if tipo not in TIPOS_MODULO or campo not in CAMPOS_EDITABLES:
+            raise ValueError(f"Campo de módulo no válido: {tipo}.{campo}")
+
+        cursor.execute(
+            f'UPDATE empresa_modulos SET {campo} = %s WHERE empresa_id = %s AND tipo = %s',
+            (valor, empresa_id, tipo)
+        )
+        return cursor.rowcount > 0
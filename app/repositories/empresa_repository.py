@@ -4,10 +4,188 @@ Implementación concreta usando PostgreSQL
 """
 import psycopg2
 import psycopg2.extras
-from typing import List, Optional, Dict, Any
-from datetime import datetime
-from app.models.empresa import Empresa, ModuloEmpresa
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Tuple, Iterator
+from datetime import date, datetime, timedelta
+from app.models.empresa import Empresa, ModuloEmpresa, TIPOS_MODULO
 from app.repositories.base_repository import IRepository
+from app.repositories.connection_pool import ConnectionPool
+from app.repositories.empresa_modulo_repository import EmpresaModuloRepository, FechasISO, MODULO_VACIO
+
+
+# Columnas de la tabla empresas en el orden que espera _row_to_empresa
+COLUMNAS_EMPRESA = 'e.id, e.nit, e.nombre, e.tipo, e.estado, e.fecha_creacion, e.fecha_actualizacion'
+
+# Segundos entre comprobaciones de la búsqueda trigram mientras no esté disponible
+REVISION_BUSQUEDA_TRGM = 300
+
+# Columnas permitidas para ordenar/paginar listados (todas NOT NULL, con desempate por id)
+COLUMNAS_ORDEN = ('nombre', 'nit', 'fecha_creacion', 'fecha_actualizacion')
+
+# Une cada empresa con sus módulos (una fila por tipo) y el orden de presentación del tipo
+MODULOS_SQL = '''
+    JOIN empresa_modulos m ON m.empresa_id = e.id
+    CROSS JOIN LATERAL (
+        SELECT array_position(ARRAY[{tipos}]::text[], m.tipo) AS orden
+    ) AS o
+'''.format(tipos=', '.join(f"'{tipo}'" for tipo in TIPOS_MODULO))
+
+# Módulos que generan alerta: fecha de notificación alcanzada y/o renovado sin facturar.
+# Calcula días restantes, prioridad y motivo con las mismas reglas que usaba el servicio.
+ALERTAS_SQL = '''
+    WITH modulos AS (
+        SELECT
+            e.id, e.nit, e.nombre, e.tipo AS empresa_tipo,
+            m.tipo AS modulo, o.orden, m.fecha_final, m.notificacion, m.renovado, m.facturado,
+            FLOOR(EXTRACT(EPOCH FROM (m.fecha_final - %(hoy)s)) / 86400)::int AS dias,
+            (m.fecha_final IS NOT NULL
+                AND m.notificacion <= %(hoy)s) AS por_vencimiento,
+            (m.renovado = 1 AND m.facturado = 0) AS sin_facturar
+        FROM empresas e
+        {modulos}
+        WHERE e.estado = 'activo'
+          AND m.activo = 1
+          AND NOT (m.renovado = 1 AND m.facturado = 1)
+          {filtro}
+    )
+    SELECT
+        id, nit, nombre, empresa_tipo, modulo, orden, fecha_final, notificacion, renovado, facturado,
+        CASE WHEN por_vencimiento THEN GREATEST(dias, 0) ELSE dias END AS dias_restantes,
+        CASE
+            WHEN por_vencimiento AND sin_facturar THEN 'CRITICA'
+            WHEN por_vencimiento AND dias <= 5 THEN 'CRITICA'
+            WHEN por_vencimiento AND dias <= 30 THEN 'ALTA'
+            WHEN por_vencimiento THEN 'MEDIA'
+            ELSE 'ALTA'
+        END AS prioridad,
+        CASE
+            WHEN por_vencimiento AND sin_facturar THEN 'Próximo a vencer y renovado sin facturar'
+            WHEN por_vencimiento THEN 'Próximo a vencer'
+            ELSE 'Renovado pero no facturado'
+        END AS motivo
+    FROM modulos
+    WHERE por_vencimiento OR sin_facturar
+'''
+
+
+# Contadores por módulo de empresas activas en una sola pasada (una fila por tipo de módulo).
+# COUNT(*) de cada grupo es el total de empresas porque cada empresa aporta una fila por módulo.
+ESTADISTICAS_SQL = '''
+    SELECT
+        m.tipo,
+        COUNT(*) AS total_empresas,
+        COUNT(*) FILTER (WHERE m.activo = 1) AS activos,
+        COUNT(*) FILTER (WHERE m.activo = 1 AND m.renovado = 1) AS renovados,
+        COUNT(*) FILTER (WHERE m.activo = 1 AND m.facturado = 1) AS facturados,
+        COUNT(*) FILTER (WHERE m.activo = 1 AND m.renovado IS DISTINCT FROM 1) AS pendientes_renovacion,
+        COUNT(*) FILTER (WHERE m.activo = 1 AND m.facturado IS DISTINCT FROM 1) AS pendientes_facturacion,
+        COUNT(*) FILTER (WHERE m.activo = 1 AND m.fecha_final < %(hoy)s) AS vencidos,
+        COUNT(*) FILTER (WHERE m.activo = 1 AND m.fecha_final >= %(hoy)s
+                           AND m.fecha_final <= %(limite)s) AS por_vencer,
+        COUNT(*) FILTER (WHERE m.activo = 1 AND m.fecha_final > %(limite)s) AS vigentes
+    FROM empresas e
+    {modulos}
+    WHERE e.estado = 'activo'
+      AND EXISTS (SELECT 1 FROM empresa_modulos a WHERE a.empresa_id = e.id AND a.activo = 1)
+      {filtro}
+    GROUP BY m.tipo
+'''
+
+# Días antes del vencimiento en que un módulo se considera "por vencer"
+DIAS_ALERTA = 30
+
+# Número de empresas por estado (todas las empresas, con o sin módulos activos)
+ESTADOS_SQL = '''
+    SELECT e.estado, COUNT(*) AS total
+    FROM empresas e
+    WHERE TRUE {filtro}
+    GROUP BY e.estado
+'''
+
+# Contadores del dashboard como pares (clave, valor): '<modulo>.<contador>', 'alertas.<prioridad>',
+# 'estado.<estado>' y 'total_empresas'. Con {filtro} restringido a una empresa da su aporte
+# a los contadores.
+CONTADORES_SQL = '''
+    WITH estadisticas AS (
+        {estadisticas}
+    ), alertas AS (
+        {alertas}
+    ), estados AS (
+        {estados}
+    )
+    SELECT s.tipo || '.' || c.nombre AS clave, c.valor
+    FROM estadisticas s
+    CROSS JOIN LATERAL (VALUES
+        ('activos', s.activos), ('renovados', s.renovados), ('facturados', s.facturados),
+        ('pendientes_renovacion', s.pendientes_renovacion),
+        ('pendientes_facturacion', s.pendientes_facturacion),
+        ('vencidos', s.vencidos), ('por_vencer', s.por_vencer), ('vigentes', s.vigentes)
+    ) AS c(nombre, valor)
+    UNION ALL
+    SELECT 'total_empresas', COALESCE(MAX(total_empresas), 0) FROM estadisticas
+    UNION ALL
+    SELECT 'alertas.' || prioridad, COUNT(*) FROM alertas GROUP BY prioridad
+    UNION ALL
+    SELECT 'alertas.total', COUNT(*) FROM alertas
+    UNION ALL
+    SELECT 'estado.' || estado, total FROM estados
+'''
+
+# Advisory lock (de transacción) que serializa los deltas del snapshot: cada delta toca un
+# conjunto de claves de dashboard_contadores que depende del estado de la empresa, así que
+# dos escrituras concurrentes podrían bloquear las mismas filas en orden inverso.
+# Orden de bloqueo en todas las escrituras: filas existentes de empresas (FOR UPDATE),
+# luego este lock y después las inserciones y los deltas.
+SNAPSHOT_LOCK_ID = 4_120_611_005
+
+# Suma (signo = 1) o resta (signo = -1) el aporte de las empresas filtradas al snapshot
+DELTA_SNAPSHOT_SQL = '''
+    INSERT INTO dashboard_contadores (clave, valor)
+    SELECT clave, %(signo)s * valor FROM ({contadores}) AS aporte
+    ON CONFLICT (clave) DO UPDATE SET valor = dashboard_contadores.valor + EXCLUDED.valor
+'''
+
+
+# Alta o actualización masiva por NIT de los datos propios de la empresa (VALUES lo
+# completa execute_values); los módulos se guardan después con EmpresaModuloRepository.
+# xmax = 0 identifica las filas recién insertadas frente a las actualizadas.
+UPSERT_SQL = '''
+    INSERT INTO empresas (nit, nombre, tipo, estado, fecha_creacion, fecha_actualizacion)
+    VALUES %s
+    ON CONFLICT (nit) DO UPDATE SET
+        nombre = EXCLUDED.nombre, tipo = EXCLUDED.tipo, estado = EXCLUDED.estado,
+        fecha_actualizacion = EXCLUDED.fecha_actualizacion
+    RETURNING nit, id, (xmax = 0) AS creada
+'''
+
+# Columnas de exportación en el mismo orden que la plantilla de importación.
+# La fecha de un módulo inactivo no se exporta: al importarla lo activaría.
+EXPORTACION_SQL = '''
+    SELECT e.nit, e.nombre, e.estado,
+        CASE WHEN c.activo = 1 THEN c.fecha_final END, c.renovado, c.facturado,
+        CASE WHEN r.activo = 1 THEN r.fecha_final END, r.renovado, r.facturado,
+        CASE WHEN d.activo = 1 THEN d.fecha_final END, d.renovado, d.facturado
+    FROM empresas e
+    LEFT JOIN empresa_modulos c ON c.empresa_id = e.id AND c.tipo = 'certificado'
+    LEFT JOIN empresa_modulos r ON r.empresa_id = e.id AND r.tipo = 'resolucion'
+    LEFT JOIN empresa_modulos d ON d.empresa_id = e.id AND d.tipo = 'documento'
+    {filtro}
+    ORDER BY e.id
+'''
+
+def _escapar_like(texto: str) -> str:
+    """Escapa los comodines de LIKE (\\, % y _) para buscar el texto literalmente"""
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _contadores_sql(filtro: str = '') -> str:
+    """Arma la consulta de contadores del dashboard con un filtro opcional sobre empresas"""
+    return CONTADORES_SQL.format(
+        estadisticas=ESTADISTICAS_SQL.format(modulos=MODULOS_SQL, filtro=filtro),
+        alertas=ALERTAS_SQL.format(modulos=MODULOS_SQL, filtro=filtro),
+        estados=ESTADOS_SQL.format(filtro=filtro)
+    )
 
 
 class EmpresaRepository(IRepository):
@@ -16,7 +194,8 @@ class EmpresaRepository(IRepository):
     Esta clase es compatible con IRepository y puede reemplazar a EmpresaRepository.
     """
 
-    def __init__(self, host: str, port: int, database: str, user: str, password: str):
+    def __init__(self, host: str, port: int, database: str, user: str, password: str,
+                 pool: Optional[ConnectionPool] = None):
         """
         Inicializa el repositorio con los parámetros de conexión
         
@@ -26,6 +205,7 @@ class EmpresaRepository(IRepository):
             database: Nombre de la base de datos
             user: Usuario de la base de datos
             password: Contraseña del usuario
+            pool: Pool de conexiones compartido (si no se indica se crea uno propio)
         """
         self.connection_params = {
             'host': host,
@@ -34,76 +214,69 @@ class EmpresaRepository(IRepository):
             'user': user,
             'password': password
         }
-        self._init_tables()
+        self.pool = pool or ConnectionPool(self.connection_params, minconn=0, maxconn=5)
+        self.modulos = EmpresaModuloRepository()
+        self._busqueda_trgm: Optional[bool] = None
+        self._busqueda_trgm_revisada = 0.0
 
+    @contextmanager
     def _get_connection(self):
-        """Crea una conexión a la base de datos PostgreSQL"""
-        return psycopg2.connect(**self.connection_params)
+        """Obtiene una conexión del pool y la devuelve al terminar"""
+        with self.pool.connection() as conn:
+            yield conn
 
-    def _calcular_notificacion(self, fecha_vencimiento: Optional[datetime]) -> Optional[str]:
-        """Calcula la fecha de notificación (30 días antes del vencimiento)"""
+    def _calcular_notificacion(self, fecha_vencimiento: Optional[datetime]) -> Optional[date]:
+        """Calcula la fecha de notificación (30 días antes del vencimiento, None sin vencimiento)"""
         if not fecha_vencimiento:
             return None
-        from datetime import timedelta
         fecha_notif = fecha_vencimiento - timedelta(days=30)
-        return fecha_notif.isoformat()
-
-    def _init_tables(self):
-        """Crea las tablas si no existen"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS empresas (
-                id SERIAL PRIMARY KEY,
-                nit TEXT UNIQUE NOT NULL,
-                nombre TEXT NOT NULL,
-                tipo TEXT NOT NULL,
-                estado TEXT NOT NULL DEFAULT 'activo',
-                
-                -- Certificado de Facturación Electrónica
-                cert_activo INTEGER DEFAULT 0,
-                cert_fecha_inicio TIMESTAMP,
-                cert_fecha_final TIMESTAMP,
-                cert_notificacion TEXT,
-                cert_renovado INTEGER DEFAULT 0,
-                cert_facturado INTEGER DEFAULT 0,
-                cert_comentarios TEXT,
-                
-                -- Resolución de Facturación
-                resol_activo INTEGER DEFAULT 0,
-                resol_fecha_inicio TIMESTAMP,
-                resol_fecha_final TIMESTAMP,
-                resol_notificacion TEXT,
-                resol_renovado INTEGER DEFAULT 0,
-                resol_facturado INTEGER DEFAULT 0,
-                resol_comentarios TEXT,
-                
-                -- Resolución Documentos Soporte
-                doc_activo INTEGER DEFAULT 0,
-                doc_fecha_inicio TIMESTAMP,
-                doc_fecha_final TIMESTAMP,
-                doc_notificacion TEXT,
-                doc_renovado INTEGER DEFAULT 0,
-                doc_facturado INTEGER DEFAULT 0,
-                doc_comentarios TEXT,
-                
-                -- Metadatos
-                fecha_creacion TIMESTAMP NOT NULL,
-                fecha_actualizacion TIMESTAMP NOT NULL
-            )
-        ''')
-        
-        # Índices para mejorar el rendimiento
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_nit ON empresas(nit)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_estado ON empresas(estado)')
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        return fecha_notif.date() if isinstance(fecha_notif, datetime) else fecha_notif
+
+    def _preparar_modulos(self, empresa: Empresa):
+        """Completa los módulos faltantes y calcula sus notificaciones (30 días antes)"""
+        for tipo in TIPOS_MODULO:
+            modulo = getattr(empresa, tipo) or ModuloEmpresa()
+            modulo.notificacion = self._calcular_notificacion(modulo.fecha_final)
+            setattr(empresa, tipo, modulo)
+
+    @property
+    def busqueda_trgm(self) -> bool:
+        """
+        Indica si la búsqueda por similitud está disponible: el paso opcional
+        repetibles/busqueda_trigram crea f_unaccent y los índices solo si puede
+        instalar las extensiones. Una vez disponible no se vuelve a consultar;
+        mientras no lo esté se comprueba cada REVISION_BUSQUEDA_TRGM segundos,
+        para activarla cuando las migraciones la creen sin reiniciar la aplicación.
+        
+        Returns:
+            True si hay búsqueda trigram; False para usar la búsqueda simple
+        """
+        if self._busqueda_trgm:
+            return True
+        
+        ahora = time.monotonic()
+        if self._busqueda_trgm is None or ahora - self._busqueda_trgm_revisada >= REVISION_BUSQUEDA_TRGM:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT to_regclass('idx_empresas_nombre_trgm') IS NOT NULL")
+                disponible = cursor.fetchone()[0]
+                cursor.close()
+            if not disponible and self._busqueda_trgm is None:
+                print("⚠️ Búsqueda trigram no disponible (se usará búsqueda simple)")
+            elif disponible:
+                print("✅ Búsqueda trigram disponible")
+            self._busqueda_trgm = disponible
+            self._busqueda_trgm_revisada = ahora
+        return self._busqueda_trgm
 
-    def _row_to_empresa(self, row: tuple) -> Empresa:
-        """Convierte una fila de base de datos a un objeto Empresa"""
+    def _row_to_empresa(self, row: tuple, modulos: Dict[str, ModuloEmpresa]) -> Empresa:
+        """
+        Convierte una fila de base de datos (columnas de COLUMNAS_EMPRESA) a un objeto Empresa
+        
+        Args:
+            row: Fila de la tabla empresas
+            modulos: Módulos de la empresa por tipo (los que falten quedan inactivos)
+        """
         def parse_date(date_value) -> Optional[datetime]:
             if date_value:
                 if isinstance(date_value, datetime):
@@ -114,213 +287,435 @@ class EmpresaRepository(IRepository):
                     return None
             return None
 
-        certificado = ModuloEmpresa(
-            activo=row[5],  # cert_activo
-            fecha_inicio=parse_date(row[6]),  # cert_fecha_inicio
-            fecha_final=parse_date(row[7]),  # cert_fecha_final
-            notificacion=row[8],  # cert_notificacion
-            renovado=row[9],  # cert_renovado
-            facturado=row[10],  # cert_facturado
-            comentarios=row[11]  # cert_comentarios
-        )
-
-        resolucion = ModuloEmpresa(
-            activo=row[12],  # resol_activo
-            fecha_inicio=parse_date(row[13]),  # resol_fecha_inicio
-            fecha_final=parse_date(row[14]),  # resol_fecha_final
-            notificacion=row[15],  # resol_notificacion
-            renovado=row[16],  # resol_renovado
-            facturado=row[17],  # resol_facturado
-            comentarios=row[18]  # resol_comentarios
-        )
-
-        documento = ModuloEmpresa(
-            activo=row[19],  # doc_activo
-            fecha_inicio=parse_date(row[20]),  # doc_fecha_inicio
-            fecha_final=parse_date(row[21]),  # doc_fecha_final
-            notificacion=row[22],  # doc_notificacion
-            renovado=row[23],  # doc_renovado
-            facturado=row[24],  # doc_facturado
-            comentarios=row[25]  # doc_comentarios
-        )
-
         return Empresa(
             id=row[0],
             nit=row[1],
             nombre=row[2],
             tipo=row[3],
             estado=row[4],
-            certificado=certificado,
-            resolucion=resolucion,
-            documento=documento,
-            fecha_creacion=parse_date(row[26]),
-            fecha_actualizacion=parse_date(row[27])
+            fecha_creacion=parse_date(row[5]),
+            fecha_actualizacion=parse_date(row[6]),
+            **{tipo: modulos.get(tipo) or ModuloEmpresa() for tipo in TIPOS_MODULO}
         )
 
+    def _rows_to_empresas(self, cursor, rows: List[tuple]) -> List[Empresa]:
+        """
+        Convierte filas de empresas a objetos Empresa leyendo sus módulos en una sola consulta
+        
+        Args:
+            cursor: Cursor abierto de la misma conexión
+            rows: Filas con las columnas de COLUMNAS_EMPRESA al inicio
+        """
+        modulos = self.modulos.cargar(cursor, [row[0] for row in rows])
+        return [self._row_to_empresa(row, modulos.get(row[0], {})) for row in rows]
+
+    def _rows_to_dicts(self, cursor, rows: List[tuple]) -> List[Dict[str, Any]]:
+        """
+        Convierte filas de empresas directamente a la forma de Empresa.to_dict()
+        (camino rápido de los listados: sin objetos Empresa ni ModuloEmpresa)
+        
+        Args:
+            cursor: Cursor abierto de la misma conexión
+            rows: Filas con las columnas de COLUMNAS_EMPRESA al inicio
+        """
+        iso = FechasISO()
+        modulos = self.modulos.cargar_dicts(cursor, [row[0] for row in rows], iso)
+        vacio = {}
+        resultado = []
+        for empresa_id, nit, nombre, tipo, estado, creacion, actualizacion, *_ in rows:
+            propios = modulos.get(empresa_id, vacio)
+            resultado.append({
+                'id': empresa_id,
+                'nit': nit,
+                'nombre': nombre,
+                'tipo': tipo,
+                'estado': estado,
+                **{modulo: propios.get(modulo) or dict(MODULO_VACIO) for modulo in TIPOS_MODULO},
+                'fecha_creacion': iso[creacion],
+                'fecha_actualizacion': iso[actualizacion]
+            })
+        return resultado
+
     def create(self, empresa: Empresa) -> Empresa:
         """Crea una nueva empresa en la base de datos"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
         
-        now = datetime.now()
-        empresa.fecha_creacion = now
-        empresa.fecha_actualizacion = now
-        
-        # Calcular notificaciones automáticamente (30 días antes)
-        if empresa.certificado.fecha_final:
-            empresa.certificado.notificacion = self._calcular_notificacion(empresa.certificado.fecha_final)
-        if empresa.resolucion.fecha_final:
-            empresa.resolucion.notificacion = self._calcular_notificacion(empresa.resolucion.fecha_final)
-        if empresa.documento.fecha_final:
-            empresa.documento.notificacion = self._calcular_notificacion(empresa.documento.fecha_final)
-        
-        cursor.execute('''
-            INSERT INTO empresas (
-                nit, nombre, tipo, estado,
-                cert_activo, cert_fecha_inicio, cert_fecha_final, cert_notificacion,
-                cert_renovado, cert_facturado, cert_comentarios,
-                resol_activo, resol_fecha_inicio, resol_fecha_final, resol_notificacion,
-                resol_renovado, resol_facturado, resol_comentarios,
-                doc_activo, doc_fecha_inicio, doc_fecha_final, doc_notificacion,
-                doc_renovado, doc_facturado, doc_comentarios,
-                fecha_creacion, fecha_actualizacion
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        ''', (
-            empresa.nit, empresa.nombre, empresa.tipo, empresa.estado,
-            empresa.certificado.activo,
-            empresa.certificado.fecha_inicio,
-            empresa.certificado.fecha_final,
-            empresa.certificado.notificacion,
-            empresa.certificado.renovado, empresa.certificado.facturado, empresa.certificado.comentarios,
-            empresa.resolucion.activo,
-            empresa.resolucion.fecha_inicio,
-            empresa.resolucion.fecha_final,
-            empresa.resolucion.notificacion,
-            empresa.resolucion.renovado, empresa.resolucion.facturado, empresa.resolucion.comentarios,
-            empresa.documento.activo,
-            empresa.documento.fecha_inicio,
-            empresa.documento.fecha_final,
-            empresa.documento.notificacion,
-            empresa.documento.renovado, empresa.documento.facturado, empresa.documento.comentarios,
-            now, now
-        ))
-        
-        empresa.id = cursor.fetchone()[0]
-        conn.commit()
-        cursor.close()
-        conn.close()
+            now = datetime.now()
+            empresa.fecha_creacion = now
+            empresa.fecha_actualizacion = now
+        
+            self._preparar_modulos(empresa)
+        
+            # El bloqueo del snapshot se toma antes de insertar, como en las demás escrituras
+            fecha_snapshot = self._fecha_snapshot(cursor)
+        
+            cursor.execute('''
+                INSERT INTO empresas (nit, nombre, tipo, estado, fecha_creacion, fecha_actualizacion)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                RETURNING id
+            ''', (empresa.nit, empresa.nombre, empresa.tipo, empresa.estado, now, now))
+        
+            empresa.id = cursor.fetchone()[0]
+            self.modulos.guardar(cursor, [(empresa.id, empresa)])
+        
+            self._aplicar_delta_snapshot(cursor, fecha_snapshot, 1,
+                                         'AND e.id = %(empresa_id)s', {'empresa_id': empresa.id})
+            conn.commit()
+            cursor.close()
         
         return empresa
 
+    def upsert_many(self, empresas: List[Empresa]) -> List[Dict[str, Any]]:
+        """
+        Crea o actualiza (por NIT) un lote de empresas en una sola transacción
+        con INSERT ... ON CONFLICT (nit) DO UPDATE.
+        
+        Si la sentencia masiva falla, el lote se reintenta fila por fila con
+        savepoints para aislar las filas con error sin perder las demás.
+        
+        Args:
+            empresas: Empresas a guardar (los NIT deben ser únicos dentro del lote)
+            
+        Returns:
+            Un resultado por empresa, en el mismo orden, con nit, id, creada
+            (True si se insertó, False si se actualizó) y error (None si se guardó)
+        """
+        if not empresas:
+            return []
+        
+        now = datetime.now()
+        valores = []
+        for empresa in empresas:
+            empresa.fecha_creacion = empresa.fecha_creacion or now
+            empresa.fecha_actualizacion = now
+            self._preparar_modulos(empresa)
+            valores.append((empresa.nit, empresa.nombre, empresa.tipo, empresa.estado,
+                            empresa.fecha_creacion, now))
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+        
+            try:
+                filas = self._upsert_lote(cursor, empresas, valores, por_fila=False)
+            except Exception:
+                conn.rollback()
+                filas = self._upsert_lote(cursor, empresas, valores, por_fila=True)
+        
+            conn.commit()
+            cursor.close()
+        
+        resultados = []
+        for empresa, fila in zip(empresas, filas):
+            if fila.get('id') is not None:
+                empresa.id = fila['id']
+            resultados.append({'nit': empresa.nit, **fila})
+        return resultados
+
+    def _upsert_lote(self, cursor, empresas: List[Empresa], valores: List[tuple],
+                     por_fila: bool) -> List[Dict[str, Any]]:
+        """
+        Aplica el upsert de un lote (empresas y sus módulos) dentro de la transacción
+        actual y mantiene el snapshot del dashboard (resta el aporte previo y suma el nuevo).
+        
+        Args:
+            cursor: Cursor de la transacción
+            empresas: Empresas del lote, en el mismo orden que valores
+            valores: Tuplas de columnas en el orden de UPSERT_SQL
+            por_fila: True para aplicar cada fila con su propio savepoint
+            
+        Returns:
+            Resultado por fila (id, creada, error)
+        """
+        nits = [empresa.nit for empresa in empresas]
+        filtro = 'AND e.nit = ANY(%(nits)s)'
+        params = {'nits': nits}
+        
+        # Bloquear en orden estable las filas existentes antes de descontar su aporte
+        cursor.execute('SELECT 1 FROM empresas WHERE nit = ANY(%s) ORDER BY id FOR UPDATE', (nits,))
+        fecha_snapshot = self._fecha_snapshot(cursor)
+        self._aplicar_delta_snapshot(cursor, fecha_snapshot, -1, filtro, params)
+        
+        if not por_fila:
+            filas = psycopg2.extras.execute_values(cursor, UPSERT_SQL, valores, page_size=1000, fetch=True)
+            por_nit = {nit: (empresa_id, creada) for nit, empresa_id, creada in filas}
+            self.modulos.guardar(cursor, [(por_nit[empresa.nit][0], empresa) for empresa in empresas])
+            resultados = [
+                {'id': por_nit[nit][0], 'creada': por_nit[nit][1], 'error': None} for nit in nits
+            ]
+        else:
+            resultados = []
+            for empresa, fila in zip(empresas, valores):
+                cursor.execute('SAVEPOINT upsert_fila')
+                try:
+                    _, empresa_id, creada = psycopg2.extras.execute_values(
+                        cursor, UPSERT_SQL, [fila], fetch=True
+                    )[0]
+                    self.modulos.guardar(cursor, [(empresa_id, empresa)])
+                    cursor.execute('RELEASE SAVEPOINT upsert_fila')
+                    resultados.append({'id': empresa_id, 'creada': creada, 'error': None})
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO SAVEPOINT upsert_fila')
+                    resultados.append({'id': None, 'creada': False, 'error': str(e)})
+        
+        self._aplicar_delta_snapshot(cursor, fecha_snapshot, 1, filtro, params)
+        return resultados
+
     def get_by_id(self, entity_id: int) -> Optional[Empresa]:
         """Obtiene una empresa por su ID"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM empresas WHERE id = %s', (entity_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+            cursor.execute(f'SELECT {COLUMNAS_EMPRESA} FROM empresas e WHERE e.id = %s', (entity_id,))
+            rows = cursor.fetchall()
+            empresas = self._rows_to_empresas(cursor, rows)
+            cursor.close()
         
-        return self._row_to_empresa(row) if row else None
+        return empresas[0] if empresas else None
 
     def get_by_nit(self, nit: str) -> Optional[Empresa]:
         """Obtiene una empresa por su NIT"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM empresas WHERE nit = %s', (nit,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+            cursor.execute(f'SELECT {COLUMNAS_EMPRESA} FROM empresas e WHERE e.nit = %s', (nit,))
+            rows = cursor.fetchall()
+            empresas = self._rows_to_empresas(cursor, rows)
+            cursor.close()
+        
+        return empresas[0] if empresas else None
+
+    def get_all(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+                despues_de: Optional[Tuple[Any, int]] = None, orden: str = 'nombre',
+                descendente: bool = False) -> List[Empresa]:
+        """
+        Obtiene empresas con filtros opcionales y paginación por cursor (keyset)
+        
+        Args:
+            filters: Filtros opcionales:
+                - estado: estado exacto de la empresa
+                - activos_solamente: al menos un módulo activo
+                - modulo: 'certificado', 'resolucion' o 'documento' (módulo activo)
+                - prioridad: 'CRITICA', 'ALTA' o 'MEDIA' (alguna alerta con esa prioridad)
+                - vencimiento_desde / vencimiento_hasta: rango de fecha_final del módulo
+                  indicado o de cualquier módulo activo
+                - texto: coincidencia parcial en nombre o NIT
+            limit: Tamaño de página (None devuelve todas)
+            despues_de: Clave (valor de orden, id) del último registro de la página anterior
+            orden: Columna de ordenamiento (ver COLUMNAS_ORDEN)
+            descendente: Orden descendente
+            
+        Returns:
+            Lista de empresas ordenadas por (orden, id)
+        """
+        query, params = self._consulta_listado(filters, limit, despues_de, orden, descendente)
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            empresas = self._rows_to_empresas(cursor, cursor.fetchall())
+            cursor.close()
         
-        return self._row_to_empresa(row) if row else None
+        return empresas
 
-    def get_all(self, filters: Optional[Dict[str, Any]] = None) -> List[Empresa]:
-        """Obtiene todas las empresas con filtros opcionales"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+    def get_all_dicts(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+                      despues_de: Optional[Tuple[Any, int]] = None, orden: str = 'nombre',
+                      descendente: bool = False) -> List[Dict[str, Any]]:
+        """
+        Igual que get_all pero devuelve cada empresa ya serializada (forma de
+        Empresa.to_dict()), convirtiendo las filas del cursor sin crear objetos
+        
+        Args:
+            Los mismos de get_all
+            
+        Returns:
+            Lista de diccionarios ordenados por (orden, id)
+        """
+        query, params = self._consulta_listado(filters, limit, despues_de, orden, descendente)
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            empresas = self._rows_to_dicts(cursor, cursor.fetchall())
+            cursor.close()
         
-        query = 'SELECT * FROM empresas WHERE 1=1'
-        params = []
+        return empresas
+
+    def _consulta_listado(self, filters: Optional[Dict[str, Any]], limit: Optional[int],
+                          despues_de: Optional[Tuple[Any, int]], orden: str,
+                          descendente: bool) -> Tuple[str, Dict[str, Any]]:
+        """
+        Arma la consulta de listado de empresas con filtros y paginación por cursor (keyset)
         
-        if filters:
-            if 'estado' in filters:
-                query += ' AND estado = %s'
-                params.append(filters['estado'])
+        Args:
+            Los mismos de get_all
             
-            if 'activos_solamente' in filters and filters['activos_solamente']:
-                query += ' AND (cert_activo = 1 OR resol_activo = 1 OR doc_activo = 1)'
+        Returns:
+            Tupla (consulta, parámetros) sobre COLUMNAS_EMPRESA ordenada por (orden, id)
+        """
+        if orden not in COLUMNAS_ORDEN:
+            raise ValueError(f"Orden no válido: {orden}")
+        
+        filters = filters or {}
+        condiciones = []
+        params: Dict[str, Any] = {}
         
-        query += ' ORDER BY nombre'
+        if 'estado' in filters:
+            condiciones.append('e.estado = %(estado)s')
+            params['estado'] = filters['estado']
+        
+        if filters.get('activos_solamente'):
+            condiciones.append(
+                'EXISTS (SELECT 1 FROM empresa_modulos a WHERE a.empresa_id = e.id AND a.activo = 1)'
+            )
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        modulo = filters.get('modulo')
+        if modulo and modulo not in TIPOS_MODULO:
+            raise ValueError(f"Módulo no válido: {modulo}")
+        
+        # Módulo activo del tipo indicado (o de cualquier tipo si solo se filtra por vencimiento),
+        # opcionalmente con fecha_final en el rango: recorre idx_empresa_modulos_tipo_activo_fecha_final
+        desde = filters.get('vencimiento_desde')
+        hasta = filters.get('vencimiento_hasta')
+        if modulo or desde or hasta:
+            partes = ['a.tipo = ANY(%(tipos_modulo)s)', 'a.activo = 1']
+            if desde:
+                partes.append('a.fecha_final >= %(vencimiento_desde)s')
+            if hasta:
+                partes.append('a.fecha_final <= %(vencimiento_hasta)s')
+            condiciones.append(
+                'e.id IN (SELECT a.empresa_id FROM empresa_modulos a WHERE ' + ' AND '.join(partes) + ')'
+            )
+            params['tipos_modulo'] = [modulo] if modulo else list(TIPOS_MODULO)
+            params['vencimiento_desde'] = desde
+            params['vencimiento_hasta'] = hasta
+        
+        if filters.get('prioridad'):
+            filtro_modulo = 'AND a.modulo = %(modulo)s' if modulo else ''
+            condiciones.append(
+                'e.id IN (SELECT a.id FROM (' + ALERTAS_SQL.format(modulos=MODULOS_SQL, filtro='') +
+                f') a WHERE a.prioridad = %(prioridad)s {filtro_modulo})'
+            )
+            params['prioridad'] = filters['prioridad']
+            params['modulo'] = modulo
+            params['hoy'] = datetime.now()
+        
+        if filters.get('texto'):
+            if self.busqueda_trgm:
+                condiciones.append(
+                    "(f_unaccent(lower(e.nombre)) LIKE '%%' || f_unaccent(lower(%(texto)s)) || '%%'"
+                    " OR e.nit LIKE '%%' || %(texto)s || '%%')"
+                )
+                params['texto'] = _escapar_like(filters['texto'])
+            else:
+                condiciones.append("(e.nombre ILIKE %(texto)s OR e.nit ILIKE %(texto)s)")
+                params['texto'] = f"%{_escapar_like(filters['texto'])}%"
+        
+        # Keyset: continuar después de la última fila de la página anterior
+        comparador = '<' if descendente else '>'
+        if despues_de is not None:
+            condiciones.append(f'(e.{orden}, e.id) {comparador} (%(cursor_valor)s, %(cursor_id)s)')
+            params['cursor_valor'], params['cursor_id'] = despues_de
+        
+        direccion = 'DESC' if descendente else 'ASC'
+        query = f'SELECT {COLUMNAS_EMPRESA} FROM empresas e'
+        if condiciones:
+            query += ' WHERE ' + ' AND '.join(condiciones)
+        query += f' ORDER BY e.{orden} {direccion}, e.id {direccion}'
+        if limit is not None:
+            query += ' LIMIT %(limit)s'
+            params['limit'] = limit
+        
+        return query, params
+
+    def buscar(self, texto: str, limit: int = 20, offset: int = 0,
+               estado: Optional[str] = None) -> List[Tuple[Empresa, float]]:
+        """
+        Busca empresas por nombre o NIT con resultados ordenados por relevancia.
+        Usa el índice trigram sobre el nombre normalizado (sin tildes, minúsculas)
+        y sobre el NIT, por lo que el costo no crece con el tamaño de la tabla.
         
-        return [self._row_to_empresa(row) for row in rows]
+        Args:
+            texto: Texto a buscar (parcial, sin importar tildes ni mayúsculas)
+            limit: Número máximo de resultados
+            offset: Resultados a omitir (paginación)
+            estado: Estado opcional de las empresas
+            
+        Returns:
+            Lista de tuplas (empresa, relevancia entre 0 y 1)
+        """
+        if self.busqueda_trgm:
+            query = '''
+                SELECT {columnas},
+                    CASE
+                        WHEN e.nit = %(texto)s THEN 1.0
+                        WHEN f_unaccent(lower(e.nombre)) LIKE b.patron_like || '%%' THEN 0.9
+                        ELSE GREATEST(word_similarity(b.patron, f_unaccent(lower(e.nombre))),
+                                      similarity(e.nit, %(texto)s)) * 0.8
+                    END AS relevancia
+                FROM empresas e,
+                    (SELECT f_unaccent(lower(%(texto)s)) AS patron,
+                            f_unaccent(lower(%(texto_like)s)) AS patron_like) b
+                WHERE (f_unaccent(lower(e.nombre)) LIKE '%%' || b.patron_like || '%%'
+                       OR b.patron <%% f_unaccent(lower(e.nombre))
+                       OR e.nit LIKE %(texto_like)s || '%%')
+            '''
+        else:
+            query = '''
+                SELECT {columnas},
+                    CASE WHEN e.nit = %(texto)s THEN 1.0
+                         WHEN lower(e.nombre) LIKE b.patron_like || '%%' THEN 0.9
+                         ELSE 0.5 END AS relevancia
+                FROM empresas e,
+                    (SELECT lower(%(texto_like)s) AS patron_like) b
+                WHERE (lower(e.nombre) LIKE '%%' || b.patron_like || '%%'
+                       OR e.nit LIKE %(texto_like)s || '%%')
+            '''
+        
+        query = query.format(columnas=COLUMNAS_EMPRESA)
+        texto = texto.strip()
+        params = {'texto': texto, 'texto_like': _escapar_like(texto), 'limit': limit, 'offset': offset}
+        if estado:
+            query += ' AND e.estado = %(estado)s'
+            params['estado'] = estado
+        query += ' ORDER BY relevancia DESC, e.nombre, e.id LIMIT %(limit)s OFFSET %(offset)s'
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            empresas = self._rows_to_empresas(cursor, rows)
+            cursor.close()
+        
+        return [(empresa, float(row[-1])) for empresa, row in zip(empresas, rows)]
 
     def update(self, empresa: Empresa) -> bool:
         """Actualiza una empresa existente"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        empresa.fecha_actualizacion = datetime.now()
-        
-        # Manejar módulos opcionales con valores por defecto
-        cert = empresa.certificado if empresa.certificado else ModuloEmpresa()
-        resol = empresa.resolucion if empresa.resolucion else ModuloEmpresa()
-        doc = empresa.documento if empresa.documento else ModuloEmpresa()
-        
-        # Calcular notificaciones automáticamente (30 días antes)
-        if cert.fecha_final:
-            cert.notificacion = self._calcular_notificacion(cert.fecha_final)
-        if resol.fecha_final:
-            resol.notificacion = self._calcular_notificacion(resol.fecha_final)
-        if doc.fecha_final:
-            doc.notificacion = self._calcular_notificacion(doc.fecha_final)
-        
-        cursor.execute('''
-            UPDATE empresas SET
-                nombre = %s, tipo = %s, estado = %s,
-                cert_activo = %s, cert_fecha_inicio = %s, cert_fecha_final = %s,
-                cert_notificacion = %s, cert_renovado = %s, cert_facturado = %s,
-                cert_comentarios = %s,
-                resol_activo = %s, resol_fecha_inicio = %s, resol_fecha_final = %s,
-                resol_notificacion = %s, resol_renovado = %s, resol_facturado = %s,
-                resol_comentarios = %s,
-                doc_activo = %s, doc_fecha_inicio = %s, doc_fecha_final = %s,
-                doc_notificacion = %s, doc_renovado = %s, doc_facturado = %s,
-                doc_comentarios = %s,
-                fecha_actualizacion = %s
-            WHERE id = %s
-        ''', (
-            empresa.nombre, empresa.tipo, empresa.estado,
-            cert.activo,
-            cert.fecha_inicio,
-            cert.fecha_final,
-            cert.notificacion,
-            cert.renovado, cert.facturado, cert.comentarios,
-            resol.activo,
-            resol.fecha_inicio,
-            resol.fecha_final,
-            resol.notificacion,
-            resol.renovado, resol.facturado, resol.comentarios,
-            doc.activo,
-            doc.fecha_inicio,
-            doc.fecha_final,
-            doc.notificacion,
-            doc.renovado, doc.facturado, doc.comentarios,
-            empresa.fecha_actualizacion,
-            empresa.id
-        ))
-        
-        success = cursor.rowcount > 0
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+        
+            empresa.fecha_actualizacion = datetime.now()
+        
+            # Bloquear la fila y descontar su aporte actual al snapshot del dashboard
+            filtro = 'AND e.id = %(empresa_id)s'
+            params = {'empresa_id': empresa.id}
+            cursor.execute('SELECT 1 FROM empresas WHERE id = %s FOR UPDATE', (empresa.id,))
+            fecha_snapshot = self._fecha_snapshot(cursor)
+            self._aplicar_delta_snapshot(cursor, fecha_snapshot, -1, filtro, params)
+        
+            self._preparar_modulos(empresa)
+        
+            cursor.execute('''
+                UPDATE empresas SET nombre = %s, tipo = %s, estado = %s, fecha_actualizacion = %s
+                WHERE id = %s
+            ''', (empresa.nombre, empresa.tipo, empresa.estado, empresa.fecha_actualizacion, empresa.id))
+        
+            success = cursor.rowcount > 0
+            if success:
+                self.modulos.guardar(cursor, [(empresa.id, empresa)])
+            self._aplicar_delta_snapshot(cursor, fecha_snapshot, 1, filtro, params)
+            conn.commit()
+            cursor.close()
         
         return success
 
@@ -334,67 +729,219 @@ class EmpresaRepository(IRepository):
             campo: 'renovado' o 'facturado'
             valor: Nuevo valor (0 o 1)
         """
-        prefijos = {
-            'certificado': 'cert',
-            'resolucion': 'resol',
-            'documento': 'doc'
-        }
-        
-        if modulo not in prefijos or campo not in ['renovado', 'facturado', 'activo']:
+        if modulo not in TIPOS_MODULO or campo not in ['renovado', 'facturado', 'activo']:
             return False
         
-        prefijo = prefijos[modulo]
-        columna = f"{prefijo}_{campo}"
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
         
-        conn = self._get_connection()
-        cursor = conn.cursor()
+            filtro = 'AND e.nit = %(nit)s'
+            params = {'nit': nit}
+            cursor.execute('SELECT id FROM empresas WHERE nit = %s FOR UPDATE', (nit,))
+            row = cursor.fetchone()
+            if not row:
+                cursor.close()
+                return False
         
-        now = datetime.now()
-        query = f'UPDATE empresas SET {columna} = %s, fecha_actualizacion = %s WHERE nit = %s'
+            fecha_snapshot = self._fecha_snapshot(cursor)
+            self._aplicar_delta_snapshot(cursor, fecha_snapshot, -1, filtro, params)
         
-        cursor.execute(query, (valor, now, nit))
+            success = self.modulos.actualizar_campo(cursor, row[0], modulo, campo, valor)
+            cursor.execute('UPDATE empresas SET fecha_actualizacion = %s WHERE id = %s',
+                           (datetime.now(), row[0]))
         
-        success = cursor.rowcount > 0
-        conn.commit()
-        cursor.close()
-        conn.close()
+            self._aplicar_delta_snapshot(cursor, fecha_snapshot, 1, filtro, params)
+            conn.commit()
+            cursor.close()
         
         return success
 
     def delete(self, entity_id: int) -> bool:
         """Elimina una empresa por su ID"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute('SELECT 1 FROM empresas WHERE id = %s FOR UPDATE', (entity_id,))
+            self._aplicar_delta_snapshot(cursor, self._fecha_snapshot(cursor), -1,
+                                         'AND e.id = %(empresa_id)s', {'empresa_id': entity_id})
         
-        cursor.execute('DELETE FROM empresas WHERE id = %s', (entity_id,))
+            cursor.execute('DELETE FROM empresas WHERE id = %s', (entity_id,))
         
-        success = cursor.rowcount > 0
-        conn.commit()
-        cursor.close()
-        conn.close()
+            success = cursor.rowcount > 0
+            conn.commit()
+            cursor.close()
         
         return success
 
     def exists(self, entity_id: int) -> bool:
         """Verifica si existe una empresa con el ID dado"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('SELECT 1 FROM empresas WHERE id = %s LIMIT 1', (entity_id,))
-        exists = cursor.fetchone() is not None
+            cursor.execute('SELECT 1 FROM empresas WHERE id = %s LIMIT 1', (entity_id,))
+            exists = cursor.fetchone() is not None
         
-        cursor.close()
-        conn.close()
+            cursor.close()
         return exists
 
     def exists_by_nit(self, nit: str) -> bool:
         """Verifica si existe una empresa con el NIT dado"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute('SELECT 1 FROM empresas WHERE nit = %s LIMIT 1', (nit,))
-        exists = cursor.fetchone() is not None
+            cursor.execute('SELECT 1 FROM empresas WHERE nit = %s LIMIT 1', (nit,))
+            exists = cursor.fetchone() is not None
         
-        cursor.close()
-        conn.close()
+            cursor.close()
         return exists
+
+    def get_alertas_notificacion(self, fecha_referencia: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Obtiene los módulos de empresas activas que requieren notificación
+        
+        Args:
+            fecha_referencia: Fecha contra la que se calculan días restantes (por defecto ahora)
+            
+        Returns:
+            Lista de alertas (una fila por módulo) ordenadas por empresa y módulo, con
+            dias_restantes, prioridad y motivo ya calculados
+        """
+        hoy = fecha_referencia or datetime.now()
+        query = ALERTAS_SQL.format(modulos=MODULOS_SQL, filtro='') + ' ORDER BY nombre, id, orden'
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute(query, {'hoy': hoy})
+            rows = cursor.fetchall()
+            cursor.close()
+        
+        return [dict(row) for row in rows]
+
+    def iter_exportacion(self, estado: Optional[str] = None, itersize: int = 2000) -> Iterator[tuple]:
+        """
+        Recorre las empresas para exportarlas con un cursor con nombre (del lado del servidor):
+        solo se traen a memoria itersize filas a la vez.
+        La conexión queda ocupada hasta agotar o cerrar el generador.
+        
+        Args:
+            estado: Estado de las empresas a exportar (todas si es None)
+            itersize: Filas que se traen del servidor en cada viaje
+            
+        Yields:
+            Tuplas en el orden de las columnas de la plantilla de importación
+        """
+        filtro = 'WHERE e.estado = %(estado)s' if estado else ''
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor(name='exportacion_empresas')
+            cursor.itersize = itersize
+            try:
+                cursor.execute(EXPORTACION_SQL.format(filtro=filtro), {'estado': estado})
+                yield from cursor
+            finally:
+                cursor.close()
+                conn.rollback()
+
+    def _fecha_snapshot(self, cursor) -> Optional[datetime]:
+        """
+        Obtiene la fecha de referencia del snapshot del dashboard dentro de la transacción actual.
+        El bloqueo compartido evita que un refresco completo se intercale con los deltas, y el
+        advisory lock (hasta el fin de la transacción) evita que dos escrituras apliquen sus
+        deltas a la vez y se bloqueen mutuamente en dashboard_contadores.
+        
+        Returns:
+            Fecha de referencia o None si el snapshot aún no se ha generado
+        """
+        cursor.execute('SELECT fecha_referencia FROM dashboard_snapshot WHERE id = 1 FOR SHARE')
+        row = cursor.fetchone()
+        if not row:
+            return None
+        
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', (SNAPSHOT_LOCK_ID,))
+        return row[0]
+
+    def _aplicar_delta_snapshot(self, cursor, fecha_snapshot: Optional[datetime], signo: int,
+                                filtro: str, params: Dict[str, Any]):
+        """
+        Suma o resta al snapshot del dashboard el aporte de las empresas filtradas
+        
+        Args:
+            cursor: Cursor de la transacción de escritura
+            fecha_snapshot: Fecha de referencia del snapshot (None si no existe)
+            signo: 1 para sumar el aporte, -1 para restarlo
+            filtro: Condición SQL adicional sobre la empresa (alias e)
+            params: Parámetros del filtro
+        """
+        if fecha_snapshot is None:
+            return
+        
+        cursor.execute(DELTA_SNAPSHOT_SQL.format(contadores=_contadores_sql(filtro)), {
+            **params,
+            'signo': signo,
+            'hoy': fecha_snapshot,
+            'limite': fecha_snapshot + timedelta(days=DIAS_ALERTA)
+        })
+
+    def refrescar_snapshot_dashboard(self, fecha_referencia: Optional[datetime] = None) -> datetime:
+        """
+        Recalcula por completo el snapshot de contadores del dashboard.
+        Se ejecuta periódicamente porque vencimientos y prioridades cambian con el paso de los días.
+        
+        Args:
+            fecha_referencia: Fecha contra la que se evalúan los vencimientos (por defecto ahora)
+            
+        Returns:
+            Fecha de referencia del nuevo snapshot
+        """
+        hoy = fecha_referencia or datetime.now()
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute('''
+                INSERT INTO dashboard_snapshot (id, fecha_referencia, actualizado_en)
+                VALUES (1, %s, %s)
+                ON CONFLICT (id) DO NOTHING
+            ''', (hoy, hoy))
+            cursor.execute('SELECT 1 FROM dashboard_snapshot WHERE id = 1 FOR UPDATE')
+        
+            cursor.execute('DELETE FROM dashboard_contadores')
+            cursor.execute(
+                'INSERT INTO dashboard_contadores (clave, valor) ' + _contadores_sql(),
+                {'hoy': hoy, 'limite': hoy + timedelta(days=DIAS_ALERTA)}
+            )
+            cursor.execute(
+                'UPDATE dashboard_snapshot SET fecha_referencia = %s, actualizado_en = %s WHERE id = 1',
+                (hoy, datetime.now())
+            )
+        
+            conn.commit()
+            cursor.close()
+        
+        return hoy
+
+    def get_snapshot_dashboard(self) -> Optional[Dict[str, Any]]:
+        """
+        Lee el snapshot de contadores del dashboard (costo constante, no recorre empresas)
+        
+        Returns:
+            Diccionario con fecha_referencia, actualizado_en y contadores por clave,
+            o None si el snapshot aún no se ha generado
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute('SELECT fecha_referencia, actualizado_en FROM dashboard_snapshot WHERE id = 1')
+            meta = cursor.fetchone()
+            cursor.execute('SELECT clave, valor FROM dashboard_contadores')
+            rows = cursor.fetchall()
+            cursor.close()
+        
+        if not meta:
+            return None
+        
+        return {
+            'fecha_referencia': meta[0],
+            'actualizado_en': meta[1],
+            'contadores': {clave: valor for clave, valor in rows}
+        }
@@ -0,0 +1,289 @@
+"""
+Repositorio PostgreSQL para los trabajos de importación masiva
+Guarda el estado y el progreso de cada importación para poder consultarlos
+mientras se procesa en segundo plano (y después de recargar la página)
+"""
+import json
+import uuid
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any
+from app.repositories.connection_pool import ConnectionPool
+
+
+class ImportacionJobRepository:
+    """
+    Repositorio que maneja la persistencia de los trabajos de importación
+    """
+
+    # Estados de un trabajo de importación
+    PENDIENTE = 'pendiente'
+    PROCESANDO = 'procesando'
+    COMPLETADO = 'completado'
+    FALLIDO = 'fallido'
+
+    # Contadores de progreso copiados desde el resultado de la importación
+    CONTADORES = ('total', 'exitosas', 'actualizadas', 'fallidas', 'duplicadas')
+
+    def __init__(self, host: str, port: int, database: str, user: str, password: str,
+                 pool: Optional[ConnectionPool] = None):
+        """
+        Inicializa el repositorio con los parámetros de conexión
+
+        Args:
+            host: Host del servidor PostgreSQL
+            port: Puerto del servidor PostgreSQL
+            database: Nombre de la base de datos
+            user: Usuario de la base de datos
+            password: Contraseña del usuario
+            pool: Pool de conexiones compartido (si no se indica se crea uno propio)
+        """
+        self.connection_params = {
+            'host': host,
+            'port': port,
+            'database': database,
+            'user': user,
+            'password': password
+        }
+        self.pool = pool or ConnectionPool(self.connection_params, minconn=0, maxconn=5)
+
+    @contextmanager
+    def _get_connection(self):
+        """Obtiene una conexión del pool y la devuelve al terminar"""
+        with self.pool.connection() as conn:
+            yield conn
+
+    def create(self, nombre_archivo: str, propietario: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Registra un nuevo trabajo de importación en estado pendiente
+
+        Args:
+            nombre_archivo: Nombre del archivo subido
+            propietario: Proceso (host:pid) que procesará el trabajo
+
+        Returns:
+            Diccionario con los datos del trabajo creado
+        """
+        query = """
+        INSERT INTO importacion_jobs (id, nombre_archivo, estado, propietario)
+        VALUES (%s, %s, %s, %s)
+        """
+        job_id = uuid.uuid4().hex
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (job_id, nombre_archivo, self.PENDIENTE, propietario))
+            conn.commit()
+            cursor.close()
+
+        return self.get_by_id(job_id)
+
+    def marcar_procesando(self, job_id: str) -> None:
+        """
+        Marca un trabajo como en proceso
+
+        Args:
+            job_id: ID del trabajo
+        """
+        query = """
+        UPDATE importacion_jobs
+        SET estado = %s, fecha_actualizacion = CURRENT_TIMESTAMP
+        WHERE id = %s
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (self.PROCESANDO, job_id))
+            conn.commit()
+            cursor.close()
+
+    def registrar_progreso(self, job_id: str, contadores: Dict[str, Any],
+                           errores_nuevos: List[str]) -> None:
+        """
+        Guarda los contadores acumulados y agrega los errores nuevos en una sola transacción
+
+        Args:
+            job_id: ID del trabajo
+            contadores: Resultados acumulados (contadores y formatos de fecha detectados)
+            errores_nuevos: Errores producidos desde el último registro
+        """
+        query = """
+        UPDATE importacion_jobs
+        SET total = %(total)s, exitosas = %(exitosas)s, actualizadas = %(actualizadas)s,
+            fallidas = %(fallidas)s, duplicadas = %(duplicadas)s,
+            total_errores = total_errores + %(nuevos)s,
+            formatos_detectados = %(formatos)s,
+            fecha_actualizacion = CURRENT_TIMESTAMP
+        WHERE id = %(id)s
+        RETURNING total_errores
+        """
+        params = {col: contadores.get(col, 0) for col in self.CONTADORES}
+        params.update({
+            'id': job_id,
+            'nuevos': len(errores_nuevos),
+            'formatos': json.dumps(contadores.get('formatos_detectados') or {})
+        })
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+
+            if row and errores_nuevos:
+                # Los errores se numeran en orden de aparición para poder leerlos por tramos
+                inicio = row[0] - len(errores_nuevos)
+                cursor.executemany(
+                    "INSERT INTO importacion_job_errores (job_id, orden, mensaje) VALUES (%s, %s, %s)",
+                    [(job_id, inicio + i, mensaje) for i, mensaje in enumerate(errores_nuevos)]
+                )
+
+            conn.commit()
+            cursor.close()
+
+    def finalizar(self, job_id: str, estado: str, mensaje: Optional[str] = None) -> None:
+        """
+        Cierra un trabajo como completado o fallido
+
+        Args:
+            job_id: ID del trabajo
+            estado: Estado final ('completado' o 'fallido')
+            mensaje: Resumen o motivo del fallo
+        """
+        query = """
+        UPDATE importacion_jobs
+        SET estado = %s, mensaje = %s,
+            fecha_actualizacion = CURRENT_TIMESTAMP, fecha_finalizacion = CURRENT_TIMESTAMP
+        WHERE id = %s
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (estado, mensaje, job_id))
+            conn.commit()
+            cursor.close()
+
+    def get_by_id(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene un trabajo de importación por su ID
+
+        Args:
+            job_id: ID del trabajo
+
+        Returns:
+            Diccionario con estado y contadores, None si no existe
+        """
+        query = """
+        SELECT id, nombre_archivo, estado, total, exitosas, actualizadas, fallidas,
+               duplicadas, total_errores, mensaje, fecha_creacion, fecha_actualizacion,
+               fecha_finalizacion, formatos_detectados
+        FROM importacion_jobs
+        WHERE id = %s
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (job_id,))
+            row = cursor.fetchone()
+            cursor.close()
+
+        if not row:
+            return None
+
+        return {
+            'id': row[0],
+            'nombre_archivo': row[1],
+            'estado': row[2],
+            'total': row[3],
+            'exitosas': row[4],
+            'actualizadas': row[5],
+            'fallidas': row[6],
+            'duplicadas': row[7],
+            'total_errores': row[8],
+            'mensaje': row[9],
+            'fecha_creacion': row[10].isoformat() if row[10] else None,
+            'fecha_actualizacion': row[11].isoformat() if row[11] else None,
+            'fecha_finalizacion': row[12].isoformat() if row[12] else None,
+            'formatos_detectados': json.loads(row[13]) if row[13] else {}
+        }
+
+    def get_errores(self, job_id: str, desde: int = 0, limite: int = 500) -> List[str]:
+        """
+        Obtiene un tramo de los errores de un trabajo en orden de aparición
+
+        Args:
+            job_id: ID del trabajo
+            desde: Posición del primer error a devolver
+            limite: Número máximo de errores
+
+        Returns:
+            Lista de mensajes de error
+        """
+        query = """
+        SELECT mensaje
+        FROM importacion_job_errores
+        WHERE job_id = %s AND orden >= %s
+        ORDER BY orden
+        LIMIT %s
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (job_id, desde, limite))
+            rows = cursor.fetchall()
+            cursor.close()
+
+        return [row[0] for row in rows]
+
+    def renovar(self, propietario: str) -> int:
+        """
+        Renueva el latido (fecha_actualizacion) de los trabajos sin terminar de un proceso
+
+        Args:
+            propietario: Proceso (host:pid) dueño de los trabajos
+
+        Returns:
+            Número de trabajos renovados
+        """
+        query = """
+        UPDATE importacion_jobs
+        SET fecha_actualizacion = CURRENT_TIMESTAMP
+        WHERE propietario = %s AND estado IN (%s, %s)
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (propietario, self.PENDIENTE, self.PROCESANDO))
+            renovados = cursor.rowcount
+            conn.commit()
+            cursor.close()
+
+        return renovados
+
+    def marcar_interrumpidos(self, vencimiento_segundos: int,
+                             propietarios_caidos: Optional[List[str]] = None) -> int:
+        """
+        Marca como fallidos los trabajos sin terminar cuyo proceso ya no existe:
+        los de los propietarios indicados y los que no renuevan su latido desde
+        hace más de vencimiento_segundos. Los trabajos de otros workers en curso
+        no se tocan.
+
+        Args:
+            vencimiento_segundos: Antigüedad máxima del latido de un trabajo vivo
+            propietarios_caidos: Procesos (host:pid) que se sabe que se detuvieron
+
+        Returns:
+            Número de trabajos marcados
+        """
+        query = """
+        UPDATE importacion_jobs
+        SET estado = %s, mensaje = 'Importación interrumpida por reinicio del servidor',
+            fecha_actualizacion = CURRENT_TIMESTAMP, fecha_finalizacion = CURRENT_TIMESTAMP
+        WHERE estado IN (%s, %s)
+          AND (propietario = ANY(%s)
+               OR fecha_actualizacion < CURRENT_TIMESTAMP - make_interval(secs => %s))
+        """
+        params = (self.FALLIDO, self.PENDIENTE, self.PROCESANDO,
+                  list(propietarios_caidos or []), vencimiento_segundos)
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            marcados = cursor.rowcount
+            conn.commit()
+            cursor.close()
+
+        return marcados
@@ -0,0 +1,216 @@
+"""
+Migraciones versionadas del esquema PostgreSQL
+Cada archivo NNNN_nombre.sql de app/migrations se aplica una sola vez, en orden,
+y queda registrado en la tabla schema_version. Se ejecutan al desplegar
+(python -m app.repositories.migrations) o al iniciar la aplicación.
+Los pasos opcionales de app/migrations/repetibles (p. ej. extensiones que el
+usuario de la base de datos quizá no pueda crear) no se registran: se intentan
+en cada ejecución, y si fallan se revierten sin detener el resto.
+"""
+import hashlib
+import os
+import re
+from typing import List, Optional, Tuple
+from app.repositories.connection_pool import ConnectionPool
+
+
+# Directorio con los archivos de migración
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+# Directorio con los pasos opcionales e idempotentes que se aplican en cada ejecución
+REPETIBLES_DIR = os.path.join(MIGRATIONS_DIR, 'repetibles')
+
+# Nombre de archivo de una migración: versión numérica, guion bajo y descripción
+PATRON_MIGRACION = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+
+class MigrationRunner:
+    """
+    Aplica las migraciones pendientes bajo un advisory lock de PostgreSQL, de modo
+    que varios procesos que arrancan a la vez no ejecuten la misma migración dos veces
+    """
+
+    # Clave del advisory lock (cualquier bigint fijo compartido por todos los procesos)
+    LOCK_ID = 4_120_611_018
+
+    def __init__(self, pool: ConnectionPool, directorio: str = MIGRATIONS_DIR,
+                 directorio_repetibles: str = REPETIBLES_DIR):
+        """
+        Inicializa el ejecutor de migraciones
+
+        Args:
+            pool: Pool de conexiones
+            directorio: Carpeta con los archivos NNNN_nombre.sql
+            directorio_repetibles: Carpeta con los pasos opcionales (nombre.sql)
+        """
+        self.pool = pool
+        self.directorio = directorio
+        self.directorio_repetibles = directorio_repetibles
+
+    def migraciones(self) -> List[Tuple[int, str, str]]:
+        """
+        Lista los archivos de migración ordenados por versión
+
+        Returns:
+            Lista de tuplas (versión, nombre, ruta)
+
+        Raises:
+            ValueError: Si dos archivos tienen la misma versión
+        """
+        encontradas = {}
+        for archivo in sorted(os.listdir(self.directorio)):
+            coincidencia = PATRON_MIGRACION.match(archivo)
+            if not coincidencia:
+                continue
+
+            version = int(coincidencia.group(1))
+            if version in encontradas:
+                raise ValueError(f"Versión de migración duplicada: {archivo} y {encontradas[version][1]}")
+            encontradas[version] = (version, coincidencia.group(2), os.path.join(self.directorio, archivo))
+
+        return [encontradas[version] for version in sorted(encontradas)]
+
+    @staticmethod
+    def _checksum(contenido: str) -> str:
+        """Huella del contenido de una migración para detectar cambios posteriores"""
+        return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+    def repetibles(self) -> List[Tuple[str, str]]:
+        """
+        Lista los pasos opcionales ordenados por nombre
+
+        Returns:
+            Lista de tuplas (nombre, ruta)
+        """
+        if not os.path.isdir(self.directorio_repetibles):
+            return []
+        return [
+            (archivo[:-len('.sql')], os.path.join(self.directorio_repetibles, archivo))
+            for archivo in sorted(os.listdir(self.directorio_repetibles)) if archivo.endswith('.sql')
+        ]
+
+    def _aplicar_repetibles(self, conn, cursor) -> List[str]:
+        """
+        Aplica los pasos opcionales, cada uno en su propia transacción.
+        Un paso que falla se revierte con un aviso y no detiene a los demás.
+
+        Returns:
+            Nombres de los pasos aplicados
+        """
+        aplicados = []
+        for nombre, ruta in self.repetibles():
+            with open(ruta, encoding='utf-8') as archivo:
+                contenido = archivo.read()
+            try:
+                cursor.execute(contenido)
+                conn.commit()
+                aplicados.append(nombre)
+            except Exception as e:
+                conn.rollback()
+                print(f"⚠️ Paso opcional {nombre} no aplicado (se reintentará en la próxima ejecución): "
+                      f"{str(e).strip()}")
+        return aplicados
+
+    def migrar(self, hasta: Optional[int] = None) -> List[str]:
+        """
+        Aplica las migraciones pendientes, cada una en su propia transacción.
+        Con todas las versiones al día aplica también los pasos opcionales.
+
+        Args:
+            hasta: Última versión a aplicar (todas si es None)
+
+        Returns:
+            Nombres de las migraciones aplicadas en esta ejecución
+
+        Raises:
+            Exception: Si una migración falla (queda sin registrar y se revierte)
+        """
+        aplicadas = []
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            # Lock de sesión: se mantiene entre las transacciones de cada migración
+            cursor.execute("SELECT pg_advisory_lock(%s)", (self.LOCK_ID,))
+            try:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        nombre TEXT NOT NULL,
+                        checksum TEXT NOT NULL,
+                        aplicada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                cursor.execute("SELECT version, checksum FROM schema_version")
+                registradas = dict(cursor.fetchall())
+                conn.commit()
+
+                for version, nombre, ruta in self.migraciones():
+                    if hasta is not None and version > hasta:
+                        break
+
+                    with open(ruta, encoding='utf-8') as archivo:
+                        contenido = archivo.read()
+                    checksum = self._checksum(contenido)
+
+                    if version in registradas:
+                        if registradas[version] != checksum:
+                            print(f"⚠️ La migración {version:04d}_{nombre} cambió después de aplicarse")
+                        continue
+
+                    try:
+                        cursor.execute(contenido)
+                        cursor.execute(
+                            "INSERT INTO schema_version (version, nombre, checksum) VALUES (%s, %s, %s)",
+                            (version, nombre, checksum)
+                        )
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        print(f"❌ Error aplicando la migración {version:04d}_{nombre}")
+                        raise
+
+                    aplicadas.append(f"{version:04d}_{nombre}")
+                    print(f"✅ Migración aplicada: {version:04d}_{nombre}")
+
+                if hasta is None:
+                    self._aplicar_repetibles(conn, cursor)
+            finally:
+                conn.rollback()
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (self.LOCK_ID,))
+                conn.commit()
+                cursor.close()
+
+        return aplicadas
+
+    def version_actual(self) -> int:
+        """
+        Obtiene la última versión registrada del esquema
+
+        Returns:
+            Versión más alta aplicada (0 si no hay ninguna)
+        """
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+            existe = cursor.fetchone()[0]
+            version = 0
+            if existe:
+                cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+                version = cursor.fetchone()[0]
+            cursor.close()
+
+        return version
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    from app.config.settings import Settings
+
+    load_dotenv()
+    settings = Settings.from_env()
+    pool = ConnectionPool.from_settings(settings)
+    try:
+        aplicadas = MigrationRunner(pool).migrar()
+        print(f"Esquema al día ({len(aplicadas)} migraciones aplicadas)")
+    finally:
+        pool.closeall()
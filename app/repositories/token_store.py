@@ -0,0 +1,229 @@
+"""
+Almacenes de tokens de sesión
+Los tokens emitidos por AuthService se guardan en un almacén intercambiable
+(TOKEN_STORE en la configuración):
+- memoria: diccionario del proceso (un solo worker, desarrollo)
+- postgresql: tabla sesiones, compartida por todos los workers y contenedores
+- redis: cualquier servidor compatible con Redis (Redis, Valkey, KeyDB...)
+Los almacenes compartidos guardan el hash SHA-256 del token, nunca el token.
+"""
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional, Protocol
+from app.repositories.connection_pool import ConnectionPool
+
+
+def hash_token(token: str) -> str:
+    """Hash con el que se identifica un token en los almacenes compartidos"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class ITokenStore(Protocol):
+    """
+    Interfaz de los almacenes de tokens.
+    Los datos de un token son usuario_id, username, rol y expiracion (datetime local).
+    """
+
+    def guardar(self, token: str, datos: Dict[str, Any]) -> None:
+        """Guarda un token con sus datos"""
+        ...
+
+    def obtener(self, token: str) -> Optional[Dict[str, Any]]:
+        """Obtiene los datos de un token (None si no existe o ya venció)"""
+        ...
+
+    def eliminar(self, token: str) -> None:
+        """Elimina un token (logout)"""
+        ...
+
+    def eliminar_expirados(self) -> int:
+        """Elimina los tokens vencidos y devuelve cuántos se eliminaron"""
+        ...
+
+
+class MemoryTokenStore:
+    """
+    Almacén en memoria del proceso: los tokens no sobreviven a un reinicio
+    y cada worker tiene los suyos
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def guardar(self, token: str, datos: Dict[str, Any]) -> None:
+        with self._lock:
+            self._tokens[token] = dict(datos)
+
+    def obtener(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            datos = self._tokens.get(token)
+        if datos is None or datetime.now() > datos['expiracion']:
+            return None
+        return dict(datos)
+
+    def eliminar(self, token: str) -> None:
+        with self._lock:
+            self._tokens.pop(token, None)
+
+    def eliminar_expirados(self) -> int:
+        ahora = datetime.now()
+        with self._lock:
+            expirados = [token for token, datos in self._tokens.items() if datos['expiracion'] < ahora]
+            for token in expirados:
+                del self._tokens[token]
+        return len(expirados)
+
+
+class PostgresTokenStore:
+    """
+    Almacén en la tabla sesiones de PostgreSQL (ver migración 0010_sesiones)
+    """
+
+    def __init__(self, host: str, port: int, database: str, user: str, password: str,
+                 pool: Optional[ConnectionPool] = None):
+        """
+        Inicializa el almacén con los parámetros de conexión
+
+        Args:
+            host: Host del servidor PostgreSQL
+            port: Puerto del servidor PostgreSQL
+            database: Nombre de la base de datos
+            user: Usuario de la base de datos
+            password: Contraseña del usuario
+            pool: Pool de conexiones compartido (si no se indica se crea uno propio)
+        """
+        self.connection_params = {
+            'host': host,
+            'port': port,
+            'database': database,
+            'user': user,
+            'password': password
+        }
+        self.pool = pool or ConnectionPool(self.connection_params, minconn=0, maxconn=5)
+
+    @contextmanager
+    def _get_connection(self):
+        """Obtiene una conexión del pool y la devuelve al terminar"""
+        with self.pool.connection() as conn:
+            yield conn
+
+    def guardar(self, token: str, datos: Dict[str, Any]) -> None:
+        query = """
+        INSERT INTO sesiones (token_hash, usuario_id, username, rol, expiracion)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (token_hash) DO UPDATE SET expiracion = EXCLUDED.expiracion
+        """
+        # La expiración es hora local del proceso: se envía con zona horaria explícita
+        params = (hash_token(token), datos['usuario_id'], datos['username'], datos['rol'],
+                  datos['expiracion'].astimezone())
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            conn.commit()
+            cursor.close()
+
+    def obtener(self, token: str) -> Optional[Dict[str, Any]]:
+        query = """
+        SELECT usuario_id, username, rol, expiracion
+        FROM sesiones
+        WHERE token_hash = %s AND expiracion > CURRENT_TIMESTAMP
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (hash_token(token),))
+            row = cursor.fetchone()
+            cursor.close()
+
+        if not row:
+            return None
+
+        return {
+            'usuario_id': row[0],
+            'username': row[1],
+            'rol': row[2],
+            'expiracion': row[3].astimezone().replace(tzinfo=None)
+        }
+
+    def eliminar(self, token: str) -> None:
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM sesiones WHERE token_hash = %s", (hash_token(token),))
+            conn.commit()
+            cursor.close()
+
+    def eliminar_expirados(self) -> int:
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM sesiones WHERE expiracion <= CURRENT_TIMESTAMP")
+            eliminados = cursor.rowcount
+            conn.commit()
+            cursor.close()
+
+        return eliminados
+
+
+class RedisTokenStore:
+    """
+    Almacén en un servidor compatible con Redis. Cada token es una clave con
+    vencimiento propio, así que el servidor descarta solo los tokens expirados.
+    Acepta cualquier cliente con get/set(ex=)/delete, como redis.Redis o un
+    sustituto local con la misma interfaz.
+    """
+
+    PREFIJO = 'sesion:'
+
+    def __init__(self, cliente: Any):
+        """
+        Args:
+            cliente: Cliente compatible con Redis
+        """
+        self.cliente = cliente
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisTokenStore':
+        """
+        Crea el almacén conectado a la URL indicada (requiere el paquete redis)
+
+        Args:
+            url: URL del servidor (p. ej. redis://localhost:6379/0)
+
+        Raises:
+            ValueError: Si el paquete redis no está instalado
+        """
+        try:
+            import redis
+        except ImportError:
+            raise ValueError('Para TOKEN_STORE=redis se requiere el paquete redis')
+        return cls(redis.Redis.from_url(url))
+
+    def _clave(self, token: str) -> str:
+        return self.PREFIJO + hash_token(token)
+
+    def guardar(self, token: str, datos: Dict[str, Any]) -> None:
+        segundos = int((datos['expiracion'] - datetime.now()).total_seconds())
+        if segundos <= 0:
+            return
+        valor = json.dumps({**datos, 'expiracion': datos['expiracion'].isoformat()})
+        self.cliente.set(self._clave(token), valor, ex=segundos)
+
+    def obtener(self, token: str) -> Optional[Dict[str, Any]]:
+        valor = self.cliente.get(self._clave(token))
+        if valor is None:
+            return None
+        datos = json.loads(valor)
+        datos['expiracion'] = datetime.fromisoformat(datos['expiracion'])
+        if datetime.now() > datos['expiracion']:
+            return None
+        return datos
+
+    def eliminar(self, token: str) -> None:
+        self.cliente.delete(self._clave(token))
+
+    def eliminar_expirados(self) -> int:
+        # El servidor elimina cada clave al vencer su tiempo de vida
+        return 0
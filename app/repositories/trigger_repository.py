@@ -2,18 +2,26 @@
 Repositorio PostgreSQL para gestión de triggers
 """
 import psycopg2
+from contextlib import contextmanager
 import psycopg2.extras
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import json
 
 from app.models.trigger import Trigger, TriggerEjecucion
+from app.repositories.connection_pool import ConnectionPool
+
+
+# Columnas de trigger_ejecuciones en el orden de TriggerEjecucion.to_dict()
+COLUMNAS_EJECUCION = ('id', 'trigger_id', 'trigger_nombre', 'fecha_ejecucion', 'estado',
+                      'notificaciones_enviadas', 'empresas_procesadas', 'error_mensaje', 'detalles')
 
 
 class TriggerRepository:
     """Repositorio para operaciones CRUD de triggers en PostgreSQL"""
     
-    def __init__(self, host: str, port: int, database: str, user: str, password: str):
+    def __init__(self, host: str, port: int, database: str, user: str, password: str,
+                 pool: Optional[ConnectionPool] = None):
         """
         Inicializa el repositorio
         
@@ -23,6 +31,7 @@ class TriggerRepository:
             database: Nombre de la base de datos
             user: Usuario de la base de datos
             password: Contraseña del usuario
+            pool: Pool de conexiones compartido (si no se indica se crea uno propio)
         """
         self.connection_params = {
             'host': host,
@@ -31,67 +40,13 @@ class TriggerRepository:
             'user': user,
             'password': password
         }
-        self._crear_tabla()
+        self.pool = pool or ConnectionPool(self.connection_params, minconn=0, maxconn=5)
     
+    @contextmanager
     def _get_connection(self):
-        """Crea una conexión a la base de datos PostgreSQL"""
-        return psycopg2.connect(**self.connection_params)
-    
-    def _crear_tabla(self):
-        """Crea la tabla de triggers si no existe"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS triggers (
-                id SERIAL PRIMARY KEY,
-                nombre TEXT NOT NULL,
-                descripcion TEXT,
-                frecuencia TEXT NOT NULL DEFAULT 'diaria',
-                hora TEXT NOT NULL DEFAULT '08:00',
-                dias_semana TEXT,
-                dia_mes INTEGER,
-                intervalo_horas INTEGER,
-                destinatarios TEXT NOT NULL,
-                prioridades TEXT NOT NULL DEFAULT 'CRITICA,ALTA,MEDIA',
-                activo INTEGER NOT NULL DEFAULT 1,
-                ultima_ejecucion TEXT,
-                proxima_ejecucion TEXT,
-                creado_en TEXT NOT NULL,
-                actualizado_en TEXT NOT NULL
-            )
-        """)
-        
-        # Crear tabla de historial de ejecuciones
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS trigger_ejecuciones (
-                id SERIAL PRIMARY KEY,
-                trigger_id INTEGER NOT NULL,
-                trigger_nombre TEXT NOT NULL,
-                fecha_ejecucion TEXT NOT NULL,
-                estado TEXT NOT NULL DEFAULT 'exitoso',
-                notificaciones_enviadas INTEGER DEFAULT 0,
-                empresas_procesadas INTEGER DEFAULT 0,
-                error_mensaje TEXT,
-                detalles TEXT,
-                FOREIGN KEY (trigger_id) REFERENCES triggers(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # Crear índices para mejorar consultas
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_trigger_ejecuciones_trigger_id 
-            ON trigger_ejecuciones(trigger_id)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_trigger_ejecuciones_fecha 
-            ON trigger_ejecuciones(fecha_ejecucion DESC)
-        """)
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        """Obtiene una conexión del pool y la devuelve al terminar"""
+        with self.pool.connection() as conn:
+            yield conn
     
     def create(self, trigger: Trigger) -> Trigger:
         """
@@ -103,42 +58,41 @@ class TriggerRepository:
         Returns:
             Trigger con ID asignado
         """
-        now = datetime.now().isoformat()
-        
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO triggers (
-                nombre, descripcion, frecuencia, hora, dias_semana, dia_mes,
-                intervalo_horas, destinatarios, prioridades, activo,
-                ultima_ejecucion, proxima_ejecucion, creado_en, actualizado_en
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """, (
-            trigger.nombre,
-            trigger.descripcion,
-            trigger.frecuencia,
-            trigger.hora,
-            trigger.dias_semana,
-            trigger.dia_mes,
-            trigger.intervalo_horas,
-            trigger.destinatarios,
-            trigger.prioridades,
-            trigger.activo,
-            trigger.ultima_ejecucion,
-            trigger.proxima_ejecucion,
-            now,
-            now
-        ))
-        
-        trigger.id = cursor.fetchone()[0]
-        trigger.creado_en = now
-        trigger.actualizado_en = now
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        now = datetime.now().astimezone()
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute("""
+                INSERT INTO triggers (
+                    nombre, descripcion, frecuencia, hora, dias_semana, dia_mes,
+                    intervalo_horas, destinatarios, prioridades, activo,
+                    ultima_ejecucion, proxima_ejecucion, creado_en, actualizado_en
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (
+                trigger.nombre,
+                trigger.descripcion,
+                trigger.frecuencia,
+                trigger.hora,
+                trigger.dias_semana,
+                trigger.dia_mes,
+                trigger.intervalo_horas,
+                trigger.destinatarios,
+                trigger.prioridades,
+                trigger.activo,
+                trigger.ultima_ejecucion,
+                trigger.proxima_ejecucion,
+                now,
+                now
+            ))
+        
+            trigger.id = cursor.fetchone()[0]
+            trigger.creado_en = now
+            trigger.actualizado_en = now
+        
+            conn.commit()
+            cursor.close()
         
         return trigger
     
@@ -152,14 +106,13 @@ class TriggerRepository:
         Returns:
             Trigger o None si no existe
         """
-        conn = self._get_connection()
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        with self._get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        cursor.execute("SELECT * FROM triggers WHERE id = %s", (trigger_id,))
-        row = cursor.fetchone()
+            cursor.execute("SELECT * FROM triggers WHERE id = %s", (trigger_id,))
+            row = cursor.fetchone()
         
-        cursor.close()
-        conn.close()
+            cursor.close()
         
         if row:
             return Trigger.from_dict(dict(row))
@@ -172,14 +125,13 @@ class TriggerRepository:
         Returns:
             Lista de triggers
         """
-        conn = self._get_connection()
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        with self._get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        cursor.execute("SELECT * FROM triggers ORDER BY creado_en DESC")
-        rows = cursor.fetchall()
+            cursor.execute("SELECT * FROM triggers ORDER BY creado_en DESC")
+            rows = cursor.fetchall()
         
-        cursor.close()
-        conn.close()
+            cursor.close()
         
         return [Trigger.from_dict(dict(row)) for row in rows]
     
@@ -190,14 +142,13 @@ class TriggerRepository:
         Returns:
             Lista de triggers activos
         """
-        conn = self._get_connection()
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        with self._get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        cursor.execute("SELECT * FROM triggers WHERE activo = 1 ORDER BY hora")
-        rows = cursor.fetchall()
+            cursor.execute("SELECT * FROM triggers WHERE activo = 1 ORDER BY hora")
+            rows = cursor.fetchall()
         
-        cursor.close()
-        conn.close()
+            cursor.close()
         
         return [Trigger.from_dict(dict(row)) for row in rows]
     
@@ -211,47 +162,46 @@ class TriggerRepository:
         Returns:
             Trigger actualizado
         """
-        now = datetime.now().isoformat()
-        
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            UPDATE triggers SET
-                nombre = %s,
-                descripcion = %s,
-                frecuencia = %s,
-                hora = %s,
-                dias_semana = %s,
-                dia_mes = %s,
-                intervalo_horas = %s,
-                destinatarios = %s,
-                prioridades = %s,
-                activo = %s,
-                ultima_ejecucion = %s,
-                proxima_ejecucion = %s,
-                actualizado_en = %s
-            WHERE id = %s
-        """, (
-            trigger.nombre,
-            trigger.descripcion,
-            trigger.frecuencia,
-            trigger.hora,
-            trigger.dias_semana,
-            trigger.dia_mes,
-            trigger.intervalo_horas,
-            trigger.destinatarios,
-            trigger.prioridades,
-            trigger.activo,
-            trigger.ultima_ejecucion,
-            trigger.proxima_ejecucion,
-            now,
-            trigger.id
-        ))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        now = datetime.now().astimezone()
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute("""
+                UPDATE triggers SET
+                    nombre = %s,
+                    descripcion = %s,
+                    frecuencia = %s,
+                    hora = %s,
+                    dias_semana = %s,
+                    dia_mes = %s,
+                    intervalo_horas = %s,
+                    destinatarios = %s,
+                    prioridades = %s,
+                    activo = %s,
+                    ultima_ejecucion = %s,
+                    proxima_ejecucion = %s,
+                    actualizado_en = %s
+                WHERE id = %s
+            """, (
+                trigger.nombre,
+                trigger.descripcion,
+                trigger.frecuencia,
+                trigger.hora,
+                trigger.dias_semana,
+                trigger.dia_mes,
+                trigger.intervalo_horas,
+                trigger.destinatarios,
+                trigger.prioridades,
+                trigger.activo,
+                trigger.ultima_ejecucion,
+                trigger.proxima_ejecucion,
+                now,
+                trigger.id
+            ))
+        
+            conn.commit()
+            cursor.close()
         
         trigger.actualizado_en = now
         return trigger
@@ -266,19 +216,43 @@ class TriggerRepository:
         Returns:
             True si se eliminó correctamente
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("DELETE FROM triggers WHERE id = %s", (trigger_id,))
-        success = cursor.rowcount > 0
+            cursor.execute("DELETE FROM triggers WHERE id = %s", (trigger_id,))
+            success = cursor.rowcount > 0
         
-        conn.commit()
-        cursor.close()
-        conn.close()
+            conn.commit()
+            cursor.close()
         
         return success
     
-    def actualizar_ejecucion(self, trigger_id: int, proxima_ejecucion: Optional[str] = None) -> bool:
+    def get_pendientes(self, ahora: Optional[datetime] = None) -> List[Trigger]:
+        """
+        Obtiene los triggers activos cuya próxima ejecución ya llegó
+        (usa el índice parcial idx_triggers_proxima_ejecucion)
+        
+        Args:
+            ahora: Momento de referencia (por defecto ahora)
+            
+        Returns:
+            Lista de triggers pendientes ordenados por próxima ejecución
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        
+            cursor.execute("""
+                SELECT * FROM triggers
+                WHERE activo = 1 AND proxima_ejecucion <= %s
+                ORDER BY proxima_ejecucion
+            """, (ahora or datetime.now().astimezone(),))
+            rows = cursor.fetchall()
+        
+            cursor.close()
+        
+        return [Trigger.from_dict(dict(row)) for row in rows]
+    
+    def actualizar_ejecucion(self, trigger_id: int, proxima_ejecucion: Optional[datetime] = None) -> bool:
         """
         Actualiza las fechas de ejecución de un trigger
         
@@ -289,23 +263,22 @@ class TriggerRepository:
         Returns:
             True si se actualizó correctamente
         """
-        now = datetime.now().isoformat()
+        now = datetime.now().astimezone()
         
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            UPDATE triggers SET
-                ultima_ejecucion = %s,
-                proxima_ejecucion = %s,
-                actualizado_en = %s
-            WHERE id = %s
-        """, (now, proxima_ejecucion, now, trigger_id))
+            cursor.execute("""
+                UPDATE triggers SET
+                    ultima_ejecucion = %s,
+                    proxima_ejecucion = %s,
+                    actualizado_en = %s
+                WHERE id = %s
+            """, (now, proxima_ejecucion, now, trigger_id))
         
-        success = cursor.rowcount > 0
-        conn.commit()
-        cursor.close()
-        conn.close()
+            success = cursor.rowcount > 0
+            conn.commit()
+            cursor.close()
         
         return success
     
@@ -321,34 +294,33 @@ class TriggerRepository:
         Returns:
             TriggerEjecucion con ID asignado
         """
-        fecha = ejecucion.fecha_ejecucion or datetime.now().isoformat()
-        
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO trigger_ejecuciones (
-                trigger_id, trigger_nombre, fecha_ejecucion, estado,
-                notificaciones_enviadas, empresas_procesadas, error_mensaje, detalles
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """, (
-            ejecucion.trigger_id,
-            ejecucion.trigger_nombre,
-            fecha,
-            ejecucion.estado,
-            ejecucion.notificaciones_enviadas,
-            ejecucion.empresas_procesadas,
-            ejecucion.error_mensaje,
-            ejecucion.detalles
-        ))
-        
-        ejecucion.id = cursor.fetchone()[0]
-        ejecucion.fecha_ejecucion = fecha
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        fecha = ejecucion.fecha_ejecucion or datetime.now().astimezone()
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute("""
+                INSERT INTO trigger_ejecuciones (
+                    trigger_id, trigger_nombre, fecha_ejecucion, estado,
+                    notificaciones_enviadas, empresas_procesadas, error_mensaje, detalles
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (
+                ejecucion.trigger_id,
+                ejecucion.trigger_nombre,
+                fecha,
+                ejecucion.estado,
+                ejecucion.notificaciones_enviadas,
+                ejecucion.empresas_procesadas,
+                ejecucion.error_mensaje,
+                ejecucion.detalles
+            ))
+        
+            ejecucion.id = cursor.fetchone()[0]
+            ejecucion.fecha_ejecucion = fecha
+        
+            conn.commit()
+            cursor.close()
         
         return ejecucion
     
@@ -363,19 +335,18 @@ class TriggerRepository:
         Returns:
             Lista de ejecuciones ordenadas por fecha descendente
         """
-        conn = self._get_connection()
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        with self._get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        cursor.execute("""
-            SELECT * FROM trigger_ejecuciones 
-            WHERE trigger_id = %s 
-            ORDER BY fecha_ejecucion DESC 
-            LIMIT %s
-        """, (trigger_id, limit))
-        rows = cursor.fetchall()
+            cursor.execute("""
+                SELECT * FROM trigger_ejecuciones 
+                WHERE trigger_id = %s 
+                ORDER BY fecha_ejecucion DESC 
+                LIMIT %s
+            """, (trigger_id, limit))
+            rows = cursor.fetchall()
         
-        cursor.close()
-        conn.close()
+            cursor.close()
         
         return [TriggerEjecucion.from_dict(dict(row)) for row in rows]
     
@@ -389,21 +360,55 @@ class TriggerRepository:
         Returns:
             Lista de ejecuciones ordenadas por fecha descendente
         """
-        conn = self._get_connection()
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        with self._get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        cursor.execute("""
-            SELECT * FROM trigger_ejecuciones 
-            ORDER BY fecha_ejecucion DESC 
-            LIMIT %s
-        """, (limit,))
-        rows = cursor.fetchall()
+            cursor.execute("""
+                SELECT * FROM trigger_ejecuciones 
+                ORDER BY fecha_ejecucion DESC 
+                LIMIT %s
+            """, (limit,))
+            rows = cursor.fetchall()
         
-        cursor.close()
-        conn.close()
+            cursor.close()
         
         return [TriggerEjecucion.from_dict(dict(row)) for row in rows]
     
+    def get_ejecuciones_dicts(self, trigger_id: Optional[int] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Obtiene el historial de ejecuciones ya serializado (forma de TriggerEjecucion.to_dict()),
+        convirtiendo las filas del cursor sin crear objetos intermedios
+        
+        Args:
+            trigger_id: ID del trigger (None para las ejecuciones de todos los triggers)
+            limit: Número máximo de registros a retornar
+            
+        Returns:
+            Lista de ejecuciones ordenadas por fecha descendente
+        """
+        filtro = 'WHERE trigger_id = %(trigger_id)s' if trigger_id is not None else ''
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+        
+            cursor.execute(f"""
+                SELECT {', '.join(COLUMNAS_EJECUCION)} FROM trigger_ejecuciones
+                {filtro}
+                ORDER BY fecha_ejecucion DESC
+                LIMIT %(limit)s
+            """, {'trigger_id': trigger_id, 'limit': limit})
+            rows = cursor.fetchall()
+        
+            cursor.close()
+        
+        ejecuciones = []
+        for row in rows:
+            ejecucion = dict(zip(COLUMNAS_EJECUCION, row))
+            fecha = ejecucion['fecha_ejecucion']
+            ejecucion['fecha_ejecucion'] = fecha.isoformat() if fecha else None
+            ejecuciones.append(ejecucion)
+        return ejecuciones
+    
     def get_estadisticas_trigger(self, trigger_id: int) -> Dict[str, Any]:
         """
         Obtiene estadísticas de ejecución de un trigger
@@ -414,26 +419,25 @@ class TriggerRepository:
         Returns:
             Diccionario con estadísticas
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Total de ejecuciones
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_ejecuciones,
-                SUM(CASE WHEN estado = 'exitoso' THEN 1 ELSE 0 END) as exitosas,
-                SUM(CASE WHEN estado = 'fallido' THEN 1 ELSE 0 END) as fallidas,
-                SUM(notificaciones_enviadas) as total_notificaciones,
-                SUM(empresas_procesadas) as total_empresas,
-                MAX(fecha_ejecucion) as ultima_ejecucion
-            FROM trigger_ejecuciones
-            WHERE trigger_id = %s
-        """, (trigger_id,))
-        
-        row = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+        
+            # Total de ejecuciones
+            cursor.execute("""
+                SELECT 
+                    COUNT(*) as total_ejecuciones,
+                    SUM(CASE WHEN estado = 'exitoso' THEN 1 ELSE 0 END) as exitosas,
+                    SUM(CASE WHEN estado = 'fallido' THEN 1 ELSE 0 END) as fallidas,
+                    SUM(notificaciones_enviadas) as total_notificaciones,
+                    SUM(empresas_procesadas) as total_empresas,
+                    MAX(fecha_ejecucion) as ultima_ejecucion
+                FROM trigger_ejecuciones
+                WHERE trigger_id = %s
+            """, (trigger_id,))
+        
+            row = cursor.fetchone()
+        
+            cursor.close()
         
         return {
             'total_ejecuciones': row[0] or 0,
@@ -441,7 +445,7 @@ class TriggerRepository:
             'fallidas': row[2] or 0,
             'total_notificaciones': row[3] or 0,
             'total_empresas': row[4] or 0,
-            'ultima_ejecucion': row[5],
+            'ultima_ejecucion': row[5].isoformat() if row[5] else None,
             'tasa_exito': round((row[1] or 0) / (row[0] or 1) * 100, 2)
         }
     
@@ -455,19 +459,18 @@ class TriggerRepository:
         Returns:
             Número de registros eliminados
         """
-        fecha_limite = (datetime.now() - timedelta(days=dias)).isoformat()
+        fecha_limite = datetime.now().astimezone() - timedelta(days=dias)
         
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
         
-        cursor.execute("""
-            DELETE FROM trigger_ejecuciones 
-            WHERE fecha_ejecucion < %s
-        """, (fecha_limite,))
+            cursor.execute("""
+                DELETE FROM trigger_ejecuciones 
+                WHERE fecha_ejecucion < %s
+            """, (fecha_limite,))
         
-        deleted_count = cursor.rowcount
-        conn.commit()
-        cursor.close()
-        conn.close()
+            deleted_count = cursor.rowcount
+            conn.commit()
+            cursor.close()
         
         return deleted_count
@@ -2,9 +2,11 @@
 Repositorio PostgreSQL para la gestión de usuarios
 """
 import psycopg2
+from contextlib import contextmanager
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from app.models.usuario import Usuario
+from app.repositories.connection_pool import ConnectionPool
 
 
 class UsuarioRepository:
@@ -12,7 +14,8 @@ class UsuarioRepository:
     Repositorio que maneja la persistencia de usuarios en PostgreSQL
     """
 
-    def __init__(self, host: str, port: int, database: str, user: str, password: str):
+    def __init__(self, host: str, port: int, database: str, user: str, password: str,
+                 pool: Optional[ConnectionPool] = None):
         """
         Inicializa el repositorio con los parámetros de conexión
         
@@ -22,6 +25,7 @@ class UsuarioRepository:
             database: Nombre de la base de datos
             user: Usuario de la base de datos
             password: Contraseña del usuario
+            pool: Pool de conexiones compartido (si no se indica se crea uno propio)
         """
         self.connection_params = {
             'host': host,
@@ -30,38 +34,19 @@ class UsuarioRepository:
             'user': user,
             'password': password
         }
-        self._crear_tabla()
-        self._crear_usuario_admin_default()
+        self.pool = pool or ConnectionPool(self.connection_params, minconn=0, maxconn=5)
 
+    @contextmanager
     def _get_connection(self):
-        """Crea una conexión a la base de datos PostgreSQL"""
-        return psycopg2.connect(**self.connection_params)
+        """Obtiene una conexión del pool y la devuelve al terminar"""
+        with self.pool.connection() as conn:
+            yield conn
 
-    def _crear_tabla(self):
-        """Crea la tabla de usuarios si no existe"""
-        query = """
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id SERIAL PRIMARY KEY,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            nombre TEXT NOT NULL,
-            email TEXT NOT NULL,
-            rol TEXT DEFAULT 'usuario',
-            activo INTEGER DEFAULT 1,
-            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            ultimo_acceso TIMESTAMP
-        )
+    def crear_usuario_admin_default(self):
+        """
+        Crea el usuario admin por defecto si no existe.
+        Se llama una vez al iniciar la aplicación, después de las migraciones.
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute(query)
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-    def _crear_usuario_admin_default(self):
-        """Crea el usuario admin por defecto si no existe"""
         from app.services.auth_service import AuthService
         from app.config.settings import Settings
         
@@ -102,21 +87,20 @@ class UsuarioRepository:
         """
         
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                query,
-                (usuario.username, usuario.password_hash, usuario.nombre, 
-                 usuario.email, usuario.rol, usuario.activo)
-            )
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    query,
+                    (usuario.username, usuario.password_hash, usuario.nombre, 
+                     usuario.email, usuario.rol, usuario.activo)
+                )
             
-            result = cursor.fetchone()
-            usuario.id = result[0]
-            usuario.fecha_creacion = result[1]
+                result = cursor.fetchone()
+                usuario.id = result[0]
+                usuario.fecha_creacion = result[1]
             
-            conn.commit()
-            cursor.close()
-            conn.close()
+                conn.commit()
+                cursor.close()
             
             return {
                 'success': True,
@@ -145,12 +129,11 @@ class UsuarioRepository:
         """
         query = "SELECT * FROM usuarios WHERE username = %s"
         
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, (username,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (username,))
+            row = cursor.fetchone()
+            cursor.close()
         
         if not row:
             return None
@@ -180,12 +163,11 @@ class UsuarioRepository:
         """
         query = "SELECT * FROM usuarios WHERE id = %s"
         
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, (user_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (user_id,))
+            row = cursor.fetchone()
+            cursor.close()
         
         if not row:
             return None
@@ -212,12 +194,11 @@ class UsuarioRepository:
         """
         query = "SELECT * FROM usuarios ORDER BY username"
         
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            rows = cursor.fetchall()
+            cursor.close()
         
         usuarios = []
         for row in rows:
@@ -254,16 +235,15 @@ class UsuarioRepository:
         """
         
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                query,
-                (usuario.nombre, usuario.email, usuario.rol, 
-                 usuario.activo, usuario.id)
-            )
-            conn.commit()
-            cursor.close()
-            conn.close()
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    query,
+                    (usuario.nombre, usuario.email, usuario.rol, 
+                     usuario.activo, usuario.id)
+                )
+                conn.commit()
+                cursor.close()
             
             return {
                 'success': True,
@@ -293,12 +273,11 @@ class UsuarioRepository:
         """
         
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, (new_password_hash, user_id))
-            conn.commit()
-            cursor.close()
-            conn.close()
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (new_password_hash, user_id))
+                conn.commit()
+                cursor.close()
             
             return {
                 'success': True,
@@ -319,12 +298,11 @@ class UsuarioRepository:
         """
         query = "UPDATE usuarios SET ultimo_acceso = CURRENT_TIMESTAMP WHERE id = %s"
         
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, (user_id,))
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (user_id,))
+            conn.commit()
+            cursor.close()
 
     def delete(self, user_id: int) -> Dict[str, Any]:
         """
@@ -339,12 +317,11 @@ class UsuarioRepository:
         query = "DELETE FROM usuarios WHERE id = %s"
         
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, (user_id,))
-            conn.commit()
-            cursor.close()
-            conn.close()
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (user_id,))
+                conn.commit()
+                cursor.close()
             
             return {
                 'success': True,
@@ -0,0 +1,67 @@
+"""
+Repositorio PostgreSQL para las versiones de los conjuntos de datos (tabla datos_version)
+Cada conjunto ('empresas', 'triggers') tiene un contador que los triggers de la
+base de datos incrementan con cada escritura; la API lo usa como ETag.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from app.repositories.connection_pool import ConnectionPool
+
+
+class VersionRepository:
+    """
+    Repositorio de solo lectura de las versiones de los datos
+    """
+
+    def __init__(self, host: str, port: int, database: str, user: str, password: str,
+                 pool: Optional[ConnectionPool] = None):
+        """
+        Inicializa el repositorio con los parámetros de conexión
+
+        Args:
+            host: Host del servidor PostgreSQL
+            port: Puerto del servidor PostgreSQL
+            database: Nombre de la base de datos
+            user: Usuario de la base de datos
+            password: Contraseña del usuario
+            pool: Pool de conexiones compartido (si no se indica se crea uno propio)
+        """
+        self.connection_params = {
+            'host': host,
+            'port': port,
+            'database': database,
+            'user': user,
+            'password': password
+        }
+        self.pool = pool or ConnectionPool(self.connection_params, minconn=0, maxconn=5)
+
+    @contextmanager
+    def _get_connection(self):
+        """Obtiene una conexión del pool y la devuelve al terminar"""
+        with self.pool.connection() as conn:
+            yield conn
+
+    def get_versiones(self, claves: Iterable[str]) -> Dict[str, Tuple[int, Optional[datetime]]]:
+        """
+        Obtiene la versión actual de varios conjuntos de datos en una sola consulta
+
+        Args:
+            claves: Conjuntos de datos ('empresas', 'triggers')
+
+        Returns:
+            Diccionario clave -> (versión, fecha de la última escritura).
+            Las claves sin registrar se devuelven con versión 0 y sin fecha.
+        """
+        claves = list(claves)
+        query = "SELECT clave, version, actualizado_en FROM datos_version WHERE clave = ANY(%s)"
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (claves,))
+            rows = cursor.fetchall()
+            cursor.close()
+
+        versiones = {clave: (0, None) for clave in claves}
+        versiones.update({clave: (version, actualizado_en) for clave, version, actualizado_en in rows})
+        return versiones
@@ -0,0 +1,43 @@
+"""
+Contrapartes asíncronas de los servicios
+Permite que las rutas async de FastAPI esperen la lógica de negocio sin bloquear el event loop
+"""
+from typing import Any, Optional
+
+from app.repositories.async_repository import DatabaseExecutor
+
+
+class AsyncService:
+    """
+    Envuelve un servicio síncrono y expone sus métodos públicos como corrutinas.
+
+    Cada llamada se ejecuta en el ejecutor de base de datos, de modo que una
+    consulta lenta solo ocupa un hilo y no detiene el resto de peticiones.
+    Sin ejecutor (modo 'sync') los métodos se ejecutan directamente.
+    Los atributos que no son métodos (p. ej. ``repository``) se devuelven sin cambios.
+    """
+
+    def __init__(self, service: Any, executor: Optional[DatabaseExecutor] = None):
+        """
+        Inicializa la contraparte asíncrona
+
+        Args:
+            service: Servicio síncrono
+            executor: Ejecutor de base de datos (None para ejecutar en línea)
+        """
+        self.service = service
+        self.executor = executor
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.service, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        async def wrapper(*args, **kwargs):
+            if self.executor is None:
+                return attr(*args, **kwargs)
+            return await self.executor.run(attr, *args, **kwargs)
+
+        wrapper.__name__ = name
+        wrapper.__doc__ = attr.__doc__
+        return wrapper
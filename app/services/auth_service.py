@@ -6,25 +6,35 @@ import secrets
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 from app.repositories.usuario_repository import UsuarioRepository
+from app.repositories.cached_repository import TTLCache
+from app.repositories.token_store import ITokenStore, MemoryTokenStore
 from app.models.usuario import Usuario
 
 
 class AuthService:
     """
-    Servicio que maneja autenticación y tokens
+    Servicio que maneja autenticación y tokens.
+    Los tokens viven en un almacén intercambiable (memoria, PostgreSQL o Redis) que
+    pueden compartir varios workers; cada worker reutiliza durante unos segundos
+    el resultado de validar un token para no consultar el almacén en cada petición.
     """
     
-    # Tokens en memoria (en producción usar Redis o base de datos)
-    _tokens: Dict[str, Dict[str, Any]] = {}
+    # Máximo de validaciones recordadas por worker
+    MAX_VALIDACIONES_CACHE = 4096
     
-    def __init__(self, repository: UsuarioRepository):
+    def __init__(self, repository: UsuarioRepository, token_store: Optional[ITokenStore] = None,
+                 cache_ttl: float = 10.0):
         """
         Inicializa el servicio con un repositorio
         
         Args:
             repository: Repositorio de usuarios
+            token_store: Almacén de tokens (por defecto en memoria del proceso)
+            cache_ttl: Segundos que se reutiliza la validación de un token (0 la desactiva)
         """
         self.repository = repository
+        self.token_store = token_store or MemoryTokenStore()
+        self._validaciones = TTLCache(ttl=cache_ttl, max_size=self.MAX_VALIDACIONES_CACHE)
 
     @staticmethod
     def hash_password(password: str) -> str:
@@ -92,12 +102,12 @@ class AuthService:
             expiracion = datetime.now() + timedelta(hours=24)
             
             # Guardar token
-            self._tokens[token] = {
+            self.token_store.guardar(token, {
                 'usuario_id': usuario.id,
                 'username': usuario.username,
                 'rol': usuario.rol,
                 'expiracion': expiracion
-            }
+            })
             
             # Actualizar último acceso
             self.repository.update_ultimo_acceso(usuario.id)
@@ -125,8 +135,11 @@ class AuthService:
         Returns:
             Diccionario con success
         """
-        if token in self._tokens:
-            del self._tokens[token]
+        self.token_store.eliminar(token)
+        
+        # Las validaciones recordadas de este worker se descartan; los demás workers
+        # dejan de aceptar el token cuando vence su caché (TOKEN_CACHE_SECONDS)
+        self._validaciones.invalidate()
         
         return {'success': True}
 
@@ -140,16 +153,27 @@ class AuthService:
         Returns:
             Datos del token o None si es inválido
         """
-        if token not in self._tokens:
-            return None
-        
-        datos_token = self._tokens[token]
+        datos_token = self._validaciones.get_or_load((token,), lambda: self.token_store.obtener(token))
+        return self._vigente(datos_token)
+
+    def validar_token_local(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Valida un token solo con las validaciones recordadas por este worker,
+        sin consultar el almacén (no bloquea: se puede llamar desde el event loop)
         
-        # Verificar expiración
-        if datetime.now() > datos_token['expiracion']:
-            del self._tokens[token]
+        Args:
+            token: Token a validar
+            
+        Returns:
+            Datos del token o None si no está en caché o es inválido
+        """
+        return self._vigente(self._validaciones.get((token,)))
+
+    @staticmethod
+    def _vigente(datos_token: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Descarta los datos de un token que venció mientras estaba en caché"""
+        if not datos_token or datetime.now() > datos_token['expiracion']:
             return None
-        
         return datos_token
 
     def validar_rol(self, token: str, roles_permitidos: list) -> bool:
@@ -227,13 +251,11 @@ class AuthService:
                 'error': str(e)
             }
 
-    def limpiar_tokens_expirados(self):
-        """Elimina tokens expirados de la memoria"""
-        ahora = datetime.now()
-        tokens_expirados = [
-            token for token, datos in self._tokens.items()
-            if datos['expiracion'] < ahora
-        ]
-        
-        for token in tokens_expirados:
-            del self._tokens[token]
+    def limpiar_tokens_expirados(self) -> int:
+        """
+        Elimina los tokens expirados del almacén (lo ejecuta periódicamente el scheduler)
+        
+        Returns:
+            Número de tokens eliminados
+        """
+        return self.token_store.eliminar_expirados()
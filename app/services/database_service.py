@@ -1,17 +1,80 @@
 """
 Servicio para operaciones de base de datos y consultas SQL
 """
+import json
 import psycopg2
 import psycopg2.extras
-from typing import List, Dict, Any, Optional
+from psycopg2 import sql
+from typing import List, Dict, Any, Optional, Iterator
 from contextlib import contextmanager
 from app.config.settings import Settings
+from app.repositories.connection_pool import ConnectionPool
+
+
+# Metadatos de todas las tablas en una sola consulta al catálogo: filas estimadas
+# (estadísticas, sin recorrer la tabla), tamaños y columnas desde pg_attribute
+TABLAS_CATALOGO_SQL = """
+    SELECT c.relname AS name,
+        COALESCE(s.n_live_tup, GREATEST(c.reltuples, 0))::bigint AS count,
+        pg_table_size(c.oid) AS table_bytes,
+        pg_indexes_size(c.oid) AS index_bytes,
+        pg_total_relation_size(c.oid) AS total_bytes,
+        pg_size_pretty(pg_total_relation_size(c.oid)) AS total_size,
+        GREATEST(s.last_analyze, s.last_autoanalyze) AS last_analyze,
+        COALESCE(col.schema, '[]'::json) AS schema
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+            'column_name', a.attname,
+            'data_type', format_type(a.atttypid, a.atttypmod),
+            'is_nullable', CASE WHEN a.attnotnull THEN 'NO' ELSE 'YES' END,
+            'column_default', pg_get_expr(d.adbin, d.adrelid)
+        ) ORDER BY a.attnum) AS schema
+        FROM pg_attribute a
+        LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+        WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    ) col ON true
+    WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+    {filtro}
+    ORDER BY c.relname
+"""
 
 
 class DatabaseService:
-    """Servicio para ejecutar consultas SQL de lectura en PostgreSQL"""
+    """
+    Servicio para ejecutar consultas SQL de lectura en PostgreSQL.
+    Las lecturas grandes usan cursores con nombre (del lado del servidor) y se
+    entregan como NDJSON, de modo que el proceso solo retiene itersize filas.
+    Las consultas de la consola corren en una transacción de solo lectura con
+    statement_timeout y devuelven como máximo max_rows filas.
+    """
+    
+    # Filas que se traen del servidor en cada viaje del cursor con nombre
+    ITERSIZE = 2000
     
-    def __init__(self, host: str, port: int, database: str, user: str, password: str):
+    # Máximo de filas de la vista previa JSON (para más filas se usa el stream)
+    MAX_PREVIEW = 1000
+    
+    def __init__(self, host: str, port: int, database: str, user: str, password: str,
+                 pool: Optional[ConnectionPool] = None, statement_timeout_ms: int = 15000,
+                 max_rows: int = 10000):
+        """
+        Inicializa el servicio
+        
+        Args:
+            host: Host del servidor PostgreSQL
+            port: Puerto del servidor PostgreSQL
+            database: Nombre de la base de datos
+            user: Usuario de la base de datos
+            password: Contraseña del usuario
+            pool: Pool de conexiones compartido (si no se indica se crea uno propio)
+            statement_timeout_ms: Tiempo máximo por sentencia de la consola (0 sin límite)
+            max_rows: Filas devueltas como máximo por una consulta de la consola
+        """
+        self.statement_timeout_ms = statement_timeout_ms
+        self.max_rows = max_rows
         self.connection_params = {
             'host': host,
             'port': port,
@@ -19,124 +82,364 @@ class DatabaseService:
             'user': user,
             'password': password
         }
+        self.pool = pool or ConnectionPool(self.connection_params, minconn=0, maxconn=2)
     
     @contextmanager
     def get_connection(self):
-        """Context manager para conexiones a la base de datos"""
-        conn = psycopg2.connect(**self.connection_params)
-        try:
+        """Context manager para conexiones del pool"""
+        with self.pool.connection() as conn:
             yield conn
-        finally:
-            conn.close()
     
-    def execute_query(self, query: str) -> List[Dict[str, Any]]:
+    def _validar_select(self, query: str) -> str:
         """
-        Ejecuta una consulta SELECT de solo lectura
+        Verifica que la consulta sea un único SELECT sin palabras que modifiquen datos
         
         Args:
-            query: Consulta SQL (solo SELECT permitido)
+            query: Consulta SQL
             
         Returns:
-            Lista de resultados como diccionarios
+            Consulta sin espacios ni punto y coma final, lista para ejecutar
             
         Raises:
-            ValueError: Si la consulta no es un SELECT
-            Exception: Si hay error en la consulta
+            ValueError: Si la consulta no es un SELECT o contiene varias sentencias
         """
         # Validar que solo sean consultas SELECT
-        query_upper = query.strip().upper()
+        query = query.strip()
+        if query.endswith(';'):
+            query = query[:-1].rstrip()
+        query_upper = query.upper()
         if not query_upper.startswith('SELECT'):
             raise ValueError("Solo se permiten consultas SELECT")
         
+        # Una sola sentencia: con "SELECT 1; COMMIT; ..." las siguientes se ejecutarían
+        # fuera de la transacción de solo lectura y sin statement_timeout
+        if ';' in query:
+            raise ValueError("Solo se permite una sentencia por consulta")
+        
         # Palabras prohibidas que podrían modificar datos
         forbidden_words = ['INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER', 'TRUNCATE']
         for word in forbidden_words:
             if word in query_upper:
                 raise ValueError(f"Palabra prohibida encontrada: {word}")
         
+        return query
+    
+    def _iniciar_consola(self, conn) -> None:
+        """
+        Prepara la transacción de una consulta de la consola: solo lectura y con
+        statement_timeout local (ambos se descartan al cerrar la transacción)
+        
+        Args:
+            conn: Conexión sin sentencias ejecutadas en la transacción actual
+        """
+        cursor = conn.cursor()
+        cursor.execute("SET TRANSACTION READ ONLY")
+        cursor.execute("SELECT set_config('statement_timeout', %s, true)",
+                       (str(self.statement_timeout_ms),))
+        cursor.close()
+    
+    def execute_query(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Ejecuta una consulta SELECT de solo lectura (con statement_timeout y
+        como máximo max_rows filas)
+        
+        Args:
+            query: Consulta SQL (solo SELECT permitido)
+            
+        Returns:
+            Lista de resultados como diccionarios
+            
+        Raises:
+            ValueError: Si la consulta no es un único SELECT
+            Exception: Si hay error en la consulta
+        """
+        query = self._validar_select(query)
+        
         with self.get_connection() as conn:
+            self._iniciar_consola(conn)
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
             cursor.execute(query)
             
             # Convertir resultados a lista de diccionarios
-            results = [dict(row) for row in cursor.fetchall()]
+            results = [dict(row) for row in cursor.fetchmany(self.max_rows)]
+            cursor.close()
+            conn.rollback()
             
             return results
     
+    def stream_query(self, query: str) -> Iterator[bytes]:
+        """
+        Ejecuta una consulta SELECT y entrega el resultado como NDJSON.
+        La validación ocurre antes de devolver el generador, así un error de
+        validación se puede responder con 400.
+        Se aplican las protecciones de la consola: solo lectura, statement_timeout
+        y como máximo max_rows filas (la línea final lleva "truncado" si se cortó).
+        
+        Args:
+            query: Consulta SQL (solo SELECT permitido)
+            
+        Returns:
+            Generador de líneas NDJSON (ver _stream_ndjson)
+            
+        Raises:
+            ValueError: Si la consulta no es un único SELECT
+        """
+        query = self._validar_select(query)
+        return self._stream_ndjson(query, consola=True)
+    
+    def explain_query(self, query: str) -> Dict[str, Any]:
+        """
+        Ejecuta EXPLAIN (ANALYZE, BUFFERS) sobre una consulta SELECT para obtener
+        el plan y los tiempos reales. ANALYZE ejecuta la consulta, por eso corre con
+        las mismas protecciones de la consola y se revierte al terminar.
+        
+        Args:
+            query: Consulta SQL (solo SELECT permitido)
+            
+        Returns:
+            Diccionario con plan (árbol de nodos), planning_time_ms y execution_time_ms
+            
+        Raises:
+            ValueError: Si la consulta no es un único SELECT o PostgreSQL la rechaza
+        """
+        query = self._validar_select(query)
+        
+        with self.get_connection() as conn:
+            try:
+                self._iniciar_consola(conn)
+                cursor = conn.cursor()
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query)
+                salida = cursor.fetchone()[0]
+                cursor.close()
+            except psycopg2.Error as e:
+                raise ValueError(str(e).strip())
+            finally:
+                conn.rollback()
+        
+        if isinstance(salida, str):
+            salida = json.loads(salida)
+        resultado = salida[0]
+        
+        return {
+            'plan': resultado['Plan'],
+            'planning_time_ms': resultado.get('Planning Time'),
+            'execution_time_ms': resultado.get('Execution Time'),
+            'statement_timeout_ms': self.statement_timeout_ms
+        }
+    
+    def stream_table(self, table_name: str, offset: int = 0,
+                     limit: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Entrega las filas de una tabla como NDJSON, opcionalmente por páginas
+        
+        Args:
+            table_name: Nombre de la tabla
+            offset: Filas a omitir desde el inicio
+            limit: Número máximo de filas (todas si es None)
+            
+        Returns:
+            Generador de líneas NDJSON (ver _stream_ndjson)
+            
+        Raises:
+            ValueError: Si la tabla no existe
+        """
+        query = self._select_tabla(table_name, offset, limit)
+        return self._stream_ndjson(query, {'offset': offset, 'limit': limit})
+    
+    def _select_tabla(self, table_name: str, offset: int = 0, limit: Optional[int] = None) -> sql.Composed:
+        """
+        Arma el SELECT de una tabla con el nombre escapado como identificador
+        
+        Args:
+            table_name: Nombre de la tabla (debe existir en el esquema public)
+            offset: Filas a omitir
+            limit: Número máximo de filas (None sin límite)
+            
+        Returns:
+            Consulta compuesta con parámetros %(offset)s y %(limit)s
+            
+        Raises:
+            ValueError: Si la tabla no existe
+        """
+        if table_name not in self.get_tables():
+            raise ValueError(f"La tabla '{table_name}' no existe")
+        
+        # LIMIT NULL equivale a sin límite en PostgreSQL
+        return sql.SQL("SELECT * FROM {} OFFSET %(offset)s LIMIT %(limit)s").format(
+            sql.Identifier(table_name)
+        )
+    
+    def _stream_ndjson(self, query: Any, params: Optional[Dict[str, Any]] = None,
+                       consola: bool = False) -> Iterator[bytes]:
+        """
+        Recorre una consulta con un cursor con nombre y la serializa como NDJSON:
+        una línea {"columnas": [...]}, luego una línea por fila (lista de valores)
+        y al final {"filas": n}, o {"error": "..."} si la consulta falla a mitad.
+        
+        Args:
+            query: Consulta SQL (texto o sql.Composed)
+            params: Parámetros de la consulta
+            consola: Aplicar las protecciones de la consola. Como el cursor vive en el
+                servidor, dejar de leer tras max_rows filas evita que PostgreSQL
+                produzca el resto; la línea final incluye {"truncado": true, "limite": n}
+            
+        Yields:
+            Bloques de bytes con una o más líneas NDJSON
+        """
+        limite = self.max_rows if consola else None
+        
+        with self.get_connection() as conn:
+            cursor = None
+            filas = 0
+            try:
+                if consola:
+                    self._iniciar_consola(conn)
+                cursor = conn.cursor(name='visor_stream')
+                cursor.itersize = self.ITERSIZE
+                cursor.execute(query, params)
+                
+                # En un cursor con nombre la descripción está disponible tras el primer fetch
+                lote = cursor.fetchmany(self.ITERSIZE)
+                columnas = [col.name for col in cursor.description] if cursor.description else []
+                yield (json.dumps({'columnas': columnas}) + '\n').encode('utf-8')
+                
+                truncado = False
+                while lote:
+                    if limite is not None and filas + len(lote) > limite:
+                        lote = lote[:limite - filas]
+                        truncado = True
+                    filas += len(lote)
+                    if lote:
+                        yield ''.join(
+                            json.dumps(list(row), default=str) + '\n' for row in lote
+                        ).encode('utf-8')
+                    if truncado:
+                        break
+                    lote = cursor.fetchmany(self.ITERSIZE)
+                
+                resumen = {'filas': filas}
+                if truncado:
+                    resumen.update({'truncado': True, 'limite': limite})
+                yield (json.dumps(resumen) + '\n').encode('utf-8')
+            except psycopg2.Error as e:
+                # Los encabezados ya se enviaron: el error viaja como última línea
+                yield (json.dumps({'error': str(e).strip(), 'filas': filas}) + '\n').encode('utf-8')
+            finally:
+                try:
+                    if cursor is not None:
+                        cursor.close()
+                except psycopg2.Error:
+                    pass
+                conn.rollback()
+    
     def get_tables(self) -> List[str]:
         """Obtiene la lista de tablas en la base de datos PostgreSQL"""
         query = "SELECT tablename FROM pg_tables WHERE schemaname = 'public' ORDER BY tablename"
         results = self.execute_query(query)
         return [r['tablename'] for r in results]
     
-    def get_table_schema(self, table_name: str) -> List[Dict[str, Any]]:
-        """Obtiene el esquema de una tabla en PostgreSQL"""
-        query = f"""
-            SELECT 
-                column_name, 
-                data_type, 
-                is_nullable,
-                column_default
-            FROM information_schema.columns 
-            WHERE table_schema = 'public' 
-            AND table_name = '{table_name}'
-            ORDER BY ordinal_position
+    def _get_catalog_info(self, table_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Lee los metadatos de las tablas desde el catálogo (pg_class, pg_stat_user_tables,
+        pg_attribute) en una sola consulta
+        
+        Args:
+            table_name: Limitar a una tabla (todas si es None)
+            
+        Returns:
+            Lista de tablas con filas estimadas, tamaños y columnas
         """
+        filtro = 'AND c.relname = %(tabla)s' if table_name else ''
+        
         with self.get_connection() as conn:
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-            cursor.execute(query)
+            cursor.execute(TABLAS_CATALOGO_SQL.format(filtro=filtro), {'tabla': table_name})
             results = [dict(row) for row in cursor.fetchall()]
-            return results
+            cursor.close()
+        
+        for info in results:
+            info['columns'] = len(info['schema'])
+            info['count_exact'] = False
+            if info['last_analyze'] is not None:
+                info['last_analyze'] = info['last_analyze'].isoformat()
+        
+        return results
+    
+    def get_table_schema(self, table_name: str) -> List[Dict[str, Any]]:
+        """Obtiene el esquema de una tabla en PostgreSQL (desde el catálogo)"""
+        tablas = self._get_catalog_info(table_name)
+        return tablas[0]['schema'] if tablas else []
     
     def get_table_count(self, table_name: str) -> int:
-        """Obtiene el número de registros en una tabla"""
-        query = f"SELECT COUNT(*) as count FROM {table_name}"
-        results = self.execute_query(query)
-        return results[0]['count'] if results else 0
+        """
+        Obtiene el número exacto de registros en una tabla.
+        Recorre la tabla completa: usar solo cuando se pida explícitamente.
+        
+        Raises:
+            ValueError: Si la tabla no existe
+        """
+        if table_name not in self.get_tables():
+            raise ValueError(f"La tabla '{table_name}' no existe")
+        
+        query = sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(table_name))
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            count = cursor.fetchone()[0]
+            cursor.close()
+        return count
     
-    def get_all_table_info(self) -> List[Dict[str, Any]]:
-        """Obtiene información de todas las tablas"""
-        tables = self.get_tables()
-        info = []
+    def get_all_table_info(self, exact_counts: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Obtiene información de todas las tablas leyendo las estadísticas del catálogo.
+        El conteo es una estimación salvo para las tablas pedidas en exact_counts.
         
-        for table in tables:
-            try:
-                count = self.get_table_count(table)
-                schema = self.get_table_schema(table)
-                info.append({
-                    'name': table,
-                    'count': count,
-                    'columns': len(schema),
-                    'schema': schema
-                })
-            except Exception as e:
-                info.append({
-                    'name': table,
-                    'error': str(e)
-                })
+        Args:
+            exact_counts: Tablas para las que se calcula el conteo exacto con COUNT(*)
+            
+        Returns:
+            Lista de tablas con name, count, count_exact, tamaños, columns y schema
+        """
+        info = self._get_catalog_info()
+        
+        for table in info:
+            if exact_counts and table['name'] in exact_counts:
+                try:
+                    table['count'] = self.get_table_count(table['name'])
+                    table['count_exact'] = True
+                except Exception as e:
+                    table['error'] = str(e)
         
         return info
     
-    def preview_table(self, table_name: str, limit: int = 100) -> Dict[str, Any]:
+    def preview_table(self, table_name: str, limit: int = 100, exact_count: bool = False) -> Dict[str, Any]:
         """
         Obtiene una vista previa de una tabla
         
         Args:
             table_name: Nombre de la tabla
             limit: Número máximo de registros a retornar
+            exact_count: Si es True total_rows se calcula con COUNT(*) en lugar de estimarse
             
         Returns:
             Diccionario con esquema y datos
         """
-        schema = self.get_table_schema(table_name)
-        count = self.get_table_count(table_name)
+        limit = min(limit, self.MAX_PREVIEW)
+        query = self._select_tabla(table_name, 0, limit)
+        info = self._get_catalog_info(table_name)[0]
+        schema = info['schema']
+        count = self.get_table_count(table_name) if exact_count else info['count']
         
-        query = f"SELECT * FROM {table_name} LIMIT {limit}"
-        data = self.execute_query(query)
+        with self.get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute(query, {'offset': 0, 'limit': limit})
+            data = [dict(row) for row in cursor.fetchall()]
+            cursor.close()
         
         return {
             'table': table_name,
             'total_rows': count,
+            'total_rows_exact': exact_count,
             'showing': len(data),
             'schema': schema,
             'data': data
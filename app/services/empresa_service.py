@@ -1,8 +1,11 @@
 """
 Servicio de lógica de negocio para Empresas
 """
-from typing import List, Optional, Dict, Any
-from app.models.empresa import Empresa
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+from app.models.empresa import Empresa, TIPOS_MODULO
 from app.repositories.empresa_repository import EmpresaRepository
 
 
@@ -21,6 +24,9 @@ class EmpresaService:
         """
         self.repository = repository
 
+    # Tamaño máximo de página en los listados paginados
+    MAX_PAGE_SIZE = 200
+
     def crear_empresa(self, empresa: Empresa) -> Dict[str, Any]:
         """
         Crea una nueva empresa con validaciones de negocio
@@ -99,14 +105,14 @@ class EmpresaService:
             Diccionario con la lista de empresas
         """
         try:
-            empresas = self.repository.get_all({
+            empresas = self.repository.get_all_dicts({
                 'estado': 'activo',
                 'activos_solamente': True
             })
 
             return {
                 'success': True,
-                'data': [emp.to_dict() for emp in empresas],
+                'data': empresas,
                 'total': len(empresas)
             }
 
@@ -132,11 +138,11 @@ class EmpresaService:
             if estado:
                 filters['estado'] = estado
 
-            empresas = self.repository.get_all(filters)
+            empresas = self.repository.get_all_dicts(filters)
             # print(empresas)  # Debugging line to check fetched companies
             return {
                 'success': True,
-                'data': [emp.to_dict() for emp in empresas],
+                'data': empresas,
                 'total': len(empresas)
             }
 
@@ -147,6 +153,142 @@ class EmpresaService:
                 'data': []
             }
 
+    def listar_empresas(self, filters: Optional[Dict[str, Any]] = None, limit: int = 50,
+                        cursor: Optional[str] = None, orden: str = 'nombre',
+                        direccion: str = 'asc') -> Dict[str, Any]:
+        """
+        Lista empresas paginadas por cursor (keyset), con filtros y ordenamiento en el servidor
+        
+        Args:
+            filters: Filtros soportados por EmpresaRepository.get_all
+            limit: Tamaño de página (1 a MAX_PAGE_SIZE)
+            cursor: Cursor opaco devuelto en la página anterior
+            orden: Columna de ordenamiento (nombre, nit, fecha_creacion, fecha_actualizacion)
+            direccion: 'asc' o 'desc'
+            
+        Returns:
+            Diccionario con la página de empresas y los datos de paginación
+        """
+        try:
+            if not 1 <= limit <= self.MAX_PAGE_SIZE:
+                raise ValueError(f'El tamaño de página debe estar entre 1 y {self.MAX_PAGE_SIZE}')
+            if direccion not in ('asc', 'desc'):
+                raise ValueError(f'Dirección no válida: {direccion}')
+            
+            # Se pide un registro extra para saber si hay página siguiente
+            # (ya serializadas: el listado no necesita objetos Empresa)
+            empresas = self.repository.get_all_dicts(
+                filters,
+                limit=limit + 1,
+                despues_de=self._decodificar_cursor(cursor) if cursor else None,
+                orden=orden,
+                descendente=direccion == 'desc'
+            )
+            
+            tiene_mas = len(empresas) > limit
+            empresas = empresas[:limit]
+            siguiente = None
+            if tiene_mas:
+                ultima = empresas[-1]
+                siguiente = self._codificar_cursor(ultima[orden], ultima['id'])
+            
+            return {
+                'success': True,
+                'data': empresas,
+                'total': len(empresas),
+                'paginacion': {
+                    'limit': limit,
+                    'orden': orden,
+                    'direccion': direccion,
+                    'tiene_mas': tiene_mas,
+                    'siguiente_cursor': siguiente
+                }
+            }
+        
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'data': []
+            }
+
+    def buscar_por_nombre(self, texto: str, limit: int = 20, offset: int = 0,
+                          estado: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Busca empresas por nombre o NIT, ordenadas por relevancia
+        
+        Args:
+            texto: Texto a buscar (sin importar tildes ni mayúsculas)
+            limit: Número máximo de resultados (1 a MAX_PAGE_SIZE)
+            offset: Resultados a omitir
+            estado: Estado opcional de las empresas
+            
+        Returns:
+            Diccionario con las empresas encontradas y su relevancia
+        """
+        try:
+            texto = (texto or '').strip()
+            if not texto:
+                raise ValueError('Debe indicar un texto a buscar')
+            if not 1 <= limit <= self.MAX_PAGE_SIZE:
+                raise ValueError(f'El tamaño de página debe estar entre 1 y {self.MAX_PAGE_SIZE}')
+            
+            # Se pide un resultado extra para saber si hay más páginas
+            resultados = self.repository.buscar(texto, limit + 1, offset, estado)
+            tiene_mas = len(resultados) > limit
+            resultados = resultados[:limit]
+            
+            return {
+                'success': True,
+                'data': [{**emp.to_dict(), 'relevancia': round(relevancia, 4)}
+                         for emp, relevancia in resultados],
+                'total': len(resultados),
+                'paginacion': {
+                    'limit': limit,
+                    'offset': offset,
+                    'tiene_mas': tiene_mas
+                }
+            }
+        
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'data': []
+            }
+
+    def filtrar_por_estado(self, estado: str, limit: int = 50,
+                           cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Obtiene una página de empresas con el estado indicado
+        
+        Args:
+            estado: Estado a filtrar (activo, inactivo, suspendido)
+            limit: Tamaño de página
+            cursor: Cursor opaco de la página anterior
+            
+        Returns:
+            Diccionario con la página de empresas
+        """
+        return self.listar_empresas({'estado': estado}, limit=limit, cursor=cursor)
+
+    @staticmethod
+    def _codificar_cursor(valor: Any, empresa_id: int) -> str:
+        """Codifica la clave (valor de orden, id) de la última fila como cursor opaco"""
+        if isinstance(valor, datetime):
+            valor = valor.isoformat()
+        crudo = json.dumps([valor, empresa_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(crudo).decode('ascii')
+
+    @staticmethod
+    def _decodificar_cursor(cursor: str) -> Tuple[Any, int]:
+        """Decodifica un cursor opaco a la clave (valor de orden, id)"""
+        try:
+            valor, empresa_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return valor, int(empresa_id)
+        except (ValueError, TypeError, UnicodeError):
+            raise ValueError('Cursor de paginación no válido')
+
     def actualizar_empresa(self, empresa: Empresa) -> Dict[str, Any]:
         """
         Actualiza una empresa existente
@@ -205,7 +347,7 @@ class EmpresaService:
         """
         try:
             # Validaciones
-            if modulo not in ['certificado', 'resolucion', 'documento']:
+            if modulo not in TIPOS_MODULO:
                 return {
                     'success': False,
                     'error': f'Módulo no válido: {modulo}'
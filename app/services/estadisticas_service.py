@@ -2,7 +2,6 @@
 Servicio de estadísticas del sistema
 """
 from typing import Dict, Any
-from datetime import datetime, timedelta
 from app.repositories.empresa_repository import EmpresaRepository
 
 
@@ -20,83 +19,62 @@ class EstadisticasService:
         """
         self.repository = repository
 
-    def obtener_estadisticas_generales(self) -> Dict[str, Any]:
+    # Claves de la respuesta para cada tipo de módulo del repositorio
+    MODULOS = {
+        'certificado': 'certificados',
+        'resolucion': 'resoluciones',
+        'documento': 'documentos'
+    }
+
+    CONTADORES_GENERALES = (
+        'activos', 'renovados', 'facturados', 'pendientes_renovacion', 'pendientes_facturacion'
+    )
+
+    CONTADORES_VENCIMIENTO = ('vencidos', 'por_vencer', 'vigentes')
+
+    def _obtener_snapshot(self) -> Dict[str, Any]:
         """
-        Calcula estadísticas generales del sistema
+        Lee el snapshot materializado del dashboard, generándolo si aún no existe
         
         Returns:
-            Diccionario con estadísticas detalladas
+            Snapshot con fecha_referencia, actualizado_en y contadores
         """
-        try:
-            empresas = self.repository.get_all({
-                'estado': 'activo',
-                'activos_solamente': True
-            })
+        snapshot = self.repository.get_snapshot_dashboard()
+        if snapshot is None:
+            self.repository.refrescar_snapshot_dashboard()
+            snapshot = self.repository.get_snapshot_dashboard()
+        return snapshot
 
-            stats = {
-                'total_empresas': len(empresas),
-                'certificados': {
-                    'activos': 0,
-                    'renovados': 0,
-                    'facturados': 0,
-                    'pendientes_renovacion': 0,
-                    'pendientes_facturacion': 0
-                },
-                'resoluciones': {
-                    'activos': 0,
-                    'renovados': 0,
-                    'facturados': 0,
-                    'pendientes_renovacion': 0,
-                    'pendientes_facturacion': 0
-                },
-                'documentos': {
-                    'activos': 0,
-                    'renovados': 0,
-                    'facturados': 0,
-                    'pendientes_renovacion': 0,
-                    'pendientes_facturacion': 0
-                }
-            }
+    def obtener_estadisticas(self) -> Dict[str, Any]:
+        """
+        Obtiene todas las estadísticas del sistema desde el snapshot del dashboard.
+        Sirve a todos los endpoints de estadísticas.
+        
+        Returns:
+            Diccionario con total de empresas, contadores generales y de vencimiento
+            por módulo, empresas por estado y el total de alertas críticas
+            (vencidos + por vencer)
+        """
+        try:
+            snapshot = self._obtener_snapshot()
+            contadores = snapshot['contadores']
 
-            for empresa in empresas:
-                # Estadísticas de Certificados
-                if empresa.certificado.activo == 1:
-                    stats['certificados']['activos'] += 1
-                    if empresa.certificado.renovado == 1:
-                        stats['certificados']['renovados'] += 1
-                    else:
-                        stats['certificados']['pendientes_renovacion'] += 1
-                    
-                    if empresa.certificado.facturado == 1:
-                        stats['certificados']['facturados'] += 1
-                    else:
-                        stats['certificados']['pendientes_facturacion'] += 1
+            stats = {'total_empresas': contadores.get('total_empresas', 0)}
+            alertas_criticas = 0
 
-                # Estadísticas de Resoluciones
-                if empresa.resolucion.activo == 1:
-                    stats['resoluciones']['activos'] += 1
-                    if empresa.resolucion.renovado == 1:
-                        stats['resoluciones']['renovados'] += 1
-                    else:
-                        stats['resoluciones']['pendientes_renovacion'] += 1
-                    
-                    if empresa.resolucion.facturado == 1:
-                        stats['resoluciones']['facturados'] += 1
-                    else:
-                        stats['resoluciones']['pendientes_facturacion'] += 1
+            for tipo, clave in self.MODULOS.items():
+                stats[clave] = {
+                    nombre: contadores.get(f'{tipo}.{nombre}', 0)
+                    for nombre in self.CONTADORES_GENERALES + self.CONTADORES_VENCIMIENTO
+                }
+                alertas_criticas += stats[clave]['vencidos'] + stats[clave]['por_vencer']
 
-                # Estadísticas de Documentos
-                if empresa.documento.activo == 1:
-                    stats['documentos']['activos'] += 1
-                    if empresa.documento.renovado == 1:
-                        stats['documentos']['renovados'] += 1
-                    else:
-                        stats['documentos']['pendientes_renovacion'] += 1
-                    
-                    if empresa.documento.facturado == 1:
-                        stats['documentos']['facturados'] += 1
-                    else:
-                        stats['documentos']['pendientes_facturacion'] += 1
+            stats['alertas_criticas'] = alertas_criticas
+            stats['por_estado'] = {
+                clave[len('estado.'):]: valor
+                for clave, valor in contadores.items() if clave.startswith('estado.')
+            }
+            stats['actualizado_en'] = snapshot['actualizado_en'].isoformat()
 
             return {
                 'success': True,
@@ -109,72 +87,21 @@ class EstadisticasService:
                 'error': str(e)
             }
 
-    def obtener_empresas_pendientes(self) -> Dict[str, Any]:
+    def obtener_conteo_alertas(self) -> Dict[str, Any]:
         """
-        Obtiene empresas con pendientes de renovación o facturación
+        Obtiene el conteo de alertas de notificación por prioridad desde el snapshot
         
         Returns:
-            Diccionario con empresas pendientes por categoría
+            Diccionario con el número de alertas CRITICA, ALTA, MEDIA y total
         """
         try:
-            empresas = self.repository.get_all({
-                'estado': 'activo',
-                'activos_solamente': True
-            })
-
-            pendientes = {
-                'pendientes_renovacion': [],
-                'pendientes_facturacion': [],
-                'totalmente_completadas': []
-            }
-
-            for empresa in empresas:
-                tiene_pendiente_renovacion = False
-                tiene_pendiente_facturacion = False
-
-                # Verificar certificados
-                if empresa.certificado.activo == 1:
-                    if empresa.certificado.renovado == 0:
-                        tiene_pendiente_renovacion = True
-                    if empresa.certificado.facturado == 0:
-                        tiene_pendiente_facturacion = True
-
-                # Verificar resoluciones
-                if empresa.resolucion.activo == 1:
-                    if empresa.resolucion.renovado == 0:
-                        tiene_pendiente_renovacion = True
-                    if empresa.resolucion.facturado == 0:
-                        tiene_pendiente_facturacion = True
-
-                # Verificar documentos
-                if empresa.documento.activo == 1:
-                    if empresa.documento.renovado == 0:
-                        tiene_pendiente_renovacion = True
-                    if empresa.documento.facturado == 0:
-                        tiene_pendiente_facturacion = True
-
-                # Clasificar empresa
-                empresa_dict = {
-                    'nit': empresa.nit,
-                    'nombre': empresa.nombre
-                }
-
-                if tiene_pendiente_renovacion:
-                    pendientes['pendientes_renovacion'].append(empresa_dict)
-                
-                if tiene_pendiente_facturacion:
-                    pendientes['pendientes_facturacion'].append(empresa_dict)
-                
-                if not tiene_pendiente_renovacion and not tiene_pendiente_facturacion:
-                    pendientes['totalmente_completadas'].append(empresa_dict)
+            contadores = self._obtener_snapshot()['contadores']
 
             return {
                 'success': True,
-                'data': pendientes,
-                'resumen': {
-                    'pendientes_renovacion': len(pendientes['pendientes_renovacion']),
-                    'pendientes_facturacion': len(pendientes['pendientes_facturacion']),
-                    'completadas': len(pendientes['totalmente_completadas'])
+                'data': {
+                    prioridad: contadores.get(f'alertas.{prioridad}', 0)
+                    for prioridad in ('CRITICA', 'ALTA', 'MEDIA', 'total')
                 }
             }
 
@@ -184,102 +111,52 @@ class EstadisticasService:
                 'error': str(e)
             }
 
-    def obtener_estadisticas_vencimientos_certificados(self) -> Dict[str, Any]:
+    def refrescar_snapshot(self) -> Dict[str, Any]:
         """
-        Calcula estadísticas de vencimientos de certificados basándose en fechas
+        Recalcula por completo el snapshot del dashboard
         
         Returns:
-            Diccionario con conteo de vencidos, por vencer y vigentes
+            Diccionario con success y la fecha de referencia del snapshot
         """
         try:
-            empresas = self.repository.get_all({
-                'estado': 'activo',
-                'activos_solamente': True
-            })
-
-            hoy = datetime.now()
-            dias_alerta = 30  # Considerar "por vencer" si faltan menos de 30 días
-            fecha_limite_alerta = hoy + timedelta(days=dias_alerta)
-
-            stats = {
-                'vencidos': 0,
-                'por_vencer': 0,
-                'vigentes': 0
-            }
-
-            for empresa in empresas:
-                if empresa.certificado.activo == 1 and empresa.certificado.fecha_final:
-                    fecha_final = empresa.certificado.fecha_final
-                    
-                    if fecha_final < hoy:
-                        stats['vencidos'] += 1
-                    elif fecha_final <= fecha_limite_alerta:
-                        stats['por_vencer'] += 1
-                    else:
-                        stats['vigentes'] += 1
-
+            fecha_referencia = self.repository.refrescar_snapshot_dashboard()
             return {
                 'success': True,
-                'data': stats
+                'data': {'fecha_referencia': fecha_referencia.isoformat()}
             }
-
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e)
             }
 
-    def obtener_estadisticas_vencimientos_resoluciones(self) -> Dict[str, Any]:
+    def obtener_estadisticas_generales(self) -> Dict[str, Any]:
         """
-        Calcula estadísticas de vencimientos de resoluciones basándose en fechas
+        Calcula estadísticas generales del sistema
         
         Returns:
-            Diccionario con conteo de vencidos, por vencer y vigentes
+            Diccionario con estadísticas detalladas
         """
-        try:
-            empresas = self.repository.get_all({
-                'estado': 'activo',
-                'activos_solamente': True
-            })
-
-            hoy = datetime.now()
-            dias_alerta = 30
-            fecha_limite_alerta = hoy + timedelta(days=dias_alerta)
-
-            stats = {
-                'vencidos': 0,
-                'por_vencer': 0,
-                'vigentes': 0
-            }
+        resultado = self.obtener_estadisticas()
+        if not resultado['success']:
+            return resultado
 
-            for empresa in empresas:
-                if empresa.resolucion.activo == 1 and empresa.resolucion.fecha_final:
-                    fecha_final = empresa.resolucion.fecha_final
-                    
-                    if fecha_final < hoy:
-                        stats['vencidos'] += 1
-                    elif fecha_final <= fecha_limite_alerta:
-                        stats['por_vencer'] += 1
-                    else:
-                        stats['vigentes'] += 1
-
-            return {
-                'success': True,
-                'data': stats
-            }
+        stats = resultado['data']
+        generales = {'total_empresas': stats['total_empresas']}
+        for clave in self.MODULOS.values():
+            generales[clave] = {nombre: stats[clave][nombre] for nombre in self.CONTADORES_GENERALES}
 
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+        return {
+            'success': True,
+            'data': generales
+        }
 
-    def obtener_estadisticas_vencimientos_documentos(self) -> Dict[str, Any]:
+    def obtener_empresas_pendientes(self) -> Dict[str, Any]:
         """
-        Calcula estadísticas de vencimientos de documentos basándose en fechas
+        Obtiene empresas con pendientes de renovación o facturación
         
         Returns:
-            Diccionario con conteo de vencidos, por vencer y vigentes
+            Diccionario con empresas pendientes por categoría
         """
         try:
             empresas = self.repository.get_all({
@@ -287,30 +164,47 @@ class EstadisticasService:
                 'activos_solamente': True
             })
 
-            hoy = datetime.now()
-            dias_alerta = 30
-            fecha_limite_alerta = hoy + timedelta(days=dias_alerta)
-
-            stats = {
-                'vencidos': 0,
-                'por_vencer': 0,
-                'vigentes': 0
+            pendientes = {
+                'pendientes_renovacion': [],
+                'pendientes_facturacion': [],
+                'totalmente_completadas': []
             }
 
             for empresa in empresas:
-                if empresa.documento.activo == 1 and empresa.documento.fecha_final:
-                    fecha_final = empresa.documento.fecha_final
-                    
-                    if fecha_final < hoy:
-                        stats['vencidos'] += 1
-                    elif fecha_final <= fecha_limite_alerta:
-                        stats['por_vencer'] += 1
-                    else:
-                        stats['vigentes'] += 1
+                tiene_pendiente_renovacion = False
+                tiene_pendiente_facturacion = False
+
+                # Verificar cada módulo activo
+                for modulo in empresa.modulos().values():
+                    if modulo.activo == 1:
+                        if modulo.renovado == 0:
+                            tiene_pendiente_renovacion = True
+                        if modulo.facturado == 0:
+                            tiene_pendiente_facturacion = True
+
+                # Clasificar empresa
+                empresa_dict = {
+                    'nit': empresa.nit,
+                    'nombre': empresa.nombre
+                }
+
+                if tiene_pendiente_renovacion:
+                    pendientes['pendientes_renovacion'].append(empresa_dict)
+                
+                if tiene_pendiente_facturacion:
+                    pendientes['pendientes_facturacion'].append(empresa_dict)
+                
+                if not tiene_pendiente_renovacion and not tiene_pendiente_facturacion:
+                    pendientes['totalmente_completadas'].append(empresa_dict)
 
             return {
                 'success': True,
-                'data': stats
+                'data': pendientes,
+                'resumen': {
+                    'pendientes_renovacion': len(pendientes['pendientes_renovacion']),
+                    'pendientes_facturacion': len(pendientes['pendientes_facturacion']),
+                    'completadas': len(pendientes['totalmente_completadas'])
+                }
             }
 
         except Exception as e:
@@ -0,0 +1,210 @@
+"""
+Servicio de trabajos de importación en segundo plano
+Recibe el archivo, responde de inmediato con el ID del trabajo y procesa
+la importación en un pool de hilos propio, registrando el progreso por lotes.
+Cada trabajo queda a nombre del proceso que lo procesa (host:pid), que renueva
+periódicamente su latido para que los demás workers no lo den por interrumpido.
+"""
+import os
+import shutil
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, BinaryIO, List, Optional
+from app.repositories.importacion_job_repository import ImportacionJobRepository
+from app.services.importacion_service import ImportacionService
+
+
+class ImportacionJobService:
+    """
+    Servicio que encola importaciones y expone su estado.
+    Las importaciones usan un ejecutor separado del de base de datos para que
+    un archivo grande no deje sin hilos a las peticiones de la API.
+    """
+
+    # Errores devueltos como máximo en cada consulta de estado
+    LIMITE_ERRORES = 500
+
+    # Segundos entre latidos de los trabajos en curso de este proceso
+    INTERVALO_LATIDO = 30
+
+    # Un trabajo sin latido durante este tiempo se considera huérfano
+    VENCIMIENTO_LATIDO = 5 * INTERVALO_LATIDO
+
+    def __init__(self, importacion_service: ImportacionService,
+                 repository: ImportacionJobRepository, max_workers: int = 2):
+        """
+        Inicializa el servicio
+
+        Args:
+            importacion_service: Servicio que parsea y guarda las filas
+            repository: Repositorio de trabajos de importación
+            max_workers: Número de importaciones que se procesan a la vez
+        """
+        self.importacion_service = importacion_service
+        self.repository = repository
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='importacion')
+        self._activos = 0
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._latido: Optional[threading.Thread] = None
+
+    @property
+    def propietario(self) -> str:
+        """Identificador del proceso actual (host:pid) con el que se registran sus trabajos"""
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def encolar(self, archivo: BinaryIO, nombre_archivo: str) -> Dict[str, Any]:
+        """
+        Copia el archivo subido a disco y encola su importación.
+        La copia es necesaria porque el archivo de la petición se cierra al responder.
+
+        Args:
+            archivo: Archivo binario abierto (p. ej. UploadFile.file)
+            nombre_archivo: Nombre original del archivo
+
+        Returns:
+            Diccionario con success y data (trabajo creado) o error
+        """
+        _, extension = os.path.splitext(nombre_archivo or '')
+        fd, ruta = tempfile.mkstemp(prefix='importacion_', suffix=extension)
+
+        try:
+            with os.fdopen(fd, 'wb') as destino:
+                shutil.copyfileobj(archivo, destino)
+
+            job = self.repository.create(nombre_archivo, self.propietario)
+        except Exception as e:
+            os.remove(ruta)
+            return {
+                'success': False,
+                'error': f'Error al encolar la importación: {str(e)}'
+            }
+
+        with self._lock:
+            self._activos += 1
+        self._executor.submit(self._procesar, job['id'], ruta)
+        print(f"📥 Importación {job['id']} encolada - Archivo: {nombre_archivo}")
+
+        return {
+            'success': True,
+            'data': job
+        }
+
+    def _procesar(self, job_id: str, ruta: str):
+        """
+        Ejecuta la importación de un trabajo (en un hilo del pool)
+
+        Args:
+            job_id: ID del trabajo
+            ruta: Ruta del archivo temporal a importar
+        """
+        def registrar_progreso(resultados: Dict[str, Any], errores_nuevos: List[str]):
+            self.repository.registrar_progreso(job_id, resultados, errores_nuevos)
+
+        try:
+            self.repository.marcar_procesando(job_id)
+
+            with open(ruta, 'rb') as archivo:
+                # El archivo temporal conserva la extensión original, que define el formato
+                resultado = self.importacion_service.importar_archivo(
+                    archivo, ruta, al_guardar_lote=registrar_progreso
+                )
+
+            if resultado['success']:
+                self.repository.finalizar(job_id, ImportacionJobRepository.COMPLETADO, resultado['message'])
+                print(f"✅ Importación {job_id}: {resultado['message']}")
+            else:
+                self.repository.finalizar(job_id, ImportacionJobRepository.FALLIDO, resultado['error'])
+                print(f"❌ Importación {job_id} fallida: {resultado['error']}")
+
+        except Exception as e:
+            print(f"❌ Error en la importación {job_id}: {str(e)}")
+            try:
+                self.repository.finalizar(job_id, ImportacionJobRepository.FALLIDO,
+                                          f'Error al importar: {str(e)}')
+            except Exception:
+                pass
+        finally:
+            os.remove(ruta)
+            with self._lock:
+                self._activos -= 1
+
+    def obtener_estado(self, job_id: str, desde_error: int = 0) -> Dict[str, Any]:
+        """
+        Obtiene el progreso de un trabajo y los errores a partir de una posición,
+        de modo que el cliente solo recibe los errores nuevos en cada consulta
+
+        Args:
+            job_id: ID del trabajo
+            desde_error: Posición del primer error a devolver
+
+        Returns:
+            Diccionario con success y data (estado, contadores y errores) o error
+        """
+        try:
+            job = self.repository.get_by_id(job_id)
+            if not job:
+                return {
+                    'success': False,
+                    'error': 'Trabajo de importación no encontrado'
+                }
+
+            errores = self.repository.get_errores(job_id, desde_error, self.LIMITE_ERRORES)
+            job['errores'] = errores
+            job['siguiente_error'] = desde_error + len(errores)
+            job['terminado'] = job['estado'] in (ImportacionJobRepository.COMPLETADO,
+                                                 ImportacionJobRepository.FALLIDO)
+
+            return {
+                'success': True,
+                'data': job
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Error al obtener la importación: {str(e)}'
+            }
+
+    def recuperar_interrumpidos(self) -> int:
+        """
+        Cierra los trabajos que quedaron a medias por un reinicio del servidor:
+        los registrados con el mismo host:pid que este proceso (un contenedor
+        reiniciado suele repetir el pid) y los de cualquier proceso cuyo latido venció.
+        Los trabajos que otros workers están procesando no se tocan.
+
+        Returns:
+            Número de trabajos marcados como fallidos
+        """
+        return self.repository.marcar_interrumpidos(self.VENCIMIENTO_LATIDO, [self.propietario])
+
+    def iniciar_latido(self):
+        """
+        Inicia el hilo que renueva el latido de los trabajos de este proceso
+        y cierra periódicamente los trabajos huérfanos de otros procesos
+        """
+        if self._latido is not None:
+            return
+        self._detener.clear()
+        self._latido = threading.Thread(target=self._latir, name='importacion-latido', daemon=True)
+        self._latido.start()
+
+    def _latir(self):
+        """Bucle del hilo de latido (se detiene con shutdown)"""
+        while not self._detener.wait(self.INTERVALO_LATIDO):
+            try:
+                if self._activos:
+                    self.repository.renovar(self.propietario)
+
+                huerfanos = self.repository.marcar_interrumpidos(self.VENCIMIENTO_LATIDO)
+                if huerfanos:
+                    print(f"⚠️  {huerfanos} importación(es) sin latido marcadas como fallidas")
+            except Exception as e:
+                print(f"⚠️  Error renovando el latido de las importaciones: {str(e)}")
+
+    def shutdown(self):
+        """Detiene el pool descartando las importaciones que aún no empezaron"""
+        self._detener.set()
+        self._latido = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,19 +1,27 @@
 """
-Servicio para importación masiva de empresas desde Excel
+Servicio para importación masiva de empresas desde Excel, CSV o Parquet/Arrow
+y exportación con las mismas columnas (Excel o CSV)
 """
-from typing import List, Dict, Any, Tuple
+import codecs
+import csv
+import itertools
+import os
+import tempfile
+from typing import List, Dict, Any, Tuple, Optional, Union, BinaryIO, Iterable, Iterator, Callable
 from datetime import datetime
 import openpyxl
 from openpyxl.workbook import Workbook
-from io import BytesIO
-from app.models.empresa import Empresa
+from io import BytesIO, StringIO, TextIOWrapper
+from app.models.empresa import Empresa, ModuloEmpresa
 from app.models.enums import EstadoEmpresa
+from app.services.parseo_columnas import ParseadorColumna, ParseadorFechas, crear_parseadores
 from app.repositories.empresa_repository import EmpresaRepository
 
 
 class ImportacionService:
     """
-    Servicio para importar empresas desde archivos Excel
+    Servicio para importar empresas desde archivos Excel, CSV o Parquet/Arrow.
+    Todos los formatos comparten las columnas esperadas y el guardado por lotes.
     """
     
     # Columnas esperadas en el Excel (orden)
@@ -32,6 +40,53 @@ class ImportacionService:
         'DOCUMENTO_FACTURADO'
     ]
     
+    # Columnas de cada módulo: (módulo, vencimiento, renovado, facturado)
+    COLUMNAS_MODULOS = [
+        ('certificado', 'CERTIFICADO_VENCIMIENTO', 'CERTIFICADO_RENOVADO', 'CERTIFICADO_FACTURADO'),
+        ('resolucion', 'RESOLUCION_VENCIMIENTO', 'RESOLUCION_RENOVADO', 'RESOLUCION_FACTURADO'),
+        ('documento', 'DOCUMENTO_VENCIMIENTO', 'DOCUMENTO_RENOVADO', 'DOCUMENTO_FACTURADO')
+    ]
+    
+    # Formato de lectura según la extensión del archivo
+    FORMATOS_ARCHIVO = {
+        '.xlsx': 'excel',
+        '.xls': 'excel',
+        '.csv': 'csv',
+        '.parquet': 'parquet',
+        '.arrow': 'arrow',
+        '.feather': 'arrow'
+    }
+    
+    # Posiciones (en COLUMNAS_ESPERADAS) de las fechas y de los SI/NO
+    POSICIONES_FECHA = (3, 6, 9)
+    POSICIONES_BOOLEANAS = (4, 5, 7, 8, 10, 11)
+    
+    # Tipo de contenido de cada formato de exportación
+    FORMATOS_EXPORTACION = {
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'csv': 'text/csv; charset=utf-8'
+    }
+    
+    # Bytes enviados por bloque al exportar
+    TAMANO_BLOQUE_EXPORTACION = 64 * 1024
+    
+    # Codificaciones de CSV: UTF-8 (con o sin BOM) y, si el archivo no es UTF-8 válido,
+    # Windows-1252, la habitual en las exportaciones de ERP en español
+    CODIFICACION_CSV = 'utf-8-sig'
+    CODIFICACION_CSV_ALTERNATIVA = 'cp1252'
+    
+    # Bytes leídos por bloque al detectar la codificación de un CSV
+    TAMANO_BLOQUE_DETECCION = 1024 * 1024
+    
+    # Filas guardadas por transacción durante la importación
+    # (también es el tamaño de bloque con el que se parsean las columnas)
+    TAMANO_LOTE = 1000
+    
+    # Errores que se conservan en el resultado de la importación
+    # (el total se informa en total_errores; los procesos en segundo plano
+    # reciben todos los errores lote a lote con al_guardar_lote)
+    MAX_ERRORES_RESULTADO = 100
+    
     def __init__(self, repository: EmpresaRepository):
         """
         Inicializa el servicio
@@ -41,54 +96,226 @@ class ImportacionService:
         """
         self.repository = repository
     
-    def validar_estructura_excel(self, file_content: bytes) -> Dict[str, Any]:
+    def validar_estructura_excel(self, file_content: Union[bytes, BinaryIO]) -> Dict[str, Any]:
         """
-        Valida que el Excel tenga la estructura correcta
+        Valida que el Excel tenga la estructura correcta.
+        Solo lee los encabezados y la primera fila de datos (modo streaming).
         
         Args:
-            file_content: Contenido del archivo Excel
+            file_content: Contenido del archivo Excel o archivo binario abierto
             
         Returns:
             Diccionario con el resultado de la validación
         """
         try:
-            wb = openpyxl.load_workbook(BytesIO(file_content))
-            ws = wb.active
-            
-            # Verificar que tenga encabezados
-            if ws.max_row < 2:
+            filas = self._leer_filas_excel(file_content)
+            try:
+                encabezados = next(filas, None)
+                indices = self._validar_encabezados(encabezados)
+                tiene_datos = next(filas, None) is not None
+            finally:
+                filas.close()
+            
+            if not tiene_datos:
                 return {
                     'success': False,
                     'error': 'El archivo está vacío o no tiene datos'
                 }
             
-            # Obtener encabezados (primera fila)
-            encabezados = [cell.value for cell in ws[1]]
-            
-            # Validar que tenga todas las columnas esperadas
-            columnas_faltantes = []
-            for columna in self.COLUMNAS_ESPERADAS:
-                if columna not in encabezados:
-                    columnas_faltantes.append(columna)
-            
-            if columnas_faltantes:
-                return {
-                    'success': False,
-                    'error': f'Faltan las siguientes columnas: {", ".join(columnas_faltantes)}'
-                }
-            
             return {
                 'success': True,
                 'message': 'Estructura válida',
-                'total_filas': ws.max_row - 1  # Restar encabezados
+                'columnas': list(indices)
             }
             
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
         except Exception as e:
             return {
                 'success': False,
                 'error': f'Error al leer el archivo: {str(e)}'
             }
     
+    def _leer_filas_excel(self, origen: Union[bytes, BinaryIO]) -> Iterator[tuple]:
+        """
+        Recorre la hoja activa en modo solo lectura, fila a fila y solo con valores.
+        La memoria usada no depende del tamaño de la hoja.
+        
+        Args:
+            origen: Contenido del archivo Excel o archivo binario abierto
+            
+        Yields:
+            Tuplas con los valores de cada fila (la primera son los encabezados)
+        """
+        if isinstance(origen, (bytes, bytearray)):
+            origen = BytesIO(origen)
+        
+        wb = openpyxl.load_workbook(origen, read_only=True, data_only=True)
+        try:
+            yield from wb.active.iter_rows(values_only=True)
+        finally:
+            wb.close()
+    
+    def _detectar_codificacion_csv(self, origen: BinaryIO) -> str:
+        """
+        Determina la codificación de un CSV recorriendo el archivo por bloques:
+        si no es UTF-8 válido se usa Windows-1252. Al terminar el archivo vuelve
+        a la posición inicial. Un archivo que no admite seek se lee como UTF-8.
+        
+        Args:
+            origen: Archivo binario abierto
+            
+        Returns:
+            Nombre de la codificación
+        """
+        if not origen.seekable():
+            return self.CODIFICACION_CSV
+        
+        inicio = origen.tell()
+        decodificador = codecs.getincrementaldecoder('utf-8')()
+        try:
+            while True:
+                bloque = origen.read(self.TAMANO_BLOQUE_DETECCION)
+                decodificador.decode(bloque, final=not bloque)
+                if not bloque:
+                    return self.CODIFICACION_CSV
+        except UnicodeDecodeError:
+            return self.CODIFICACION_CSV_ALTERNATIVA
+        finally:
+            origen.seek(inicio)
+    
+    def _leer_filas_csv(self, origen: Union[bytes, BinaryIO]) -> Iterator[tuple]:
+        """
+        Recorre un archivo CSV fila a fila con el módulo csv.
+        El separador (coma, punto y coma, tabulador o barra) se detecta con la primera línea
+        y la codificación (UTF-8 o Windows-1252) con _detectar_codificacion_csv.
+        
+        Args:
+            origen: Contenido del archivo CSV o archivo binario abierto
+            
+        Yields:
+            Tuplas con los valores de cada fila (celdas vacías como None)
+            
+        Raises:
+            ValueError: Si el archivo no se puede leer con la codificación detectada
+        """
+        if isinstance(origen, (bytes, bytearray)):
+            origen = BytesIO(origen)
+            
+        codificacion = self._detectar_codificacion_csv(origen)
+        texto = TextIOWrapper(origen, encoding=codificacion, newline='')
+        try:
+            primera_linea = texto.readline()
+            try:
+                dialecto = csv.Sniffer().sniff(primera_linea, delimiters=',;\t|')
+            except csv.Error:
+                dialecto = csv.excel
+                
+            for fila in csv.reader(itertools.chain([primera_linea], texto), dialecto):
+                yield tuple(valor if valor != '' else None for valor in fila)
+        except UnicodeDecodeError:
+            raise ValueError(
+                f'El archivo CSV contiene caracteres no válidos en {codificacion}. '
+                'Guárdelo como "CSV UTF-8" e intente de nuevo'
+            )
+        finally:
+            # Soltar el archivo sin cerrarlo: pertenece a quien lo abrió
+            texto.detach()
+    
+    def _leer_filas_arrow(self, origen: Union[bytes, BinaryIO], formato: str) -> Iterator[tuple]:
+        """
+        Recorre un archivo Parquet o Arrow (IPC/Feather) por lotes de registros
+        
+        Args:
+            origen: Contenido del archivo o archivo binario abierto
+            formato: 'parquet' o 'arrow'
+            
+        Yields:
+            Tuplas con los valores de cada fila (la primera son los nombres de columna)
+            
+        Raises:
+            ValueError: Si pyarrow no está instalado
+        """
+        try:
+            import pyarrow.ipc as ipc
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError('Para importar archivos Parquet o Arrow se requiere el paquete pyarrow')
+            
+        if isinstance(origen, (bytes, bytearray)):
+            origen = BytesIO(origen)
+            
+        if formato == 'parquet':
+            archivo = pq.ParquetFile(origen)
+            nombres = archivo.schema_arrow.names
+            lotes = archivo.iter_batches(batch_size=self.TAMANO_LOTE)
+        else:
+            lector = ipc.open_file(origen)
+            nombres = lector.schema.names
+            lotes = (lector.get_batch(i) for i in range(lector.num_record_batches))
+            
+        yield tuple(nombres)
+        for lote in lotes:
+            yield from zip(*(columna.to_pylist() for columna in lote.columns))
+    
+    def _leer_filas(self, origen: Union[bytes, BinaryIO], formato: str) -> Iterator[tuple]:
+        """
+        Obtiene el lector de filas adecuado para el formato
+        
+        Args:
+            origen: Contenido del archivo o archivo binario abierto
+            formato: 'excel', 'csv', 'parquet' o 'arrow'
+            
+        Returns:
+            Generador de filas (la primera son los encabezados)
+        """
+        if formato == 'csv':
+            return self._leer_filas_csv(origen)
+        if formato in ('parquet', 'arrow'):
+            return self._leer_filas_arrow(origen, formato)
+        return self._leer_filas_excel(origen)
+    
+    @classmethod
+    def formato_de_archivo(cls, nombre_archivo: Optional[str]) -> Optional[str]:
+        """
+        Determina el formato de importación según la extensión del archivo
+        
+        Args:
+            nombre_archivo: Nombre o ruta del archivo
+            
+        Returns:
+            'excel', 'csv', 'parquet' o 'arrow', o None si la extensión no es soportada
+        """
+        _, extension = os.path.splitext(nombre_archivo or '')
+        return cls.FORMATOS_ARCHIVO.get(extension.lower())
+    
+    def _validar_encabezados(self, encabezados: Optional[tuple]) -> Dict[str, int]:
+        """
+        Verifica los encabezados y obtiene la posición de cada columna esperada
+        
+        Args:
+            encabezados: Primera fila del archivo
+            
+        Returns:
+            Diccionario columna -> índice
+            
+        Raises:
+            ValueError: Si el archivo está vacío o faltan columnas
+        """
+        if not encabezados:
+            raise ValueError('El archivo está vacío o no tiene datos')
+        
+        encabezados = [str(valor).strip() if valor is not None else None for valor in encabezados]
+        columnas_faltantes = [col for col in self.COLUMNAS_ESPERADAS if col not in encabezados]
+        
+        if columnas_faltantes:
+            raise ValueError(f'Faltan las siguientes columnas: {", ".join(columnas_faltantes)}')
+        
+        return {col: encabezados.index(col) for col in self.COLUMNAS_ESPERADAS}
+    
     def procesar_fila(self, fila: List[Any], numero_fila: int) -> Tuple[Empresa, List[str]]:
         """
         Procesa una fila del Excel y crea un objeto Empresa
@@ -97,6 +324,23 @@ class ImportacionService:
             fila: Lista con los valores de la fila
             numero_fila: Número de fila (para reportar errores)
             
+        Returns:
+            Tupla (Empresa o None, Lista de errores)
+        """
+        columnas = self._parsear_columnas([fila])
+        valores = {col: parseados[0] for col, parseados in columnas.items()}
+        return self._construir_empresa(fila, valores, numero_fila)
+    
+    def _construir_empresa(self, fila: List[Any], valores: Dict[str, Any],
+                           numero_fila: int) -> Tuple[Empresa, List[str]]:
+        """
+        Crea la empresa de una fila cuyas fechas y booleanos ya fueron parseados por columna
+        
+        Args:
+            fila: Valores de la fila ordenados según COLUMNAS_ESPERADAS
+            valores: Fechas y booleanos parseados de la fila, por nombre de columna
+            numero_fila: Número de fila (para reportar errores)
+            
         Returns:
             Tupla (Empresa o None, Lista de errores)
         """
@@ -122,43 +366,16 @@ class ImportacionService:
                 errores.append(f'Fila {numero_fila}: Estado inválido "{estado}". Debe ser: activo, inactivo o suspendido')
                 estado = 'activo'
             
-            # Procesar fechas de vencimiento
-            cert_venc = self._parsear_fecha(fila[3]) if len(fila) > 3 and fila[3] else None
-            reso_venc = self._parsear_fecha(fila[6]) if len(fila) > 6 and fila[6] else None
-            doc_venc = self._parsear_fecha(fila[9]) if len(fila) > 9 and fila[9] else None
-            
-            # Procesar booleanos (renovado/facturado)
-            cert_renovado = self._parsear_booleano(fila[4]) if len(fila) > 4 else 0
-            cert_facturado = self._parsear_booleano(fila[5]) if len(fila) > 5 else 0
-            reso_renovado = self._parsear_booleano(fila[7]) if len(fila) > 7 else 0
-            reso_facturado = self._parsear_booleano(fila[8]) if len(fila) > 8 else 0
-            doc_renovado = self._parsear_booleano(fila[10]) if len(fila) > 10 else 0
-            doc_facturado = self._parsear_booleano(fila[11]) if len(fila) > 11 else 0
-            
-            # Crear módulos
-            from app.models.empresa import ModuloEmpresa
-            from datetime import datetime
-            
-            certificado = ModuloEmpresa(
-                activo=1 if cert_venc else 0,
-                fecha_final=datetime.strptime(cert_venc, '%Y-%m-%d') if cert_venc else None,
-                renovado=cert_renovado,
-                facturado=cert_facturado
-            )
-            
-            resolucion = ModuloEmpresa(
-                activo=1 if reso_venc else 0,
-                fecha_final=datetime.strptime(reso_venc, '%Y-%m-%d') if reso_venc else None,
-                renovado=reso_renovado,
-                facturado=reso_facturado
-            )
-            
-            documento = ModuloEmpresa(
-                activo=1 if doc_venc else 0,
-                fecha_final=datetime.strptime(doc_venc, '%Y-%m-%d') if doc_venc else None,
-                renovado=doc_renovado,
-                facturado=doc_facturado
-            )
+            # Crear módulos (activos si tienen fecha de vencimiento)
+            modulos = {}
+            for modulo, col_vencimiento, col_renovado, col_facturado in self.COLUMNAS_MODULOS:
+                fecha_final = valores[col_vencimiento]
+                modulos[modulo] = ModuloEmpresa(
+                    activo=1 if fecha_final else 0,
+                    fecha_final=fecha_final,
+                    renovado=valores[col_renovado],
+                    facturado=valores[col_facturado]
+                )
             
             # Crear empresa con estructura correcta
             empresa = Empresa(
@@ -166,9 +383,7 @@ class ImportacionService:
                 nombre=nombre,
                 tipo='Persona Jurídica',  # Valor por defecto
                 estado=estado,
-                certificado=certificado,
-                resolucion=resolucion,
-                documento=documento
+                **modulos
             )
             
             return empresa, errores
@@ -177,159 +392,134 @@ class ImportacionService:
             errores.append(f'Fila {numero_fila}: Error al procesar - {str(e)}')
             return None, errores
     
-    def _parsear_fecha(self, valor: Any) -> str:
+    def _crear_parseadores(self) -> Dict[str, ParseadorColumna]:
         """
-        Parsea un valor a formato de fecha YYYY-MM-DD
+        Crea los parseadores de fechas y booleanos de una importación
+        (uno por columna, vigentes durante todo el archivo)
+        
+        Returns:
+            Diccionario columna -> parseador
+        """
+        return crear_parseadores(
+            [vencimiento for _, vencimiento, _, _ in self.COLUMNAS_MODULOS],
+            [col for _, _, renovado, facturado in self.COLUMNAS_MODULOS for col in (renovado, facturado)]
+        )
+    
+    def _parsear_columnas(self, filas: List[List[Any]],
+                          parseadores: Optional[Dict[str, ParseadorColumna]] = None) -> Dict[str, List[Any]]:
+        """
+        Parsea por columnas las fechas y booleanos de un bloque de filas
         
         Args:
-            valor: Valor a parsear (puede ser datetime, string, etc.)
+            filas: Filas ordenadas según COLUMNAS_ESPERADAS
+            parseadores: Parseadores de la importación en curso (si no se indican se crean nuevos)
             
         Returns:
-            Fecha en formato string o None
+            Diccionario columna -> valores parseados (en el orden de las filas)
         """
-        if not valor:
-            return None
+        if parseadores is None:
+            parseadores = self._crear_parseadores()
         
-        try:
-            # Si ya es un objeto datetime
-            if isinstance(valor, datetime):
-                return valor.strftime('%Y-%m-%d')
-            
-            # Si es string, intentar parsear
-            if isinstance(valor, str):
-                valor = valor.strip()
-                # Intentar varios formatos
-                formatos = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d']
-                for formato in formatos:
-                    try:
-                        fecha = datetime.strptime(valor, formato)
-                        return fecha.strftime('%Y-%m-%d')
-                    except ValueError:
-                        continue
-            
-            return None
-            
-        except Exception:
-            return None
+        columnas = {}
+        for col, parseador in parseadores.items():
+            posicion = self.COLUMNAS_ESPERADAS.index(col)
+            columnas[col] = parseador.parsear([fila[posicion] for fila in filas])
+        return columnas
     
-    def _parsear_booleano(self, valor: Any) -> int:
+    def importar_desde_excel(self, file_content: Union[bytes, BinaryIO],
+                             al_guardar_lote: Optional[Callable[[Dict[str, Any], List[str]], None]] = None) -> Dict[str, Any]:
         """
-        Parsea un valor a booleano (0 o 1)
+        Importa empresas desde un archivo Excel en una sola pasada en streaming:
+        validación de encabezados -> parseo de filas -> guardado por lotes
         
         Args:
-            valor: Valor a parsear
+            file_content: Contenido del archivo Excel o archivo binario abierto
+            al_guardar_lote: Función opcional que recibe los resultados acumulados
+                y los errores nuevos tras guardar cada lote (para informar el progreso)
             
         Returns:
-            0 o 1
+            Diccionario con el resultado de la importación
         """
-        if not valor:
-            return 0
-        
-        if isinstance(valor, bool):
-            return 1 if valor else 0
-        
-        if isinstance(valor, (int, float)):
-            return 1 if valor > 0 else 0
-        
-        if isinstance(valor, str):
-            valor = valor.strip().lower()
-            if valor in ['si', 'sí', 'yes', 'true', '1', 'x']:
-                return 1
-        
-        return 0
+        return self._importar(self._leer_filas_excel(file_content), al_guardar_lote)
     
-    def importar_desde_excel(self, file_content: bytes) -> Dict[str, Any]:
+    def importar_archivo(self, origen: Union[bytes, BinaryIO], nombre_archivo: str,
+                         al_guardar_lote: Optional[Callable[[Dict[str, Any], List[str]], None]] = None) -> Dict[str, Any]:
         """
-        Importa empresas desde un archivo Excel
+        Importa empresas desde un archivo Excel, CSV, Parquet o Arrow según su extensión.
+        Todos los formatos usan las mismas columnas (COLUMNAS_ESPERADAS) y el mismo guardado.
         
         Args:
-            file_content: Contenido del archivo Excel
-            
+            origen: Contenido del archivo o archivo binario abierto
+            nombre_archivo: Nombre o ruta del archivo (para determinar el formato)
+            al_guardar_lote: Función opcional que recibe los resultados acumulados
+                y los errores nuevos tras guardar cada lote (para informar el progreso)
+                
         Returns:
             Diccionario con el resultado de la importación
         """
-        try:
-            # Validar estructura
-            validacion = self.validar_estructura_excel(file_content)
-            if not validacion['success']:
-                return validacion
-            
-            # Cargar workbook
-            wb = openpyxl.load_workbook(BytesIO(file_content))
-            ws = wb.active
-            
-            # Obtener índices de columnas
-            encabezados = [cell.value for cell in ws[1]]
-            indices = {col: encabezados.index(col) for col in self.COLUMNAS_ESPERADAS}
-            
-            # Procesar filas
-            resultados = {
-                'total': 0,
-                'exitosas': 0,
-                'fallidas': 0,
-                'duplicadas': 0,
-                'actualizadas': 0,
-                'errores': [],
-                'empresas_creadas': [],
-                'empresas_actualizadas': []
+        formato = self.formato_de_archivo(nombre_archivo)
+        if not formato:
+            return {
+                'success': False,
+                'error': f'Formato de archivo no soportado. Use: {", ".join(self.FORMATOS_ARCHIVO)}'
             }
             
-            for idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                if not any(row):  # Saltar filas vacías
-                    continue
-                
-                resultados['total'] += 1
-                
-                # Ordenar valores según columnas esperadas
-                fila_ordenada = [row[indices[col]] if indices[col] < len(row) else None 
-                                for col in self.COLUMNAS_ESPERADAS]
-                
-                # Procesar fila
-                empresa, errores = self.procesar_fila(fila_ordenada, idx)
-                
-                if errores:
-                    resultados['errores'].extend(errores)
-                    resultados['fallidas'] += 1
-                    continue
-                
-                if not empresa:
-                    resultados['fallidas'] += 1
-                    continue
+        return self._importar(self._leer_filas(origen, formato), al_guardar_lote)
+    
+    def _importar(self, filas: Iterator[tuple],
+                  al_guardar_lote: Optional[Callable[[Dict[str, Any], List[str]], None]] = None) -> Dict[str, Any]:
+        """
+        Ejecuta la importación sobre un lector de filas:
+        validación de encabezados -> parseo por bloques -> guardado por lotes
+        
+        Args:
+            filas: Generador de filas (la primera son los encabezados)
+            al_guardar_lote: Función opcional llamada tras guardar cada lote (y una vez
+                al terminar) con los resultados acumulados y los errores nuevos desde
+                la llamada anterior
+            
+        Returns:
+            Diccionario con el resultado de la importación. Solo se guardan conteos
+            y los primeros MAX_ERRORES_RESULTADO errores, para que la memoria no
+            crezca con el tamaño del archivo.
+        """
+        resultados = {
+            'total': 0,
+            'exitosas': 0,
+            'fallidas': 0,
+            'duplicadas': 0,
+            'actualizadas': 0,
+            'total_errores': 0,
+            'errores': [],
+            'formatos_detectados': {}
+        }
+        # Errores pendientes de informar a al_guardar_lote (se vacía en cada lote)
+        errores_lote: List[str] = []
+        parseadores = self._crear_parseadores()
+        
+        try:
+            try:
+                indices = self._validar_encabezados(next(filas, None))
                 
-                # Verificar si existe
-                existe = self.repository.exists_by_nit(empresa.nit)
+                empresas = self._parsear_filas(filas, indices, resultados, errores_lote, parseadores)
+                for lote in self._agrupar_en_lotes(empresas, self.TAMANO_LOTE):
+                    self._guardar_lote(lote, resultados, errores_lote)
+                    if al_guardar_lote:
+                        al_guardar_lote(resultados, list(errores_lote))
+                    errores_lote.clear()
                 
-                if existe:
-                    # Actualizar empresa existente
-                    empresa_existente = self.repository.get_by_nit(empresa.nit)
-                    empresa.id = empresa_existente.id
-                    
-                    success = self.repository.update(empresa)
-                    if success:
-                        resultados['actualizadas'] += 1
-                        resultados['empresas_actualizadas'].append({
-                            'nit': empresa.nit,
-                            'razon_social': empresa.nombre
-                        })
-                    else:
-                        resultados['fallidas'] += 1
-                        resultados['errores'].append(
-                            f'Fila {idx}: No se pudo actualizar la empresa {empresa.nit}'
-                        )
-                else:
-                    # Crear nueva empresa
-                    try:
-                        empresa_creada = self.repository.create(empresa)
-                        resultados['exitosas'] += 1
-                        resultados['empresas_creadas'].append({
-                            'nit': empresa_creada.nit,
-                            'razon_social': empresa_creada.nombre
-                        })
-                    except Exception as e:
-                        resultados['fallidas'] += 1
-                        resultados['errores'].append(
-                            f'Fila {idx}: Error al crear empresa - {str(e)}'
-                        )
+                # Conteos y errores de las filas posteriores al último lote
+                if al_guardar_lote:
+                    al_guardar_lote(resultados, list(errores_lote))
+                errores_lote.clear()
+            finally:
+                filas.close()
+            
+            if resultados['total'] == 0:
+                return {
+                    'success': False,
+                    'error': 'El archivo está vacío o no tiene datos'
+                }
             
             return {
                 'success': True,
@@ -339,12 +529,259 @@ class ImportacionService:
                 'datos': resultados
             }
             
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
         except Exception as e:
             return {
                 'success': False,
                 'error': f'Error al importar: {str(e)}'
             }
     
+    def _parsear_filas(self, filas: Iterable[tuple], indices: Dict[str, int],
+                       resultados: Dict[str, Any], errores_lote: List[str],
+                       parseadores: Dict[str, ParseadorColumna]) -> Iterator[Tuple[int, Empresa]]:
+        """
+        Convierte las filas de datos en empresas, registrando las inválidas.
+        Las filas se reúnen en bloques para parsear fechas y booleanos por columna.
+        
+        Args:
+            filas: Filas de datos (sin encabezados), la primera es la fila 2 del archivo
+            indices: Posición de cada columna esperada
+            resultados: Diccionario de resultados donde se cuentan total y fallidas
+            errores_lote: Lista de errores pendientes de informar
+            parseadores: Parseadores por columna de la importación
+            
+        Yields:
+            Tuplas (número de fila, empresa) de las filas válidas
+        """
+        bloque = []
+        
+        for idx, row in enumerate(filas, start=2):
+            if not any(row):  # Saltar filas vacías
+                continue
+            
+            resultados['total'] += 1
+            
+            # Ordenar valores según columnas esperadas
+            fila_ordenada = [row[indices[col]] if indices[col] < len(row) else None
+                            for col in self.COLUMNAS_ESPERADAS]
+            bloque.append((idx, fila_ordenada))
+            
+            if len(bloque) >= self.TAMANO_LOTE:
+                yield from self._procesar_bloque(bloque, resultados, errores_lote, parseadores)
+                bloque = []
+                
+        if bloque:
+            yield from self._procesar_bloque(bloque, resultados, errores_lote, parseadores)
+    
+    def _procesar_bloque(self, bloque: List[Tuple[int, List[Any]]], resultados: Dict[str, Any],
+                         errores_lote: List[str],
+                         parseadores: Dict[str, ParseadorColumna]) -> Iterator[Tuple[int, Empresa]]:
+        """
+        Parsea las columnas de un bloque de filas y crea sus empresas
+        
+        Args:
+            bloque: Tuplas (número de fila, fila ordenada)
+            resultados: Diccionario de resultados donde se cuentan las fallidas
+                y se informa el formato detectado en cada columna de fecha
+            errores_lote: Lista de errores pendientes de informar
+            parseadores: Parseadores por columna de la importación
+            
+        Yields:
+            Tuplas (número de fila, empresa) de las filas válidas
+        """
+        columnas = self._parsear_columnas([fila for _, fila in bloque], parseadores)
+        resultados['formatos_detectados'] = {
+            col: parseador.reporte()
+            for col, parseador in parseadores.items() if isinstance(parseador, ParseadorFechas)
+        }
+        
+        for posicion, (idx, fila) in enumerate(bloque):
+            valores = {col: parseados[posicion] for col, parseados in columnas.items()}
+            empresa, errores = self._construir_empresa(fila, valores, idx)
+            
+            if errores:
+                self._registrar_errores(resultados, errores_lote, errores)
+                resultados['fallidas'] += 1
+                continue
+            
+            if not empresa:
+                resultados['fallidas'] += 1
+                continue
+            
+            yield idx, empresa
+    
+    def _registrar_errores(self, resultados: Dict[str, Any], errores_lote: List[str],
+                           errores: List[str]):
+        """
+        Cuenta errores de importación, los agrega a los pendientes de informar
+        y conserva en el resultado solo los primeros MAX_ERRORES_RESULTADO
+        
+        Args:
+            resultados: Diccionario de resultados de la importación
+            errores_lote: Lista de errores pendientes de informar
+            errores: Errores nuevos
+        """
+        resultados['total_errores'] += len(errores)
+        errores_lote.extend(errores)
+        
+        disponibles = self.MAX_ERRORES_RESULTADO - len(resultados['errores'])
+        if disponibles > 0:
+            resultados['errores'].extend(errores[:disponibles])
+    
+    def _agrupar_en_lotes(self, empresas: Iterable[Tuple[int, Empresa]],
+                          tamano: int) -> Iterator[List[Tuple[int, Empresa]]]:
+        """
+        Agrupa las empresas en lotes para guardarlas.
+        Si un NIT se repite, el lote se cierra antes para que la fila posterior
+        actualice a la anterior, igual que al procesar fila por fila.
+        
+        Args:
+            empresas: Tuplas (número de fila, empresa)
+            tamano: Tamaño máximo de cada lote
+            
+        Yields:
+            Listas de tuplas con NIT únicos
+        """
+        lote = []
+        nits = set()
+        
+        for idx, empresa in empresas:
+            if empresa.nit in nits or len(lote) >= tamano:
+                yield lote
+                lote = []
+                nits = set()
+            lote.append((idx, empresa))
+            nits.add(empresa.nit)
+        
+        if lote:
+            yield lote
+    
+    def _guardar_lote(self, lote: List[Tuple[int, Empresa]], resultados: Dict[str, Any],
+                      errores_lote: List[str]):
+        """
+        Crea o actualiza un lote de empresas con un upsert masivo y acumula
+        los conteos por fila en el resultado de la importación
+        
+        Args:
+            lote: Tuplas (número de fila, empresa) con NIT únicos
+            resultados: Diccionario de resultados a actualizar
+            errores_lote: Lista de errores pendientes de informar
+        """
+        if not lote:
+            return
+        
+        guardadas = self.repository.upsert_many([empresa for _, empresa in lote])
+        
+        for (idx, empresa), guardada in zip(lote, guardadas):
+            if guardada['error']:
+                resultados['fallidas'] += 1
+                self._registrar_errores(resultados, errores_lote, [
+                    f'Fila {idx}: Error al guardar empresa {empresa.nit} - {guardada["error"]}'
+                ])
+            elif guardada['creada']:
+                resultados['exitosas'] += 1
+            else:
+                resultados['actualizadas'] += 1
+    
+    def exportar(self, formato: str = 'xlsx', estado: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Exporta las empresas con las columnas de la plantilla, de modo que el archivo
+        pueda volver a importarse. El contenido se genera en bloques y en memoria constante.
+        
+        Args:
+            formato: 'xlsx' o 'csv'
+            estado: Estado de las empresas a exportar (todas si es None)
+            
+        Returns:
+            Generador de bloques de bytes del archivo
+            
+        Raises:
+            ValueError: Si el formato no está soportado
+        """
+        if formato not in self.FORMATOS_EXPORTACION:
+            raise ValueError(f'Formato de exportación no soportado. Use: {", ".join(self.FORMATOS_EXPORTACION)}')
+        
+        if formato == 'csv':
+            return self._exportar_csv(estado)
+        return self._exportar_excel(estado)
+    
+    def _fila_exportacion(self, row: tuple, fechas_como_texto: bool) -> List[Any]:
+        """
+        Convierte una fila de la base de datos al formato de la plantilla
+        (fechas sin hora y booleanos como SI/NO)
+        
+        Args:
+            row: Fila en el orden de COLUMNAS_ESPERADAS
+            fechas_como_texto: Si es True las fechas se escriben como YYYY-MM-DD
+            
+        Returns:
+            Lista de valores de la fila
+        """
+        fila = list(row)
+        for posicion in self.POSICIONES_FECHA:
+            if fila[posicion] is not None:
+                fecha = fila[posicion].date()
+                fila[posicion] = fecha.isoformat() if fechas_como_texto else fecha
+        for posicion in self.POSICIONES_BOOLEANAS:
+            fila[posicion] = 'SI' if fila[posicion] else 'NO'
+        return fila
+    
+    def _exportar_excel(self, estado: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Genera el archivo Excel en modo write_only (las filas se escriben a disco sin
+        quedarse en memoria) y lo entrega por bloques
+        
+        Args:
+            estado: Estado de las empresas a exportar
+            
+        Yields:
+            Bloques de bytes del archivo xlsx
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Empresas')
+        ws.append(self.COLUMNAS_ESPERADAS)
+        
+        for row in self.repository.iter_exportacion(estado):
+            ws.append(self._fila_exportacion(row, fechas_como_texto=False))
+        
+        with tempfile.TemporaryFile() as salida:
+            wb.save(salida)
+            salida.seek(0)
+            while True:
+                bloque = salida.read(self.TAMANO_BLOQUE_EXPORTACION)
+                if not bloque:
+                    break
+                yield bloque
+    
+    def _exportar_csv(self, estado: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Genera el archivo CSV (UTF-8 con BOM para que Excel respete los acentos)
+        entregándolo a medida que se leen las filas
+        
+        Args:
+            estado: Estado de las empresas a exportar
+            
+        Yields:
+            Bloques de bytes del archivo csv
+        """
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        buffer.write('\ufeff')
+        writer.writerow(self.COLUMNAS_ESPERADAS)
+        
+        for row in self.repository.iter_exportacion(estado):
+            writer.writerow(self._fila_exportacion(row, fechas_como_texto=True))
+            if buffer.tell() >= self.TAMANO_BLOQUE_EXPORTACION:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        
+        yield buffer.getvalue().encode('utf-8')
+    
     def generar_plantilla_excel(self) -> bytes:
         """
         Genera un archivo Excel de plantilla con ejemplos
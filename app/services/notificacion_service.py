@@ -4,7 +4,6 @@ Servicio de notificaciones
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
 from app.repositories.empresa_repository import EmpresaRepository
-from app.models.empresa import Empresa
 
 
 class NotificacionService:
@@ -12,6 +11,13 @@ class NotificacionService:
     Servicio que maneja las notificaciones del sistema
     """
 
+    # Nombre descriptivo de cada módulo para las alertas
+    NOMBRES_MODULOS = {
+        'certificado': 'Certificado de Facturación Electrónica',
+        'resolucion': 'Resolución de Facturación',
+        'documento': 'Resolución Documentos Soporte'
+    }
+
     def __init__(self, repository: EmpresaRepository):
         """
         Inicializa el servicio con un repositorio
@@ -27,6 +33,9 @@ class NotificacionService:
         1. Vencimiento próximo (según fecha de notificación)
         2. Renovado pero no facturado
         
+        El filtrado, los días restantes y la prioridad se calculan en SQL;
+        aquí solo se agrupan las alertas por empresa.
+        
         Args:
             dias_anticipacion: Días de anticipación para notificar (no usado, usa fecha_notificacion)
             
@@ -34,154 +43,40 @@ class NotificacionService:
             Diccionario con las empresas que requieren notificación
         """
         try:
-            empresas = self.repository.get_all({
-                'estado': 'activo',
-                'activos_solamente': True
-            })
-
             hoy = datetime.now()
-            notificaciones = []
+            alertas_modulos = self.repository.get_alertas_notificacion()
 
-            for empresa in empresas:
-                alertas = []
-
-                # Verificar certificado
-                if empresa.certificado.activo == 1:
-                    # Solo mostrar si NO está renovado Y facturado (completamente resuelto)
-                    if not (empresa.certificado.renovado == 1 and empresa.certificado.facturado == 1):
-                        # Alerta por fecha de notificación alcanzada
-                        if empresa.certificado.fecha_final:
-                            notif_date = self._parse_date(empresa.certificado.notificacion)
-                            if notif_date and hoy >= notif_date:
-                                dias_restantes = (empresa.certificado.fecha_final - hoy).days
-                                prioridad = self._calcular_prioridad(dias_restantes)
-                                
-                                alertas.append({
-                                    'tipo': 'certificado',
-                                    'modulo': 'Certificado de Facturación Electrónica',
-                                    'fecha_vencimiento': empresa.certificado.fecha_final.isoformat(),
-                                    'fecha_notificacion': empresa.certificado.notificacion,
-                                    'dias_restantes': max(0, dias_restantes),
-                                    'renovado': empresa.certificado.renovado == 1,
-                                    'facturado': empresa.certificado.facturado == 1,
-                                    'prioridad': prioridad,
-                                    'motivo': 'Próximo a vencer'
-                                })
-                        
-                        # Alerta por renovado pero no facturado
-                        if empresa.certificado.renovado == 1 and empresa.certificado.facturado == 0:
-                            # Si ya existe una alerta de vencimiento, actualizar motivo
-                            alerta_existente = next((a for a in alertas if a['tipo'] == 'certificado'), None)
-                            if alerta_existente:
-                                alerta_existente['motivo'] = 'Próximo a vencer y renovado sin facturar'
-                                alerta_existente['prioridad'] = 'CRITICA'
-                            else:
-                                alertas.append({
-                                    'tipo': 'certificado',
-                                    'modulo': 'Certificado de Facturación Electrónica',
-                                    'fecha_vencimiento': empresa.certificado.fecha_final.isoformat() if empresa.certificado.fecha_final else None,
-                                    'fecha_notificacion': empresa.certificado.notificacion,
-                                    'dias_restantes': (empresa.certificado.fecha_final - hoy).days if empresa.certificado.fecha_final else None,
-                                    'renovado': True,
-                                    'facturado': False,
-                                    'prioridad': 'ALTA',
-                                    'motivo': 'Renovado pero no facturado'
-                                })
-
-                # Verificar resolución
-                if empresa.resolucion.activo == 1:
-                    # Solo mostrar si NO está renovado Y facturado (completamente resuelto)
-                    if not (empresa.resolucion.renovado == 1 and empresa.resolucion.facturado == 1):
-                        # Alerta por fecha de notificación alcanzada
-                        if empresa.resolucion.fecha_final:
-                            notif_date = self._parse_date(empresa.resolucion.notificacion)
-                            if notif_date and hoy >= notif_date:
-                                dias_restantes = (empresa.resolucion.fecha_final - hoy).days
-                                prioridad = self._calcular_prioridad(dias_restantes)
-                                
-                                alertas.append({
-                                    'tipo': 'resolucion',
-                                    'modulo': 'Resolución de Facturación',
-                                    'fecha_vencimiento': empresa.resolucion.fecha_final.isoformat(),
-                                    'fecha_notificacion': empresa.resolucion.notificacion,
-                                    'dias_restantes': max(0, dias_restantes),
-                                    'renovado': empresa.resolucion.renovado == 1,
-                                    'facturado': empresa.resolucion.facturado == 1,
-                                    'prioridad': prioridad,
-                                    'motivo': 'Próximo a vencer'
-                                })
-                        
-                        # Alerta por renovado pero no facturado
-                        if empresa.resolucion.renovado == 1 and empresa.resolucion.facturado == 0:
-                            alerta_existente = next((a for a in alertas if a['tipo'] == 'resolucion'), None)
-                            if alerta_existente:
-                                alerta_existente['motivo'] = 'Próximo a vencer y renovado sin facturar'
-                                alerta_existente['prioridad'] = 'CRITICA'
-                            else:
-                                alertas.append({
-                                    'tipo': 'resolucion',
-                                    'modulo': 'Resolución de Facturación',
-                                    'fecha_vencimiento': empresa.resolucion.fecha_final.isoformat() if empresa.resolucion.fecha_final else None,
-                                    'fecha_notificacion': empresa.resolucion.notificacion,
-                                    'dias_restantes': (empresa.resolucion.fecha_final - hoy).days if empresa.resolucion.fecha_final else None,
-                                    'renovado': True,
-                                    'facturado': False,
-                                    'prioridad': 'ALTA',
-                                    'motivo': 'Renovado pero no facturado'
-                                })
-
-                # Verificar documento
-                if empresa.documento.activo == 1:
-                    # Solo mostrar si NO está renovado Y facturado (completamente resuelto)
-                    if not (empresa.documento.renovado == 1 and empresa.documento.facturado == 1):
-                        # Alerta por fecha de notificación alcanzada
-                        if empresa.documento.fecha_final:
-                            notif_date = self._parse_date(empresa.documento.notificacion)
-                            if notif_date and hoy >= notif_date:
-                                dias_restantes = (empresa.documento.fecha_final - hoy).days
-                                prioridad = self._calcular_prioridad(dias_restantes)
-                                
-                                alertas.append({
-                                    'tipo': 'documento',
-                                    'modulo': 'Resolución Documentos Soporte',
-                                    'fecha_vencimiento': empresa.documento.fecha_final.isoformat(),
-                                    'fecha_notificacion': empresa.documento.notificacion,
-                                    'dias_restantes': max(0, dias_restantes),
-                                    'renovado': empresa.documento.renovado == 1,
-                                    'facturado': empresa.documento.facturado == 1,
-                                    'prioridad': prioridad,
-                                    'motivo': 'Próximo a vencer'
-                                })
-                        
-                        # Alerta por renovado pero no facturado
-                        if empresa.documento.renovado == 1 and empresa.documento.facturado == 0:
-                            alerta_existente = next((a for a in alertas if a['tipo'] == 'documento'), None)
-                            if alerta_existente:
-                                alerta_existente['motivo'] = 'Próximo a vencer y renovado sin facturar'
-                                alerta_existente['prioridad'] = 'CRITICA'
-                            else:
-                                alertas.append({
-                                    'tipo': 'documento',
-                                    'modulo': 'Resolución Documentos Soporte',
-                                    'fecha_vencimiento': empresa.documento.fecha_final.isoformat() if empresa.documento.fecha_final else None,
-                                    'fecha_notificacion': empresa.documento.notificacion,
-                                    'dias_restantes': (empresa.documento.fecha_final - hoy).days if empresa.documento.fecha_final else None,
-                                    'renovado': True,
-                                    'facturado': False,
-                                    'prioridad': 'ALTA',
-                                    'motivo': 'Renovado pero no facturado'
-                                })
+            # Agrupar las alertas por empresa (vienen ordenadas por empresa y módulo)
+            notificaciones = []
+            por_empresa = {}
 
-                if alertas:
-                    notificaciones.append({
+            for fila in alertas_modulos:
+                notif = por_empresa.get(fila['id'])
+                if notif is None:
+                    notif = {
                         'empresa': {
-                            'nit': empresa.nit,
-                            'nombre': empresa.nombre,
-                            'tipo': empresa.tipo
+                            'nit': fila['nit'],
+                            'nombre': fila['nombre'],
+                            'tipo': fila['empresa_tipo']
                         },
-                        'alertas': alertas,
-                        'total_alertas': len(alertas)
-                    })
+                        'alertas': [],
+                        'total_alertas': 0
+                    }
+                    por_empresa[fila['id']] = notif
+                    notificaciones.append(notif)
+
+                notif['alertas'].append({
+                    'tipo': fila['modulo'],
+                    'modulo': self.NOMBRES_MODULOS[fila['modulo']],
+                    'fecha_vencimiento': fila['fecha_final'].isoformat() if fila['fecha_final'] else None,
+                    'fecha_notificacion': fila['notificacion'].isoformat() if fila['notificacion'] else None,
+                    'dias_restantes': fila['dias_restantes'],
+                    'renovado': fila['renovado'] == 1,
+                    'facturado': fila['facturado'] == 1,
+                    'prioridad': fila['prioridad'],
+                    'motivo': fila['motivo']
+                })
+                notif['total_alertas'] += 1
 
             # Ordenar por prioridad y días restantes
             prioridad_order = {'CRITICA': 0, 'ALTA': 1, 'MEDIA': 2}
@@ -196,7 +91,7 @@ class NotificacionService:
                 'success': True,
                 'data': notificaciones,
                 'total': len(notificaciones),
-                'fecha_consulta': datetime.now().isoformat(),
+                'fecha_consulta': hoy.isoformat(),
                 'dias_anticipacion': dias_anticipacion
             }
 
@@ -207,26 +102,6 @@ class NotificacionService:
                 'data': []
             }
 
-    def _parse_date(self, date_str: str) -> datetime:
-        """Parsea una fecha en formato ISO string a datetime"""
-        if not date_str:
-            return None
-        try:
-            return datetime.fromisoformat(date_str)
-        except:
-            return None
-
-    def _calcular_prioridad(self, dias_restantes: int) -> str:
-        """Calcula la prioridad según días restantes"""
-        if dias_restantes <= 5:
-            return 'CRITICA'
-        elif dias_restantes <= 30:
-            return 'ALTA'
-        elif dias_restantes <= 60:
-            return 'MEDIA'
-        else:
-            return 'MEDIA'  # Más de 60 días también es media
-
     def obtener_vencimientos_mes_actual(self) -> Dict[str, Any]:
         """
         Obtiene todas las empresas con vencimientos en el mes actual
@@ -235,11 +110,6 @@ class NotificacionService:
             Diccionario con vencimientos del mes
         """
         try:
-            empresas = self.repository.get_all({
-                'estado': 'activo',
-                'activos_solamente': True
-            })
-
             # Calcular primer y último día del mes actual
             hoy = datetime.now()
             primer_dia_mes = hoy.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -252,43 +122,28 @@ class NotificacionService:
             
             ultimo_dia_mes = ultimo_dia_mes.replace(hour=23, minute=59, second=59)
 
+            # Solo empresas con algún módulo activo que vence en el mes (índice de empresa_modulos)
+            empresas = self.repository.get_all({
+                'estado': 'activo',
+                'vencimiento_desde': primer_dia_mes,
+                'vencimiento_hasta': ultimo_dia_mes
+            })
+
             vencimientos = []
 
             for empresa in empresas:
                 vencimientos_empresa = []
 
-                # Certificado
-                if (empresa.certificado.activo == 1 and 
-                    empresa.certificado.fecha_final and
-                    primer_dia_mes <= empresa.certificado.fecha_final <= ultimo_dia_mes):
-                    vencimientos_empresa.append({
-                        'tipo': 'certificado',
-                        'fecha': empresa.certificado.fecha_final.isoformat(),
-                        'renovado': empresa.certificado.renovado == 1,
-                        'facturado': empresa.certificado.facturado == 1
-                    })
-
-                # Resolución
-                if (empresa.resolucion.activo == 1 and 
-                    empresa.resolucion.fecha_final and
-                    primer_dia_mes <= empresa.resolucion.fecha_final <= ultimo_dia_mes):
-                    vencimientos_empresa.append({
-                        'tipo': 'resolucion',
-                        'fecha': empresa.resolucion.fecha_final.isoformat(),
-                        'renovado': empresa.resolucion.renovado == 1,
-                        'facturado': empresa.resolucion.facturado == 1
-                    })
-
-                # Documento
-                if (empresa.documento.activo == 1 and 
-                    empresa.documento.fecha_final and
-                    primer_dia_mes <= empresa.documento.fecha_final <= ultimo_dia_mes):
-                    vencimientos_empresa.append({
-                        'tipo': 'documento',
-                        'fecha': empresa.documento.fecha_final.isoformat(),
-                        'renovado': empresa.documento.renovado == 1,
-                        'facturado': empresa.documento.facturado == 1
-                    })
+                for tipo, modulo in empresa.modulos().items():
+                    if (modulo.activo == 1 and
+                        modulo.fecha_final and
+                        primer_dia_mes <= modulo.fecha_final <= ultimo_dia_mes):
+                        vencimientos_empresa.append({
+                            'tipo': tipo,
+                            'fecha': modulo.fecha_final.isoformat(),
+                            'renovado': modulo.renovado == 1,
+                            'facturado': modulo.facturado == 1
+                        })
 
                 if vencimientos_empresa:
                     vencimientos.append({
@@ -0,0 +1,245 @@
+"""
+Parseo por columnas de los valores importados (fechas y booleanos)
+Cada parseador atiende una sola columna durante toda la importación: detecta
+el formato una vez y recuerda los valores ya convertidos.
+"""
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ParseadorColumna(ABC):
+    """
+    Parseador base de una columna con memoización de valores.
+    Muchas filas comparten el mismo valor (p. ej. la misma fecha de vencimiento),
+    así que cada valor distinto se convierte una sola vez por importación.
+    """
+
+    # Valores distintos recordados como máximo (evita crecer sin límite con columnas muy variadas)
+    MAX_MEMO = 100000
+
+    def __init__(self, columna: str):
+        """
+        Inicializa el parseador
+
+        Args:
+            columna: Nombre de la columna (para el reporte)
+        """
+        self.columna = columna
+        self._memo: Dict[Any, Any] = {}
+
+    def parsear(self, valores: List[Any]) -> List[Any]:
+        """
+        Convierte un bloque de valores de la columna
+
+        Args:
+            valores: Valores crudos en el orden de las filas
+
+        Returns:
+            Valores convertidos en el mismo orden
+        """
+        memo = self._memo
+        convertir = self._convertir
+        resultado = []
+        for valor in valores:
+            try:
+                resultado.append(memo[valor])
+            except KeyError:
+                convertido = convertir(valor)
+                if len(memo) < self.MAX_MEMO:
+                    memo[valor] = convertido
+                resultado.append(convertido)
+            except TypeError:
+                # Valor no hashable: se convierte sin memoizar
+                resultado.append(convertir(valor))
+        return resultado
+
+    @abstractmethod
+    def _convertir(self, valor: Any) -> Any:
+        """Convierte un único valor (lo implementa cada parseador)"""
+        pass
+
+    def reporte(self) -> Dict[str, Any]:
+        """
+        Resume lo aprendido de la columna
+
+        Returns:
+            Diccionario con el número de valores distintos convertidos
+        """
+        return {'valores_distintos': len(self._memo)}
+
+
+class ParseadorFechas(ParseadorColumna):
+    """
+    Parseador de columnas de fecha.
+    El formato de los textos se detecta con el primer valor reconocible y se usa
+    para el resto de la columna; solo si un valor no encaja se prueban los demás.
+    """
+
+    # Formatos aceptados: (formato, separador, posición del año en el texto)
+    FORMATOS: List[Tuple[str, str, int]] = [
+        ('%Y-%m-%d', '-', 0),
+        ('%d/%m/%Y', '/', 2),
+        ('%d-%m-%Y', '-', 2),
+        ('%Y/%m/%d', '/', 0)
+    ]
+
+    # Formato reportado cuando la columna trae fechas nativas (Excel, Parquet, Arrow)
+    FORMATO_NATIVO = 'fecha nativa'
+
+    def __init__(self, columna: str):
+        """
+        Inicializa el parseador sin formato detectado
+
+        Args:
+            columna: Nombre de la columna (para el reporte)
+        """
+        super().__init__(columna)
+        self.formato: Optional[str] = None
+        self._formato_actual: Optional[Tuple[str, str, int]] = None
+        self._nativas = 0
+        self._otros_formatos = 0
+        self._invalidas = 0
+
+    def _convertir(self, valor: Any) -> Optional[datetime]:
+        """
+        Convierte un valor a fecha (sin hora)
+
+        Args:
+            valor: datetime, date o texto
+
+        Returns:
+            Fecha como datetime a medianoche o None si no es una fecha válida
+        """
+        if not valor:
+            return None
+
+        if isinstance(valor, date):
+            self._nativas += 1
+            return datetime(valor.year, valor.month, valor.day)
+
+        if not isinstance(valor, str):
+            self._invalidas += 1
+            return None
+
+        texto = valor.strip()
+
+        # Camino rápido: el formato ya detectado para la columna
+        if self._formato_actual is not None:
+            fecha = self._parsear_con(texto, self._formato_actual)
+            if fecha is not None:
+                return fecha
+
+        for formato in self.FORMATOS:
+            if formato is self._formato_actual:
+                continue
+            fecha = self._parsear_con(texto, formato)
+            if fecha is not None:
+                if self._formato_actual is None:
+                    self._formato_actual = formato
+                    self.formato = formato[0]
+                else:
+                    self._otros_formatos += 1
+                return fecha
+
+        self._invalidas += 1
+        return None
+
+    @staticmethod
+    def _parsear_con(texto: str, formato: Tuple[str, str, int]) -> Optional[datetime]:
+        """
+        Interpreta un texto con un formato dado sin pasar por strptime
+
+        Args:
+            texto: Texto de la fecha
+            formato: Tupla (formato, separador, posición del año)
+
+        Returns:
+            Fecha o None si el texto no corresponde al formato
+        """
+        _, separador, posicion_anio = formato
+        partes = texto.split(separador)
+        if len(partes) != 3 or not all(parte.isdigit() for parte in partes):
+            return None
+
+        if posicion_anio == 0:
+            anio, mes, dia = partes
+        else:
+            dia, mes, anio = partes
+
+        if len(anio) != 4 or len(mes) > 2 or len(dia) > 2:
+            return None
+
+        try:
+            return datetime(int(anio), int(mes), int(dia))
+        except ValueError:
+            return None
+
+    def reporte(self) -> Dict[str, Any]:
+        """
+        Resume el formato detectado para la columna
+
+        Returns:
+            Diccionario con formato, fechas nativas, valores en otros formatos e inválidos
+        """
+        formato = self.formato
+        if formato is None and self._nativas:
+            formato = self.FORMATO_NATIVO
+
+        return {
+            'formato': formato,
+            'fechas_nativas': self._nativas,
+            'otros_formatos': self._otros_formatos,
+            'invalidas': self._invalidas,
+            **super().reporte()
+        }
+
+
+class ParseadorBooleanos(ParseadorColumna):
+    """Parseador de columnas SI/NO a 0 o 1"""
+
+    VALORES_VERDADEROS = frozenset(['si', 'sí', 'yes', 'true', '1', 'x'])
+
+    def _convertir(self, valor: Any) -> int:
+        """
+        Convierte un valor a booleano (0 o 1)
+
+        Args:
+            valor: Valor a convertir
+
+        Returns:
+            0 o 1
+        """
+        if not valor:
+            return 0
+
+        if isinstance(valor, bool):
+            return 1 if valor else 0
+
+        if isinstance(valor, (int, float)):
+            return 1 if valor > 0 else 0
+
+        if isinstance(valor, str):
+            return 1 if valor.strip().lower() in self.VALORES_VERDADEROS else 0
+
+        return 0
+
+
+def crear_parseadores(columnas_fecha: List[str],
+                      columnas_booleanas: List[str]) -> Dict[str, ParseadorColumna]:
+    """
+    Crea un parseador por columna para una importación
+
+    Args:
+        columnas_fecha: Columnas que contienen fechas
+        columnas_booleanas: Columnas que contienen SI/NO
+
+    Returns:
+        Diccionario columna -> parseador
+    """
+    parseadores: Dict[str, ParseadorColumna] = {}
+    for columna in columnas_fecha:
+        parseadores[columna] = ParseadorFechas(columna)
+    for columna in columnas_booleanas:
+        parseadores[columna] = ParseadorBooleanos(columna)
+    return parseadores
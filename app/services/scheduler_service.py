@@ -14,7 +14,6 @@ from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
 from app.config.settings import Settings
-from app.repositories.trigger_repository import TriggerRepository
 from app.services.trigger_service import TriggerService
 from app.services.email_service import EmailService
 from app.services.notificacion_service import NotificacionService
@@ -28,21 +27,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Job de refresco periódico del snapshot del dashboard
+DASHBOARD_JOB_ID = 'dashboard_snapshot'
+
+# Job de limpieza periódica de tokens de sesión vencidos
+SESIONES_JOB_ID = 'limpieza_sesiones'
+
 
 class TriggerScheduler:
     """Gestor de ejecución automática de triggers"""
     
-    def __init__(self):
-        """Inicializa el scheduler"""
+    def __init__(self, db_factory: Optional[DatabaseFactory] = None):
+        """
+        Inicializa el scheduler
+        
+        Args:
+            db_factory: Factory compartido (reutiliza su pool de conexiones)
+        """
         self.scheduler = BackgroundScheduler(timezone='America/Bogota')
         self.settings = Settings.from_env()
-        self.trigger_repository = TriggerRepository(
-            host=self.settings.DB_HOST,
-            port=self.settings.DB_PORT,
-            database=self.settings.DB_NAME,
-            user=self.settings.DB_USER,
-            password=self.settings.DB_PASSWORD
-        )
+        self.db_factory = db_factory or DatabaseFactory(self.settings)
+        self.trigger_repository = self.db_factory.create_trigger_repository()
+        self.empresa_repository = self.db_factory.create_empresa_repository()
         self.trigger_service = TriggerService(self.trigger_repository)
         self.is_running = False
         
@@ -58,6 +64,12 @@ class TriggerScheduler:
             # Cargar y programar todos los triggers activos
             self._load_all_triggers()
             
+            # Refresco periódico del snapshot del dashboard (primera ejecución inmediata)
+            self._schedule_dashboard_refresh()
+            
+            # Limpieza periódica de tokens de sesión vencidos
+            self._schedule_limpieza_sesiones()
+            
             # Iniciar el scheduler
             self.scheduler.start()
             self.is_running = True
@@ -206,6 +218,50 @@ class TriggerScheduler:
         except Exception as e:
             logger.error(f"Error programando trigger '{trigger.get('nombre')}': {str(e)}")
     
+    def _schedule_dashboard_refresh(self):
+        """Programa el refresco completo y periódico del snapshot del dashboard"""
+        minutos = self.settings.DASHBOARD_REFRESH_MINUTES
+        
+        self.scheduler.add_job(
+            func=self._refresh_dashboard_snapshot,
+            trigger=IntervalTrigger(minutes=minutos),
+            id=DASHBOARD_JOB_ID,
+            name='Refresco snapshot dashboard',
+            next_run_time=datetime.now(self.scheduler.timezone),
+            replace_existing=True
+        )
+        logger.info(f"  • Snapshot dashboard: cada {minutos} minuto(s)")
+    
+    def _refresh_dashboard_snapshot(self):
+        """Recalcula el snapshot del dashboard (vencimientos y prioridades cambian con los días)"""
+        try:
+            fecha_referencia = self.empresa_repository.refrescar_snapshot_dashboard()
+            logger.info(f"✓ Snapshot dashboard actualizado ({fecha_referencia.isoformat()})")
+        except Exception as e:
+            logger.error(f"⚠️ Error refrescando snapshot dashboard: {str(e)}")
+    
+    def _schedule_limpieza_sesiones(self):
+        """Programa la eliminación periódica de los tokens de sesión vencidos"""
+        minutos = self.settings.TOKEN_CLEANUP_MINUTES
+        
+        self.scheduler.add_job(
+            func=self._limpiar_sesiones,
+            trigger=IntervalTrigger(minutes=minutos),
+            id=SESIONES_JOB_ID,
+            name='Limpieza de sesiones vencidas',
+            replace_existing=True
+        )
+        logger.info(f"  • Limpieza de sesiones: cada {minutos} minuto(s)")
+    
+    def _limpiar_sesiones(self):
+        """Elimina los tokens vencidos del almacén de sesiones (compartido con AuthService)"""
+        try:
+            eliminados = self.db_factory.create_token_store().eliminar_expirados()
+            if eliminados:
+                logger.info(f"✓ {eliminados} sesión(es) vencida(s) eliminada(s)")
+        except Exception as e:
+            logger.error(f"⚠️ Error limpiando sesiones vencidas: {str(e)}")
+    
     def _parse_hora(self, hora_str: str) -> tuple:
         """
         Parsea string de hora a tupla (hora, minuto)
@@ -271,10 +327,8 @@ class TriggerScheduler:
                 self._registrar_ejecucion(trigger_id, estado, 0, 0, error_mensaje)
                 return
             
-            # Inicializar servicios
-            db_factory = DatabaseFactory(self.settings)
-            repository = db_factory.create_empresa_repository()
-            notif_service = NotificacionService(repository)
+            # Inicializar servicios (reutilizando el repositorio y su pool)
+            notif_service = NotificacionService(self.empresa_repository)
             email_service = EmailService(smtp_user, smtp_password)
             
             # Obtener notificaciones según prioridades del trigger
@@ -382,9 +436,10 @@ class TriggerScheduler:
         """Recarga todos los triggers (útil cuando se actualizan)"""
         logger.info("Recargando triggers...")
         
-        # Limpiar todos los jobs existentes
+        # Limpiar los jobs de triggers (el refresco del dashboard se conserva)
         for job in self.scheduler.get_jobs():
-            self.scheduler.remove_job(job.id)
+            if job.id.startswith('trigger_'):
+                self.scheduler.remove_job(job.id)
         
         # Recargar
         self._load_all_triggers()
@@ -417,19 +472,29 @@ class TriggerScheduler:
 _scheduler_instance: Optional[TriggerScheduler] = None
 
 
-def get_scheduler() -> TriggerScheduler:
-    """Obtiene o crea la instancia global del scheduler"""
+def get_scheduler(db_factory: Optional[DatabaseFactory] = None) -> TriggerScheduler:
+    """
+    Obtiene o crea la instancia global del scheduler
+    
+    Args:
+        db_factory: Factory compartido a usar si la instancia aún no existe
+    """
     global _scheduler_instance
     
     if _scheduler_instance is None:
-        _scheduler_instance = TriggerScheduler()
+        _scheduler_instance = TriggerScheduler(db_factory)
     
     return _scheduler_instance
 
 
-def start_scheduler():
-    """Inicia el scheduler global"""
-    scheduler = get_scheduler()
+def start_scheduler(db_factory: Optional[DatabaseFactory] = None):
+    """
+    Inicia el scheduler global
+    
+    Args:
+        db_factory: Factory compartido (reutiliza su pool de conexiones)
+    """
+    scheduler = get_scheduler(db_factory)
     if not scheduler.is_running:
         scheduler.start()
 
@@ -225,7 +225,7 @@ class TriggerService:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
-    def _calcular_proxima_ejecucion(self, trigger: Trigger) -> str:
+    def _calcular_proxima_ejecucion(self, trigger: Trigger) -> datetime:
         """
         Calcula la próxima fecha/hora de ejecución
         
@@ -233,7 +233,7 @@ class TriggerService:
             trigger: Trigger a calcular
             
         Returns:
-            Fecha/hora ISO de la próxima ejecución
+            Fecha/hora de la próxima ejecución (con la zona horaria local)
         """
         now = datetime.now()
         hora_parts = trigger.hora.split(':')
@@ -287,7 +287,7 @@ class TriggerService:
         else:
             proxima = now + timedelta(days=1)
         
-        return proxima.isoformat()
+        return proxima.astimezone()
     
     def obtener_triggers_pendientes(self) -> Dict[str, Any]:
         """
@@ -297,19 +297,11 @@ class TriggerService:
             Lista de triggers pendientes
         """
         try:
-            triggers_activos = self.repository.get_activos()
-            now = datetime.now()
-            
-            pendientes = []
-            for trigger in triggers_activos:
-                if trigger.proxima_ejecucion:
-                    proxima = datetime.fromisoformat(trigger.proxima_ejecucion)
-                    if proxima <= now:
-                        pendientes.append(trigger.to_dict())
+            pendientes = self.repository.get_pendientes()
             
             return {
                 'success': True,
-                'data': pendientes
+                'data': [trigger.to_dict() for trigger in pendientes]
             }
             
         except Exception as e:
@@ -375,10 +367,9 @@ class TriggerService:
             Lista de ejecuciones
         """
         try:
-            ejecuciones = self.repository.get_ejecuciones_by_trigger(trigger_id, limit)
             return {
                 'success': True,
-                'data': [e.to_dict() for e in ejecuciones]
+                'data': self.repository.get_ejecuciones_dicts(trigger_id, limit)
             }
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -394,10 +385,9 @@ class TriggerService:
             Lista de ejecuciones
         """
         try:
-            ejecuciones = self.repository.get_todas_ejecuciones(limit)
             return {
                 'success': True,
-                'data': [e.to_dict() for e in ejecuciones]
+                'data': self.repository.get_ejecuciones_dicts(limit=limit)
             }
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -9,6 +9,12 @@ const API_CONFIG = {
     timeout: 10000
 };
 
+/**
+ * Últimas respuestas GET con ETag, por URL: { etag, datos }
+ * Permiten revalidar con If-None-Match y reutilizar los datos cuando el API responde 304
+ */
+const respuestasConETag = new Map();
+
 /**
  * Obtiene el token de autenticación desde cookies o localStorage
  */
@@ -68,9 +74,21 @@ async function fetchAPI(endpoint, options = {}) {
     
     // console.log('📋 Headers completos:', JSON.stringify(defaultOptions.headers, null, 2));
 
+    // Las lecturas se revalidan con el ETag de la última respuesta de la misma URL
+    const esGET = !defaultOptions.method || defaultOptions.method.toUpperCase() === 'GET';
+    const anterior = esGET ? respuestasConETag.get(url) : undefined;
+    if (anterior) {
+        defaultOptions.headers = { ...defaultOptions.headers, 'If-None-Match': anterior.etag };
+    }
+
     try {
         const response = await fetch(url, defaultOptions);
         
+        // Sin cambios en el servidor: se reutilizan los datos ya recibidos
+        if (response.status === 304 && anterior) {
+            return structuredClone(anterior.datos);
+        }
+        
         // Manejar errores de autenticación
         if (response.status === 401) {
             // console.error('❌ Error 401: Token inválido o expirado');
@@ -92,24 +110,93 @@ async function fetchAPI(endpoint, options = {}) {
             throw new Error(error.mensaje || error.error || `Error ${response.status}`);
         }
 
-        return await response.json();
+        const datos = await response.json();
+        const etag = response.headers.get('ETag');
+        if (esGET && etag) {
+            // Se guarda una copia: quien llama puede modificar los datos que recibe
+            respuestasConETag.set(url, { etag, datos: structuredClone(datos) });
+        } else if (esGET) {
+            respuestasConETag.delete(url);
+        }
+        return datos;
     } catch (error) {
         console.error('Error en petición API:', error);
         throw error;
     }
 }
 
+/**
+ * Realiza una petición cuya respuesta es NDJSON (una línea JSON por registro)
+ * y entrega cada línea a medida que llega, sin esperar la respuesta completa
+ * @param {string} endpoint - Ruta del endpoint
+ * @param {object} options - Opciones de la petición (method, body, etc.)
+ * @param {function} onLinea - Recibe cada línea ya parseada
+ * @returns {Promise<void>}
+ */
+async function fetchNDJSON(endpoint, options = {}, onLinea) {
+    const token = getAuthToken();
+    const response = await fetch(`${API_CONFIG.baseURL}${endpoint}`, {
+        headers: {
+            'Content-Type': 'application/json',
+            ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+        },
+        ...options
+    });
+
+    if (response.status === 401) {
+        if (typeof Auth !== 'undefined' && Auth.clearSession) {
+            Auth.clearSession();
+        } else {
+            localStorage.removeItem('token');
+            localStorage.removeItem('usuario');
+        }
+        window.location.href = '/login';
+        throw new Error('Sesión expirada');
+    }
+
+    if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.mensaje || error.error || error.detail || `Error ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let pendiente = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        pendiente += decoder.decode(value, { stream: true });
+        const lineas = pendiente.split('\n');
+        pendiente = lineas.pop();
+        lineas.filter(linea => linea).forEach(linea => onLinea(JSON.parse(linea)));
+    }
+
+    if (pendiente.trim()) {
+        onLinea(JSON.parse(pendiente));
+    }
+}
+
 /**
  * API de Empresas
  */
 const EmpresasAPI = {
     /**
-     * Obtiene todas las empresas
-     * @returns {Promise<Array>} Lista de empresas
+     * Obtiene una página de empresas con filtros aplicados en el servidor
+     * @param {object} params - Filtros y paginación (limit, cursor, estado, modulo, prioridad,
+     *                          vencimiento_desde, vencimiento_hasta, q, orden, direccion)
+     * @returns {Promise<object>} { datos, paginacion }
      */
-    async getAll() {
-        const response = await fetchAPI('/empresas');
-        return response.datos;
+    async getPage(params = {}) {
+        const query = new URLSearchParams();
+        Object.entries(params).forEach(([clave, valor]) => {
+            if (valor !== null && valor !== undefined && valor !== '') {
+                query.append(clave, valor);
+            }
+        });
+        const response = await fetchAPI(`/empresas?${query.toString()}`);
+        return { datos: response.datos, paginacion: response.paginacion };
     },
 
     /**
@@ -159,13 +246,16 @@ const EmpresasAPI = {
     },
 
     /**
-     * Busca empresas por nombre
-     * @param {string} nombre - Nombre a buscar
-     * @returns {Promise<Array>} Empresas encontradas
+     * Busca empresas por nombre o NIT (ordenadas por relevancia)
+     * @param {string} nombre - Nombre o NIT a buscar
+     * @param {object} opciones - limit, offset y estado opcionales
+     * @returns {Promise<object>} { datos, paginacion }
      */
-    async searchByName(nombre) {
-        const response = await fetchAPI(`/empresas/buscar/nombre?nombre=${encodeURIComponent(nombre)}`);
-        return response.datos;
+    async searchByName(nombre, { limit = 20, offset = 0, estado = '' } = {}) {
+        const query = new URLSearchParams({ nombre, limit, offset });
+        if (estado) query.append('estado', estado);
+        const response = await fetchAPI(`/empresas/buscar/nombre?${query.toString()}`);
+        return { datos: response.datos, paginacion: response.paginacion };
     },
 
     /**
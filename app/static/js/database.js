@@ -1,9 +1,18 @@
 /**
  * Módulo para el visor de base de datos
  * Permite visualizar tablas y ejecutar consultas SQL
+ * Las filas llegan como NDJSON desde cursores del servidor (ver DatabaseAPI)
  */
 
 let currentTable = null;
+let currentOffset = 0;
+let tablesInfo = {};
+
+// Registros por página en el visor de tablas
+const DB_PAGE_SIZE = 100;
+
+// Filas de una consulta que se dibujan en pantalla (el resto solo se cuenta)
+const DB_MAX_FILAS_VISIBLES = 1000;
 
 /**
  * Carga la vista del visor de base de datos
@@ -11,6 +20,7 @@ let currentTable = null;
 async function loadDatabaseViewer() {
     try {
         const tables = await DatabaseAPI.getTables();
+        tablesInfo = Object.fromEntries((tables || []).map(table => [table.name, table]));
         renderTablesList(tables);
         Utils.showToast('Visor de base de datos cargado', 'success');
     } catch (error) {
@@ -25,7 +35,7 @@ async function loadDatabaseViewer() {
  */
 function renderTablesList(tables) {
     const container = document.getElementById('db-tables-list');
-    
+
     if (!tables || tables.length === 0) {
         container.innerHTML = '<p class="no-data">No hay tablas disponibles</p>';
         return;
@@ -38,8 +48,15 @@ function renderTablesList(tables) {
                     <div class="db-table-icon">📊</div>
                     <div class="db-table-info">
                         <h4>${table.name}</h4>
-                        <p>${table.count || 0} registros | ${table.columns || 0} columnas</p>
+                        <p>${formatTableCount(table)} registros | ${table.columns || 0} columnas</p>
+                        <p class="text-muted">${table.total_size || ''}</p>
                     </div>
+                    ${table.count_exact ? '' : `
+                        <button class="btn btn-secondary btn-sm" title="Contar registros exactos"
+                                onclick="event.stopPropagation(); countTableRows('${table.name}')">
+                            🔢
+                        </button>
+                    `}
                 </div>
             `).join('')}
         </div>
@@ -47,14 +64,46 @@ function renderTablesList(tables) {
 }
 
 /**
- * Carga y muestra los datos de una tabla
+ * Texto del número de registros de una tabla (≈ si es una estimación)
+ * @param {object} table - Información de la tabla
+ * @returns {string} Conteo formateado
+ */
+function formatTableCount(table) {
+    const count = (table.count || 0).toLocaleString();
+    return table.count_exact ? count : `≈ ${count}`;
+}
+
+/**
+ * Cuenta exactamente los registros de una tabla y actualiza la lista
  * @param {string} tableName - Nombre de la tabla
  */
-async function loadTableData(tableName, limit = 100) {
+async function countTableRows(tableName) {
+    try {
+        const result = await DatabaseAPI.getTableCount(tableName);
+        tablesInfo[tableName] = { ...tablesInfo[tableName], count: result.count, count_exact: true };
+        renderTablesList(Object.values(tablesInfo));
+    } catch (error) {
+        console.error('Error al contar registros:', error);
+        Utils.showToast('Error al contar los registros', 'error');
+    }
+}
+
+/**
+ * Carga y muestra una página de datos de una tabla
+ * @param {string} tableName - Nombre de la tabla
+ * @param {number} offset - Registros a omitir desde el inicio
+ */
+async function loadTableData(tableName, offset = 0) {
     try {
         currentTable = tableName;
-        const data = await DatabaseAPI.getTableData(tableName, limit);
-        renderTableData(data);
+        currentOffset = Math.max(0, offset);
+        const page = await DatabaseAPI.getTablePage(tableName, currentOffset, DB_PAGE_SIZE);
+        renderTableData({
+            table: tableName,
+            offset: currentOffset,
+            total_rows: tablesInfo[tableName] ? formatTableCount(tablesInfo[tableName]) : null,
+            ...page
+        });
         Utils.showToast(`Tabla ${tableName} cargada`, 'success');
     } catch (error) {
         console.error('Error al cargar datos de tabla:', error);
@@ -63,26 +112,41 @@ async function loadTableData(tableName, limit = 100) {
 }
 
 /**
- * Renderiza los datos de una tabla
- * @param {object} data - Datos de la tabla
+ * Formatea un valor para mostrarlo en una celda
+ * @param {*} value - Valor de la celda
+ * @returns {string} HTML de la celda
+ */
+function formatCellValue(value) {
+    if (value === null || value === undefined) return '<span class="text-muted">NULL</span>';
+    if (typeof value === 'boolean') return value ? '✅' : '❌';
+    if (typeof value === 'object') return JSON.stringify(value);
+    return value;
+}
+
+/**
+ * Renderiza una página de datos de una tabla
+ * @param {object} data - { table, offset, total_rows, columnas, filas }
  */
 function renderTableData(data) {
     const container = document.getElementById('db-table-data');
-    
-    if (!data || !data.data || data.data.length === 0) {
+
+    if (!data || !data.filas || (data.filas.length === 0 && data.offset === 0)) {
         container.innerHTML = '<p class="no-data">No hay datos en esta tabla</p>';
         return;
     }
 
-    // Obtener columnas del primer registro
-    const columns = Object.keys(data.data[0]);
+    const desde = data.filas.length > 0 ? data.offset + 1 : data.offset;
+    const hasta = data.offset + data.filas.length;
+    const total = data.total_rows ?? '?';
+    const hayAnterior = data.offset > 0;
+    const haySiguiente = data.filas.length === DB_PAGE_SIZE;
 
     container.innerHTML = `
         <div class="db-table-header">
             <h3>📊 ${data.table}</h3>
-            <p>Mostrando ${data.showing} de ${data.total_rows} registros</p>
+            <p>Mostrando ${desde}-${hasta} de ${total} registros</p>
         </div>
-        
+
         <div class="db-table-actions">
             <button class="btn btn-secondary" onclick="exportTableToCSV('${data.table}')">
                 📥 Exportar CSV
@@ -90,24 +154,25 @@ function renderTableData(data) {
             <button class="btn btn-secondary" onclick="refreshTableData()">
                 🔄 Actualizar
             </button>
+            <button class="btn btn-secondary" onclick="loadTableData('${data.table}', ${data.offset - DB_PAGE_SIZE})" ${hayAnterior ? '' : 'disabled'}>
+                ◀ Anterior
+            </button>
+            <button class="btn btn-secondary" onclick="loadTableData('${data.table}', ${hasta})" ${haySiguiente ? '' : 'disabled'}>
+                Siguiente ▶
+            </button>
         </div>
 
         <div class="table-container">
             <table class="data-table">
                 <thead>
                     <tr>
-                        ${columns.map(col => `<th>${col}</th>`).join('')}
+                        ${data.columnas.map(col => `<th>${col}</th>`).join('')}
                     </tr>
                 </thead>
                 <tbody>
-                    ${data.data.map(row => `
+                    ${data.filas.map(row => `
                         <tr>
-                            ${columns.map(col => {
-                                let value = row[col];
-                                if (value === null) value = '<span class="text-muted">NULL</span>';
-                                else if (typeof value === 'boolean') value = value ? '✅' : '❌';
-                                return `<td>${value}</td>`;
-                            }).join('')}
+                            ${row.map(value => `<td>${formatCellValue(value)}</td>`).join('')}
                         </tr>
                     `).join('')}
                 </tbody>
@@ -121,7 +186,7 @@ function renderTableData(data) {
  */
 function refreshTableData() {
     if (currentTable) {
-        loadTableData(currentTable);
+        loadTableData(currentTable, currentOffset);
     }
 }
 
@@ -130,7 +195,7 @@ function refreshTableData() {
  */
 async function executeCustomQuery() {
     const query = document.getElementById('db-query-input').value.trim();
-    
+
     if (!query) {
         Utils.showToast('Ingrese una consulta SQL', 'warning');
         return;
@@ -138,6 +203,9 @@ async function executeCustomQuery() {
 
     try {
         const result = await DatabaseAPI.executeQuery(query);
+        if (result.error) {
+            throw new Error(result.error);
+        }
         renderQueryResults(result);
         Utils.showToast('Consulta ejecutada correctamente', 'success');
     } catch (error) {
@@ -146,36 +214,97 @@ async function executeCustomQuery() {
     }
 }
 
+/**
+ * Muestra el plan de ejecución (EXPLAIN ANALYZE) de la consulta del editor
+ */
+async function explainCustomQuery() {
+    const query = document.getElementById('db-query-input').value.trim();
+
+    if (!query) {
+        Utils.showToast('Ingrese una consulta SQL', 'warning');
+        return;
+    }
+
+    try {
+        const result = await DatabaseAPI.explainQuery(query);
+        renderExplainResult(result);
+    } catch (error) {
+        console.error('Error al explicar consulta:', error);
+        Utils.showToast(error.message || 'Error al obtener el plan', 'error');
+    }
+}
+
+/**
+ * Convierte un nodo del plan (y sus hijos) en líneas de texto indentadas
+ * @param {object} node - Nodo del plan en formato JSON de PostgreSQL
+ * @param {number} nivel - Profundidad del nodo
+ * @returns {Array<string>} Líneas del plan
+ */
+function formatPlanNode(node, nivel = 0) {
+    const sangria = '   '.repeat(nivel) + (nivel > 0 ? '-> ' : '');
+    const objeto = node['Relation Name'] ? ` on ${node['Relation Name']}` : '';
+    const indice = node['Index Name'] ? ` using ${node['Index Name']}` : '';
+    const tiempos = node['Actual Total Time'] !== undefined
+        ? ` (actual ${node['Actual Startup Time']}..${node['Actual Total Time']} ms, filas=${node['Actual Rows']}, loops=${node['Actual Loops']})`
+        : '';
+    const buffers = (node['Shared Hit Blocks'] || node['Shared Read Blocks'])
+        ? ` buffers hit=${node['Shared Hit Blocks'] || 0} read=${node['Shared Read Blocks'] || 0}`
+        : '';
+
+    const lineas = [`${sangria}${node['Node Type']}${indice}${objeto}${tiempos}${buffers}`];
+    (node.Plans || []).forEach(hijo => lineas.push(...formatPlanNode(hijo, nivel + 1)));
+    return lineas;
+}
+
+/**
+ * Renderiza el plan de ejecución de una consulta
+ * @param {object} result - { plan, planning_time_ms, execution_time_ms }
+ */
+function renderExplainResult(result) {
+    const container = document.getElementById('db-query-results');
+    const plan = formatPlanNode(result.plan).join('\n');
+
+    container.innerHTML = `
+        <div class="db-query-header">
+            <h4>Plan de ejecución (planificación ${result.planning_time_ms} ms, ejecución ${result.execution_time_ms} ms)</h4>
+        </div>
+        <pre class="db-query-plan"></pre>
+    `;
+    // textContent evita interpretar como HTML los nombres del plan
+    container.querySelector('.db-query-plan').textContent = plan;
+}
+
 /**
  * Renderiza los resultados de una consulta
- * @param {object} result - Resultados de la consulta
+ * @param {object} result - { columnas, filas (visibles), total, truncado, limite }
  */
 function renderQueryResults(result) {
     const container = document.getElementById('db-query-results');
-    
-    if (!result || !result.results || result.results.length === 0) {
+
+    if (!result || !result.filas || result.filas.length === 0) {
         container.innerHTML = '<p class="no-data">La consulta no devolvió resultados</p>';
         return;
     }
 
-    const columns = Object.keys(result.results[0]);
+    const recortado = result.total > result.filas.length;
 
     container.innerHTML = `
         <div class="db-query-header">
-            <h4>Resultados (${result.rows} filas)</h4>
+            <h4>Resultados (${result.total} filas${recortado ? `, mostrando ${result.filas.length}` : ''})</h4>
+            ${result.truncado ? `<p class="text-muted">La consulta se cortó en ${result.limite} filas (máximo del servidor)</p>` : ''}
         </div>
-        
+
         <div class="table-container">
             <table class="data-table">
                 <thead>
                     <tr>
-                        ${columns.map(col => `<th>${col}</th>`).join('')}
+                        ${result.columnas.map(col => `<th>${col}</th>`).join('')}
                     </tr>
                 </thead>
                 <tbody>
-                    ${result.results.map(row => `
+                    ${result.filas.map(row => `
                         <tr>
-                            ${columns.map(col => `<td>${row[col] ?? '<span class="text-muted">NULL</span>'}</td>`).join('')}
+                            ${row.map(value => `<td>${formatCellValue(value)}</td>`).join('')}
                         </tr>
                     `).join('')}
                 </tbody>
@@ -185,7 +314,8 @@ function renderQueryResults(result) {
 }
 
 /**
- * Exporta una tabla a CSV
+ * Exporta una tabla completa a CSV
+ * Las filas se leen del stream y se convierten a CSV a medida que llegan
  * @param {string} tableName - Nombre de la tabla
  */
 async function exportTableToCSV(tableName) {
@@ -196,56 +326,58 @@ async function exportTableToCSV(tableName) {
 
     try {
         Utils.showToast('Exportando datos...', 'info');
-        
-        // Obtener datos con límite alto
-        const response = await DatabaseAPI.getTableData(tableName, 10000);
-        
-        // console.log('📊 Datos recibidos para exportar:', response);
-        
-        // Verificar que hay datos
-        if (!response || !response.data || response.data.length === 0) {
-            Utils.showToast('No hay datos para exportar', 'warning');
-            return;
-        }
 
-        // Convertir a CSV
-        const data = response.data;
-        const columns = Object.keys(data[0]);
-        
         // Función para escapar valores CSV
         const escapeCSV = (value) => {
             if (value === null || value === undefined) return '';
-            
+
             // Convertir a string
-            let strValue = String(value);
-            
+            let strValue = typeof value === 'object' ? JSON.stringify(value) : String(value);
+
             // Si contiene comas, saltos de línea o comillas, encerrar en comillas
             if (strValue.includes(',') || strValue.includes('\n') || strValue.includes('"')) {
                 // Escapar comillas dobles duplicándolas
                 strValue = strValue.replace(/"/g, '""');
                 return `"${strValue}"`;
             }
-            
+
             return strValue;
         };
-        
-        // Crear header
-        let csv = columns.map(col => escapeCSV(col)).join(',') + '\n';
-        
-        // Agregar filas
-        data.forEach(row => {
-            const values = columns.map(col => escapeCSV(row[col]));
-            csv += values.join(',') + '\n';
+
+        // Partes del archivo: encabezado y una línea por fila
+        const partes = [];
+        let filas = 0;
+        let errorStream = null;
+
+        await DatabaseAPI.streamTable(tableName, {}, (linea) => {
+            if (Array.isArray(linea)) {
+                partes.push(linea.map(escapeCSV).join(',') + '\n');
+                filas++;
+            } else if (linea.columnas) {
+                partes.push(linea.columnas.map(escapeCSV).join(',') + '\n');
+            } else if (linea.error) {
+                errorStream = linea.error;
+            }
         });
 
+        if (errorStream) {
+            throw new Error(errorStream);
+        }
+
+        // Verificar que hay datos
+        if (filas === 0) {
+            Utils.showToast('No hay datos para exportar', 'warning');
+            return;
+        }
+
         // Crear y descargar archivo con BOM para Excel
         const BOM = '\uFEFF';
-        const blob = new Blob([BOM + csv], { type: 'text/csv;charset=utf-8;' });
+        const blob = new Blob([BOM, ...partes], { type: 'text/csv;charset=utf-8;' });
         const url = window.URL.createObjectURL(blob);
         const a = document.createElement('a');
         a.style.display = 'none';
         a.href = url;
-        
+
         // Nombre del archivo con timestamp
         const timestamp = new Date().toISOString().replace(/[:.]/g, '-').slice(0, -5);
         a.download = `${tableName}_${timestamp}.csv`;
@@ -259,7 +391,7 @@ async function exportTableToCSV(tableName) {
             window.URL.revokeObjectURL(url);
         }, 100);
 
-        Utils.showToast(`✅ ${response.showing} registros exportados correctamente`, 'success');
+        Utils.showToast(`✅ ${filas} registros exportados correctamente`, 'success');
     } catch (error) {
         console.error('❌ Error al exportar tabla:', error);
         Utils.showToast('Error al exportar la tabla: ' + (error.message || 'Error desconocido'), 'error');
@@ -280,8 +412,66 @@ const DatabaseAPI = {
         return response.datos;
     },
 
+    async getTableCount(tableName) {
+        const response = await fetchAPI(`/database/tables/${encodeURIComponent(tableName)}/count`);
+        return response.datos;
+    },
+
+    /**
+     * Recorre las filas de una tabla (NDJSON)
+     * @param {string} tableName - Nombre de la tabla
+     * @param {object} params - { offset, limit } (sin limit se recorre toda la tabla)
+     * @param {function} onLinea - Recibe {columnas}, cada fila (lista) y {filas} o {error}
+     */
+    async streamTable(tableName, params = {}, onLinea) {
+        const query = new URLSearchParams();
+        if (params.offset) query.set('offset', params.offset);
+        if (params.limit) query.set('limit', params.limit);
+        await fetchNDJSON(`/database/tables/${encodeURIComponent(tableName)}/stream?${query.toString()}`, {}, onLinea);
+    },
+
+    /**
+     * Obtiene una página de una tabla
+     * @returns {Promise<object>} { columnas, filas }
+     */
+    async getTablePage(tableName, offset = 0, limit = DB_PAGE_SIZE) {
+        const page = { columnas: [], filas: [] };
+        await this.streamTable(tableName, { offset, limit }, (linea) => {
+            if (Array.isArray(linea)) page.filas.push(linea);
+            else if (linea.columnas) page.columnas = linea.columnas;
+            else if (linea.error) throw new Error(linea.error);
+        });
+        return page;
+    },
+
+    /**
+     * Ejecuta una consulta SELECT leyendo el resultado como stream.
+     * Solo se conservan DB_MAX_FILAS_VISIBLES filas; el resto se cuenta.
+     * @returns {Promise<object>} { columnas, filas, total, error }
+     */
     async executeQuery(query) {
-        const response = await fetchAPI('/database/query', {
+        const result = { columnas: [], filas: [], total: 0, error: null, truncado: false, limite: null };
+        await fetchNDJSON('/database/query', {
+            method: 'POST',
+            body: JSON.stringify({ query })
+        }, (linea) => {
+            if (Array.isArray(linea)) {
+                result.total++;
+                if (result.filas.length < DB_MAX_FILAS_VISIBLES) result.filas.push(linea);
+            } else if (linea.columnas) {
+                result.columnas = linea.columnas;
+            } else if (linea.error) {
+                result.error = linea.error;
+            } else if (linea.truncado) {
+                result.truncado = true;
+                result.limite = linea.limite;
+            }
+        });
+        return result;
+    },
+
+    async explainQuery(query) {
+        const response = await fetchAPI('/database/query/explain', {
             method: 'POST',
             body: JSON.stringify({ query })
         });
@@ -3,40 +3,112 @@
  * Gestiona la tabla de empresas, búsqueda y filtros
  */
 
+const EMPRESAS_PAGE_SIZE = 50;
+
 let empresasData = [];
-let empresasFiltradas = [];
+let siguienteCursor = null; // Cursor de la siguiente página del listado
+let siguienteOffset = null; // Offset de la siguiente página de la búsqueda
+let filtroVencimiento = null; // Filtro de vencimiento aplicado desde el dashboard
 let pendingFilter = null; // Almacena filtro pendiente desde dashboard
+let searchTimeout = null;
+
+/**
+ * Arma los parámetros de consulta según los filtros activos
+ * @returns {object} Parámetros para EmpresasAPI.getPage
+ */
+function getEmpresasParams() {
+    const params = {
+        limit: EMPRESAS_PAGE_SIZE,
+        estado: document.getElementById('filter-estado').value
+    };
+
+    if (filtroVencimiento) {
+        Object.assign(params, filtroVencimiento.params);
+    }
+
+    return params;
+}
 
 /**
- * Carga y renderiza la lista de empresas
+ * Obtiene una página de empresas: búsqueda por relevancia si hay texto,
+ * listado paginado por cursor en caso contrario
+ * @param {boolean} continuar - true para pedir la página siguiente a la ya cargada
+ * @returns {Promise<Array>} Empresas de la página
+ */
+async function fetchEmpresasPage(continuar = false) {
+    const texto = document.getElementById('search-empresas').value.trim();
+
+    if (texto && !filtroVencimiento) {
+        const offset = continuar ? siguienteOffset : 0;
+        const { datos, paginacion } = await EmpresasAPI.searchByName(texto, {
+            limit: EMPRESAS_PAGE_SIZE,
+            offset,
+            estado: document.getElementById('filter-estado').value
+        });
+        siguienteCursor = null;
+        siguienteOffset = paginacion.tiene_mas ? offset + datos.length : null;
+        return datos;
+    }
+
+    const params = getEmpresasParams();
+    if (continuar) {
+        params.cursor = siguienteCursor;
+    }
+    const { datos, paginacion } = await EmpresasAPI.getPage(params);
+    siguienteCursor = paginacion.siguiente_cursor;
+    siguienteOffset = null;
+    return datos;
+}
+
+/**
+ * Carga la primera página de empresas con los filtros actuales
  */
 async function loadEmpresas() {
     try {
-        empresasData = await EmpresasAPI.getAll();
-        empresasFiltradas = [...empresasData];
-        
         // Si hay un filtro pendiente desde el dashboard, aplicarlo
         if (pendingFilter) {
             const { modulo, estado } = pendingFilter;
             pendingFilter = null; // Limpiar filtro pendiente
-            applyVencimientoFilter(modulo, estado);
-        } else {
-            renderEmpresasTable();
-            Utils.showToast(`${empresasData.length} empresas cargadas`, 'success');
+            await applyVencimientoFilter(modulo, estado);
+            return;
         }
+
+        empresasData = await fetchEmpresasPage();
+        renderEmpresasTable();
     } catch (error) {
         console.error('Error al cargar empresas:', error);
         Utils.showToast('Error al cargar las empresas', 'error');
     }
 }
 
+/**
+ * Carga la siguiente página y la agrega a la tabla
+ */
+async function loadMoreEmpresas() {
+    if (!siguienteCursor && siguienteOffset === null) return;
+
+    try {
+        const datos = await fetchEmpresasPage(true);
+        empresasData = empresasData.concat(datos);
+        renderEmpresasTable();
+    } catch (error) {
+        console.error('Error al cargar más empresas:', error);
+        Utils.showToast('Error al cargar más empresas', 'error');
+    }
+}
+
 /**
  * Renderiza la tabla de empresas
  */
 function renderEmpresasTable() {
     const tbody = document.getElementById('empresas-tbody');
+    const btnCargarMas = document.getElementById('btn-cargar-mas');
+
+    if (btnCargarMas) {
+        btnCargarMas.style.display = (siguienteCursor || siguienteOffset !== null) ? '' : 'none';
+    }
 
-    if (empresasFiltradas.length === 0) {
+    if (empresasData.length === 0) {
         tbody.innerHTML = `
             <tr>
                 <td colspan="7" class="no-data">No se encontraron empresas</td>
@@ -45,7 +117,7 @@ function renderEmpresasTable() {
         return;
     }
 
-    tbody.innerHTML = empresasFiltradas.map(empresa => {
+    tbody.innerHTML = empresasData.map(empresa => {
         const certificado = getDocumentoStatus(empresa.certificado);
         const resolucion = getDocumentoStatus(empresa.resolucion);
         const documento = getDocumentoStatus(empresa.documento);
@@ -114,25 +186,14 @@ function getDocumentoStatus(doc) {
 }
 
 /**
- * Filtra las empresas según la búsqueda y filtros aplicados
+ * Recarga las empresas desde el servidor según la búsqueda y filtros aplicados
  */
 function filterEmpresas() {
-    const searchTerm = document.getElementById('search-empresas').value.toLowerCase();
-    const estadoFilter = document.getElementById('filter-estado').value;
+    // La búsqueda manual reemplaza el filtro de vencimiento del dashboard
+    filtroVencimiento = null;
 
-    empresasFiltradas = empresasData.filter(empresa => {
-        // Filtro de búsqueda
-        const matchSearch = !searchTerm || 
-            empresa.nombre.toLowerCase().includes(searchTerm) ||
-            empresa.nit.includes(searchTerm);
-
-        // Filtro de estado
-        const matchEstado = !estadoFilter || empresa.estado === estadoFilter;
-
-        return matchSearch && matchEstado;
-    });
-
-    renderEmpresasTable();
+    clearTimeout(searchTimeout);
+    searchTimeout = setTimeout(loadEmpresas, 300);
 }
 
 /**
@@ -290,31 +351,23 @@ function refreshEmpresas() {
  * @param {string} modulo - Tipo de módulo (certificado, resolucion, documento)
  * @param {string} estado - Estado (vencidos, por_vencer, vigentes)
  */
-function applyVencimientoFilter(modulo, estado) {
+async function applyVencimientoFilter(modulo, estado) {
     // Limpiar filtros anteriores
     document.getElementById('search-empresas').value = '';
     document.getElementById('filter-estado').value = '';
-    
-    // Filtrar empresas según el módulo y estado
-    empresasFiltradas = empresasData.filter(empresa => {
-        const doc = empresa[modulo];
-        if (!doc || !doc.fecha_final) return false;
-        
-        const dias = Utils.diasRestantes(doc.fecha_final);
-        
-        if (estado === 'vencidos') {
-            return dias !== null && dias < 0;
-        } else if (estado === 'por_vencer') {
-            return dias !== null && dias >= 0 && dias <= 30;
-        } else if (estado === 'vigentes') {
-            return dias !== null && dias > 30;
-        }
-        
-        return false;
-    });
-    
-    renderEmpresasTable();
-    
+
+    // Traducir el estado a un rango de fechas de vencimiento del módulo
+    const ahora = new Date();
+    const limiteAlerta = new Date(ahora.getTime() + 30 * 24 * 60 * 60 * 1000);
+    const rangos = {
+        'vencidos': { vencimiento_hasta: ahora.toISOString() },
+        'por_vencer': { vencimiento_desde: ahora.toISOString(), vencimiento_hasta: limiteAlerta.toISOString() },
+        'vigentes': { vencimiento_desde: limiteAlerta.toISOString() }
+    };
+    filtroVencimiento = { params: { modulo, ...rangos[estado] } };
+
+    await loadEmpresas();
+
     // Mostrar mensaje informativo
     const moduloNombres = {
         'certificado': 'Certificados',
@@ -326,9 +379,9 @@ function applyVencimientoFilter(modulo, estado) {
         'por_vencer': 'por vencer (30 días)',
         'vigentes': 'vigentes'
     };
-    
+
     Utils.showToast(
-        `Mostrando empresas con ${moduloNombres[modulo]} ${estadoNombres[estado]}: ${empresasFiltradas.length} encontradas`,
+        `Mostrando empresas con ${moduloNombres[modulo]} ${estadoNombres[estado]}${siguienteCursor ? ' (hay más páginas)' : ''}: ${empresasData.length} cargadas`,
         'info'
     );
 }
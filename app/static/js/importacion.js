@@ -6,6 +6,8 @@ class ImportacionManager {
     constructor() {
         this.apiUrl = '/api/empresas';
         this.fileInput = null;
+        this.intervaloConsulta = 1000;  // ms entre consultas de progreso
+        this.extensiones = ['.xlsx', '.xls', '.csv', '.parquet', '.arrow', '.feather'];
         this.init();
     }
 
@@ -42,6 +44,19 @@ class ImportacionManager {
         }
     }
 
+    /**
+     * Exporta las empresas (xlsx o csv). La descarga la hace el navegador
+     * directamente, sin cargar el archivo completo en memoria.
+     */
+    exportar(formato = 'xlsx') {
+        const a = document.createElement('a');
+        a.href = `${this.apiUrl}/exportar?formato=${encodeURIComponent(formato)}`;
+        a.download = '';
+        document.body.appendChild(a);
+        a.click();
+        document.body.removeChild(a);
+    }
+
     /**
      * Abre el selector de archivos
      */
@@ -49,7 +64,7 @@ class ImportacionManager {
         if (!this.fileInput) {
             this.fileInput = document.createElement('input');
             this.fileInput.type = 'file';
-            this.fileInput.accept = '.xlsx,.xls';
+            this.fileInput.accept = '.xlsx,.xls,.csv,.parquet,.arrow,.feather';
             this.fileInput.onchange = (e) => this.handleFileSelected(e);
         }
         this.fileInput.click();
@@ -63,8 +78,8 @@ class ImportacionManager {
         if (!file) return;
 
         // Validar extensión
-        if (!file.name.endsWith('.xlsx') && !file.name.endsWith('.xls')) {
-            this.mostrarMensaje('Por favor selecciona un archivo Excel (.xlsx o .xls)', 'error');
+        if (!this.extensiones.some(ext => file.name.toLowerCase().endsWith(ext))) {
+            this.mostrarMensaje('Por favor selecciona un archivo Excel, CSV, Parquet o Arrow', 'error');
             return;
         }
 
@@ -83,12 +98,12 @@ class ImportacionManager {
     }
 
     /**
-     * Importa el archivo Excel
+     * Sube el archivo Excel y espera a que termine la importación en segundo plano
      */
     async importarArchivo(file) {
         try {
             // Mostrar loading
-            this.mostrarLoading('Procesando archivo...');
+            this.mostrarLoading('Subiendo archivo...');
 
             const formData = new FormData();
             formData.append('file', file);
@@ -104,8 +119,11 @@ class ImportacionManager {
                 throw new Error(data.error || 'Error al importar archivo');
             }
 
+            // El servidor responde con el trabajo creado; consultar su progreso
+            const resultado = await this.esperarImportacion(data.datos.id);
+
             // Mostrar resultados
-            this.mostrarResultadosImportacion(data.datos);
+            this.mostrarResultadosImportacion(resultado);
 
             // Limpiar input
             if (this.fileInput) {
@@ -125,11 +143,44 @@ class ImportacionManager {
         }
     }
 
+    /**
+     * Consulta el progreso del trabajo hasta que termine, acumulando los errores nuevos
+     */
+    async esperarImportacion(jobId) {
+        const errores = [];
+
+        while (true) {
+            const response = await fetch(`${this.apiUrl}/importar/${jobId}?desde_error=${errores.length}`);
+            const data = await response.json();
+
+            if (!response.ok || !data.success) {
+                throw new Error(data.error || 'Error al consultar la importación');
+            }
+
+            const job = data.datos;
+            errores.push(...job.errores);
+
+            if (job.terminado) {
+                if (job.estado === 'fallido') {
+                    throw new Error(job.mensaje || 'La importación falló');
+                }
+                return { ...job, errores };
+            }
+
+            this.actualizarLoading(
+                `Importando... ${job.total} filas leídas ` +
+                `(${job.exitosas} creadas, ${job.actualizadas} actualizadas, ${job.fallidas} fallidas)`
+            );
+
+            await new Promise(resolve => setTimeout(resolve, this.intervaloConsulta));
+        }
+    }
+
     /**
      * Muestra los resultados de la importación
      */
     mostrarResultadosImportacion(datos) {
-        const { total, exitosas, actualizadas, fallidas, errores } = datos;
+        const { total, exitosas, actualizadas, fallidas, errores, formatos_detectados } = datos;
 
         let mensaje = `
             <div class="importacion-resultado">
@@ -156,6 +207,19 @@ class ImportacionManager {
                 </div>
         `;
 
+        // Formato de fecha detectado en cada columna de vencimiento
+        const formatos = Object.entries(formatos_detectados || {}).filter(([, info]) => info.formato);
+        if (formatos.length > 0) {
+            mensaje += `
+                <div class="formatos-importacion">
+                    <h4>📅 Formatos de fecha detectados:</h4>
+                    <ul>
+                        ${formatos.map(([columna, info]) => `<li>${columna}: ${info.formato}${info.invalidas > 0 ? ` (${info.invalidas} valores no reconocidos)` : ''}</li>`).join('')}
+                    </ul>
+                </div>
+            `;
+        }
+
         // Mostrar errores si los hay
         if (errores && errores.length > 0) {
             mensaje += `
@@ -220,6 +284,16 @@ class ImportacionManager {
         document.body.appendChild(loading);
     }
 
+    /**
+     * Actualiza el texto del loading
+     */
+    actualizarLoading(mensaje) {
+        const texto = document.querySelector('#loading-overlay p');
+        if (texto) {
+            texto.textContent = mensaje;
+        }
+    }
+
     /**
      * Oculta el loading
      */
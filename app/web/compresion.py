@@ -0,0 +1,135 @@
+"""
+Compresión de respuestas HTTP con brotli o gzip
+brotli es opcional: si el paquete no está instalado solo se ofrece gzip.
+"""
+import gzip
+from typing import Iterable, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Codificaciones soportadas en orden de preferencia
+CODIFICACIONES = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Tipos de contenido que vale la pena comprimir (imágenes y binarios ya vienen comprimidos)
+TIPOS_COMPRIMIBLES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+
+def es_comprimible(content_type: Optional[str]) -> bool:
+    """Indica si un tipo de contenido se beneficia de la compresión"""
+    return bool(content_type) and content_type.startswith(TIPOS_COMPRIMIBLES)
+
+
+def elegir_codificacion(accept_encoding: Optional[str],
+                        disponibles: Iterable[str] = CODIFICACIONES) -> Optional[str]:
+    """
+    Elige la codificación a usar según la cabecera Accept-Encoding del cliente
+
+    Args:
+        accept_encoding: Valor de Accept-Encoding (p. ej. 'gzip, deflate, br;q=0.9')
+        disponibles: Codificaciones disponibles en orden de preferencia
+
+    Returns:
+        'br', 'gzip' o None si el cliente no acepta ninguna
+    """
+    if not accept_encoding:
+        return None
+
+    aceptadas = set()
+    for parte in accept_encoding.lower().split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        calidad = parametros.strip()
+        if calidad.startswith('q='):
+            try:
+                if float(calidad[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        aceptadas.add(nombre.strip())
+
+    for codificacion in disponibles:
+        if codificacion in aceptadas or '*' in aceptadas:
+            return codificacion
+    return None
+
+
+def comprimir(contenido: bytes, codificacion: str, maxima: bool = False) -> bytes:
+    """
+    Comprime un contenido con la codificación indicada
+
+    Args:
+        contenido: Bytes a comprimir
+        codificacion: 'br' o 'gzip'
+        maxima: Compresión máxima (para archivos que se comprimen una sola vez al iniciar);
+            si es False se usa un nivel rápido, apto para cada petición
+
+    Returns:
+        Contenido comprimido
+    """
+    if codificacion == 'br':
+        return brotli.compress(contenido, quality=11 if maxima else 4)
+    return gzip.compress(contenido, compresslevel=9 if maxima else 6, mtime=0)
+
+
+class CompresionMiddleware:
+    """
+    Middleware que comprime con brotli o gzip las respuestas completas de la API.
+    Las respuestas en streaming (NDJSON, exportaciones) pasan sin comprimir para que
+    el cliente reciba cada línea en cuanto se genera, igual que las que ya traen
+    Content-Encoding (archivos estáticos precomprimidos).
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000):
+        """
+        Args:
+            app: Aplicación ASGI
+            minimum_size: Tamaño mínimo en bytes para comprimir una respuesta
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        codificacion = elegir_codificacion(Headers(scope=scope).get('accept-encoding'))
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio: Optional[Message] = None
+
+        async def enviar(message: Message) -> None:
+            nonlocal inicio
+            if message['type'] == 'http.response.start':
+                # Se retiene hasta ver el primer bloque del cuerpo
+                inicio = message
+                return
+
+            if message['type'] != 'http.response.body' or inicio is None:
+                await send(message)
+                return
+
+            cabecera, inicio = inicio, None
+            cuerpo = message.get('body', b'')
+            headers = MutableHeaders(raw=cabecera['headers'])
+            if (message.get('more_body', False) or 'content-encoding' in headers
+                    or len(cuerpo) < self.minimum_size or not es_comprimible(headers.get('content-type'))):
+                await send(cabecera)
+                await send(message)
+                return
+
+            comprimido = comprimir(cuerpo, codificacion)
+            headers['Content-Encoding'] = codificacion
+            headers['Content-Length'] = str(len(comprimido))
+            headers.add_vary_header('Accept-Encoding')
+            await send(cabecera)
+            await send({**message, 'body': comprimido})
+
+        await self.app(scope, receive, enviar)
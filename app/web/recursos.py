@@ -0,0 +1,206 @@
+"""
+Archivos estáticos y plantillas HTML preparados en memoria
+Al iniciar se leen los archivos de app/static, se calcula el hash de su contenido
+y se guardan ya comprimidos (brotli y gzip). Las plantillas se renderizan una sola
+vez, con las variables de entorno inyectadas y las URLs de los archivos estáticos
+versionadas con ese hash (p. ej. /static/js/api.1a2b3c4d5e.js), que se pueden
+cachear en el navegador sin vencimiento: un cambio de contenido cambia la URL.
+"""
+import hashlib
+import mimetypes
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+from app.web.compresion import CODIFICACIONES, comprimir, elegir_codificacion, es_comprimible
+
+
+# Archivos con hash en la URL: el contenido de esa URL no cambia nunca
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+
+# Plantillas y URLs sin hash: el navegador revalida con If-None-Match en cada uso
+CACHE_REVALIDAR = 'no-cache'
+
+# Tamaño mínimo para guardar versiones comprimidas de un archivo
+TAMANO_MINIMO_COMPRESION = 500
+
+# Referencias a archivos estáticos dentro de las plantillas (src="/static/..." o href="../static/...")
+REFERENCIA_ESTATICA = re.compile(r'''(["'])(?:\.\./|/)static/([^"'?#]+)\1''')
+
+
+@dataclass(slots=True)
+class Recurso:
+    """Contenido servido desde memoria con su ETag y sus versiones comprimidas"""
+    contenido: bytes
+    media_type: str
+    hash: str
+    comprimidos: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def preparar(cls, contenido: bytes, media_type: str) -> 'Recurso':
+        """
+        Calcula el hash del contenido y lo comprime con todas las codificaciones disponibles
+
+        Args:
+            contenido: Bytes del archivo
+            media_type: Tipo de contenido
+
+        Returns:
+            Recurso listo para servir
+        """
+        recurso = cls(contenido, media_type, hashlib.sha256(contenido).hexdigest()[:10])
+        if len(contenido) >= TAMANO_MINIMO_COMPRESION and es_comprimible(media_type):
+            for codificacion in CODIFICACIONES:
+                comprimido = comprimir(contenido, codificacion, maxima=True)
+                if len(comprimido) < len(contenido):
+                    recurso.comprimidos[codificacion] = comprimido
+        return recurso
+
+    def responder(self, headers: Headers, cache_control: str) -> Response:
+        """
+        Arma la respuesta según If-None-Match y Accept-Encoding de la petición
+
+        Args:
+            headers: Cabeceras de la petición
+            cache_control: Valor de Cache-Control de la respuesta
+
+        Returns:
+            Respuesta 304 o respuesta con el contenido (comprimido si el cliente lo acepta)
+        """
+        etag = f'"{self.hash}"'
+        cabeceras = {'ETag': etag, 'Cache-Control': cache_control}
+        if self.comprimidos:
+            cabeceras['Vary'] = 'Accept-Encoding'
+
+        if_none_match = headers.get('if-none-match', '')
+        if etag in if_none_match or f'W/{etag}' in if_none_match:
+            return Response(status_code=304, headers=cabeceras)
+
+        codificacion = elegir_codificacion(headers.get('accept-encoding'), self.comprimidos)
+        if codificacion is None:
+            return Response(self.contenido, media_type=self.media_type, headers=cabeceras)
+
+        cabeceras['Content-Encoding'] = codificacion
+        return Response(self.comprimidos[codificacion], media_type=self.media_type, headers=cabeceras)
+
+
+def _tipo_de_contenido(ruta: Path) -> str:
+    """Tipo de contenido de un archivo según su extensión (los de texto en UTF-8)"""
+    media_type = mimetypes.guess_type(ruta.name)[0] or 'application/octet-stream'
+    if media_type.startswith('text/') or media_type == 'application/javascript':
+        media_type += '; charset=utf-8'
+    return media_type
+
+
+def _nombre_versionado(ruta: str, version: str) -> str:
+    """Inserta la versión antes de la extensión: js/api.js -> js/api.<version>.js"""
+    base, punto, extension = ruta.rpartition('.')
+    if not punto or '/' in extension:
+        return f'{ruta}.{version}'
+    return f'{base}.{version}.{extension}'
+
+
+class ArchivosEstaticos:
+    """
+    Aplicación ASGI que sirve desde memoria los archivos de un directorio.
+    Responde tanto la URL versionada (caché inmutable) como la original (con revalidación).
+    """
+
+    def __init__(self, directorio: Path):
+        """
+        Lee y prepara todos los archivos del directorio
+
+        Args:
+            directorio: Directorio de archivos estáticos
+        """
+        self.recursos: Dict[str, Recurso] = {}
+        self.versionados: Dict[str, str] = {}
+
+        for archivo in sorted(directorio.rglob('*')):
+            if not archivo.is_file():
+                continue
+            ruta = archivo.relative_to(directorio).as_posix()
+            recurso = Recurso.preparar(archivo.read_bytes(), _tipo_de_contenido(archivo))
+            self.recursos[ruta] = recurso
+            self.versionados[_nombre_versionado(ruta, recurso.hash)] = ruta
+
+    def url(self, ruta: str) -> Optional[str]:
+        """
+        URL versionada de un archivo estático
+
+        Args:
+            ruta: Ruta relativa al directorio estático (p. ej. 'js/api.js')
+
+        Returns:
+            URL con el hash del contenido, None si el archivo no existe
+        """
+        recurso = self.recursos.get(ruta)
+        if recurso is None:
+            return None
+        return f'/static/{_nombre_versionado(ruta, recurso.hash)}'
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['method'] not in ('GET', 'HEAD'):
+            respuesta = PlainTextResponse('Método no permitido', status_code=405)
+        else:
+            # Al montarse en /static, root_path incluye el prefijo del montaje
+            ruta, raiz = scope['path'], scope.get('root_path', '')
+            if raiz and ruta.startswith(raiz):
+                ruta = ruta[len(raiz):]
+            ruta = ruta.lstrip('/')
+            original = self.versionados.get(ruta)
+            if original is not None:
+                respuesta = self.recursos[original].responder(Headers(scope=scope), CACHE_INMUTABLE)
+            elif ruta in self.recursos:
+                respuesta = self.recursos[ruta].responder(Headers(scope=scope), CACHE_REVALIDAR)
+            else:
+                respuesta = PlainTextResponse('Archivo no encontrado', status_code=404)
+
+        await respuesta(scope, receive, send)
+
+
+class Plantillas:
+    """
+    Plantillas HTML renderizadas una sola vez al iniciar la aplicación
+    """
+
+    def __init__(self, directorio: Path, estaticos: ArchivosEstaticos, variables: Dict[str, str]):
+        """
+        Lee las plantillas, inyecta las variables y versiona las URLs de archivos estáticos
+
+        Args:
+            directorio: Directorio de plantillas
+            estaticos: Archivos estáticos (para las URLs versionadas)
+            variables: Valores que reemplazan los marcadores ${NOMBRE} de las plantillas
+        """
+        def versionar(coincidencia: re.Match) -> str:
+            comilla, ruta = coincidencia.groups()
+            url = estaticos.url(ruta)
+            return f'{comilla}{url}{comilla}' if url else coincidencia.group(0)
+
+        self.paginas: Dict[str, Recurso] = {}
+        for archivo in sorted(directorio.glob('*.html')):
+            html = archivo.read_text(encoding='utf-8')
+            for nombre, valor in variables.items():
+                html = html.replace('${' + nombre + '}', valor)
+            html = REFERENCIA_ESTATICA.sub(versionar, html)
+            self.paginas[archivo.name] = Recurso.preparar(html.encode('utf-8'), 'text/html; charset=utf-8')
+
+    def responder(self, nombre: str, headers: Headers) -> Optional[Response]:
+        """
+        Respuesta de una plantilla ya renderizada
+
+        Args:
+            nombre: Nombre del archivo de la plantilla (p. ej. 'index.html')
+            headers: Cabeceras de la petición
+
+        Returns:
+            Respuesta HTML (o 304), None si la plantilla no existe
+        """
+        pagina = self.paginas.get(nombre)
+        if pagina is None:
+            return None
+        return pagina.responder(headers, CACHE_REVALIDAR)
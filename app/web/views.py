@@ -1,12 +1,16 @@
 """
 Rutas para servir las vistas HTML del frontend
+Las plantillas y los archivos estáticos se preparan una sola vez (ver app/web/recursos.py)
+y se sirven desde memoria con caché HTTP y compresión.
 """
-import os
-from fastapi import APIRouter
-from fastapi.responses import HTMLResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+from typing import Optional
+from fastapi import APIRouter, Request
+from fastapi.responses import HTMLResponse
 from pathlib import Path
 
+from app.config.settings import Settings
+from app.web.recursos import ArchivosEstaticos, Plantillas
+
 # Obtener rutas de archivos
 BASE_DIR = Path(__file__).resolve().parent.parent
 TEMPLATES_DIR = BASE_DIR / "templates"
@@ -15,93 +19,83 @@ STATIC_DIR = BASE_DIR / "static"
 # Crear router para las vistas
 views_router = APIRouter(tags=["Frontend"])
 
+# Archivos estáticos y plantillas en memoria (se inicializan desde api.py)
+archivos_estaticos: Optional[ArchivosEstaticos] = None
+plantillas: Optional[Plantillas] = None
 
-def inject_env_vars(html_content: str) -> str:
-    """Inyecta variables de entorno en el HTML"""
-    api_base_url = os.getenv('API_BASE_URL', 'http://localhost:5000/api')
-    return html_content.replace('${API_BASE_URL}', api_base_url)
 
+def init_views(settings: Settings):
+    """
+    Lee los archivos estáticos y renderiza las plantillas una sola vez
 
-def serve_index():
-    """Función helper para servir el index.html"""
-    index_path = TEMPLATES_DIR / "index.html"
-    
-    if not index_path.exists():
-        return HTMLResponse(
-            content="<h1>Error 404</h1><p>No se encontró la página index.html</p>",
-            status_code=404
-        )
-    
-    with open(index_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    # Inyectar variables de entorno
-    content = inject_env_vars(content)
-    
-    return HTMLResponse(content=content)
-
-
-def serve_login():
-    """Función helper para servir el login.html"""
-    login_path = TEMPLATES_DIR / "login.html"
-    
-    if not login_path.exists():
+    Args:
+        settings: Configuración del sistema (API_BASE_URL se inyecta en las plantillas)
+    """
+    global archivos_estaticos, plantillas
+    archivos_estaticos = ArchivosEstaticos(STATIC_DIR)
+    plantillas = Plantillas(TEMPLATES_DIR, archivos_estaticos, {'API_BASE_URL': settings.API_BASE_URL})
+    print(f"✅ Frontend preparado: {len(archivos_estaticos.recursos)} archivos estáticos, "
+          f"{len(plantillas.paginas)} plantillas")
+
+
+def serve_template(nombre: str, request: Request):
+    """Función helper para servir una plantilla ya renderizada"""
+    if plantillas is None:
+        init_views(Settings())
+
+    respuesta = plantillas.responder(nombre, request.headers)
+    if respuesta is None:
         return HTMLResponse(
-            content="<h1>Error 404</h1><p>No se encontró la página login.html</p>",
+            content=f"<h1>Error 404</h1><p>No se encontró la página {nombre}</p>",
             status_code=404
         )
-    
-    with open(login_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    # Inyectar variables de entorno
-    content = inject_env_vars(content)
-    
-    return HTMLResponse(content=content)
+    return respuesta
 
 
 @views_router.get("/login", response_class=HTMLResponse)
-async def login():
+async def login(request: Request):
     """Sirve la página de login"""
-    return serve_login()
+    return serve_template("login.html", request)
 
 
 @views_router.get("/", response_class=HTMLResponse)
-async def root():
+async def root(request: Request):
     """Sirve la página principal en la ruta raíz"""
-    return serve_index()
+    return serve_template("index.html", request)
 
 
 @views_router.get("/app", response_class=HTMLResponse)
-async def index():
+async def index(request: Request):
     """Sirve la página principal de la aplicación web"""
-    return serve_index()
+    return serve_template("index.html", request)
 
 
 @views_router.get("/app/dashboard", response_class=HTMLResponse)
-async def dashboard():
+async def dashboard(request: Request):
     """Redirige al dashboard (misma página principal)"""
-    return await index()
+    return await index(request)
 
 
 @views_router.get("/app/empresas", response_class=HTMLResponse)
-async def empresas():
+async def empresas(request: Request):
     """Redirige a la vista de empresas (misma página principal)"""
-    return await index()
+    return await index(request)
 
 
 @views_router.get("/app/notificaciones", response_class=HTMLResponse)
-async def notificaciones():
+async def notificaciones(request: Request):
     """Redirige a la vista de notificaciones (misma página principal)"""
-    return await index()
+    return await index(request)
 
 
 @views_router.get("/app/formulario", response_class=HTMLResponse)
-async def formulario():
+async def formulario(request: Request):
     """Redirige al formulario (misma página principal)"""
-    return await index()
+    return await index(request)
 
 
 def get_static_files_app():
-    """Retorna la aplicación de archivos estáticos"""
-    return StaticFiles(directory=str(STATIC_DIR))
+    """Retorna la aplicación de archivos estáticos (servidos desde memoria)"""
+    if archivos_estaticos is None:
+        init_views(Settings())
+    return archivos_estaticos
@@ -0,0 +1,107 @@
+"""
+Benchmark de la serialización de listados de empresas
+Compara el costo por fila del camino con objetos (fila -> Empresa/ModuloEmpresa ->
+to_dict) con el camino directo fila -> diccionario de los listados.
+No necesita base de datos: las filas se generan en memoria con la misma forma
+que devuelve PostgreSQL.
+
+Uso:
+    python scripts/benchmark_serializacion.py [filas] [repeticiones]
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.empresa import TIPOS_MODULO
+from app.repositories.empresa_repository import EmpresaRepository
+
+
+class CursorEnMemoria:
+    """Cursor que devuelve filas de empresa_modulos generadas de antemano"""
+
+    def __init__(self, filas_modulos):
+        self.filas_modulos = filas_modulos
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchall(self):
+        return self.filas_modulos
+
+
+def generar_filas(cantidad: int):
+    """
+    Genera filas de empresas y de sus módulos con la forma de COLUMNAS_EMPRESA
+    y de empresa_modulos
+
+    Args:
+        cantidad: Número de empresas
+
+    Returns:
+        Tupla (filas de empresas, filas de módulos)
+    """
+    inicio = datetime(2026, 1, 1)
+    empresas = []
+    modulos = []
+    for i in range(1, cantidad + 1):
+        # Fechas de alta y actualización distintas por empresa (con segundos y microsegundos)
+        creada = inicio + timedelta(seconds=i * 37, microseconds=i)
+        empresas.append((i, f'900{i:06d}', f'Empresa {i}', 'Persona Jurídica', 'activo', creada, creada))
+        for n, tipo in enumerate(TIPOS_MODULO):
+            # Vencimientos a medianoche, como los deja la importación (se repiten entre empresas)
+            final = inicio + timedelta(days=(i * 7 + n * 30) % 400)
+            modulos.append((i, tipo, 1, final - timedelta(days=365), final,
+                            (final - timedelta(days=30)).date(), i % 2, 1 if i % 3 == 0 else 0, None))
+    return empresas, modulos
+
+
+def medir(nombre: str, funcion, filas: int, repeticiones: int) -> float:
+    """
+    Mide el tiempo por fila y el pico de memoria de una función de serialización
+
+    Returns:
+        Microsegundos por fila (mejor repetición)
+    """
+    mejor = min(timeit.repeat(funcion, number=1, repeat=repeticiones))
+
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    por_fila = mejor / filas * 1e6
+    print(f"  {nombre:<28} {por_fila:8.2f} µs/fila   pico {pico / 1024 / 1024:7.2f} MiB")
+    return por_fila
+
+
+def main():
+    """Ejecuta el benchmark y muestra la mejora del camino directo"""
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    empresas, modulos = generar_filas(filas)
+    cursor = CursorEnMemoria(modulos)
+    # El pool no se usa: solo se ejercitan las conversiones de filas
+    repository = EmpresaRepository('', 0, '', '', '', pool=object())
+
+    def con_objetos():
+        return [empresa.to_dict() for empresa in repository._rows_to_empresas(cursor, empresas)]
+
+    def directo():
+        return repository._rows_to_dicts(cursor, empresas)
+
+    # Ambos caminos deben producir exactamente la misma respuesta
+    assert con_objetos() == directo(), 'Los dos caminos de serialización no coinciden'
+
+    print(f"Serialización de {filas} empresas ({repeticiones} repeticiones, mejor tiempo)")
+    antes = medir('fila -> Empresa -> to_dict', con_objetos, filas, repeticiones)
+    despues = medir('fila -> dict (directo)', directo, filas, repeticiones)
+    print(f"  Mejora: {antes / despues:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -18,6 +18,7 @@ def crear_datos_ejemplo():
     # Configuración
     settings = Settings.from_env()
     factory = DatabaseFactory(settings)
+    factory.run_migrations()
     repository = factory.create_empresa_repository()
     service = EmpresaService(repository)
     
@@ -12,6 +12,13 @@ from typing import Optional
 class MigracionSQLiteAPostgreSQL:
     """Clase para manejar la migración de datos de SQLite a PostgreSQL"""
     
+    # Prefijo de las columnas de cada módulo en la tabla empresas de SQLite
+    MODULOS = {
+        'certificado': 'cert',
+        'resolucion': 'resol',
+        'documento': 'doc'
+    }
+    
     def __init__(self, 
                  sqlite_path: str,
                  pg_host: str,
@@ -58,58 +65,20 @@ class MigracionSQLiteAPostgreSQL:
             return None
     
     def crear_tabla_postgresql(self, pg_conn):
-        """Crea la tabla empresas en PostgreSQL si no existe"""
+        """
+        Verifica que el esquema de PostgreSQL esté creado.
+        Las tablas las crean las migraciones versionadas (python -m app.repositories.migrations).
+        """
         cursor = pg_conn.cursor()
+        cursor.execute("SELECT to_regclass('empresa_modulos') IS NOT NULL")
+        existe = cursor.fetchone()[0]
+        cursor.close()
         
-        print("Creando tabla 'empresas' en PostgreSQL...")
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS empresas (
-                id SERIAL PRIMARY KEY,
-                nit TEXT UNIQUE NOT NULL,
-                nombre TEXT NOT NULL,
-                tipo TEXT NOT NULL,
-                estado TEXT NOT NULL DEFAULT 'activo',
-                
-                -- Certificado de Facturación Electrónica
-                cert_activo INTEGER DEFAULT 0,
-                cert_fecha_inicio TIMESTAMP,
-                cert_fecha_final TIMESTAMP,
-                cert_notificacion TEXT,
-                cert_renovado INTEGER DEFAULT 0,
-                cert_facturado INTEGER DEFAULT 0,
-                cert_comentarios TEXT,
-                
-                -- Resolución de Facturación
-                resol_activo INTEGER DEFAULT 0,
-                resol_fecha_inicio TIMESTAMP,
-                resol_fecha_final TIMESTAMP,
-                resol_notificacion TEXT,
-                resol_renovado INTEGER DEFAULT 0,
-                resol_facturado INTEGER DEFAULT 0,
-                resol_comentarios TEXT,
-                
-                -- Resolución Documentos Soporte
-                doc_activo INTEGER DEFAULT 0,
-                doc_fecha_inicio TIMESTAMP,
-                doc_fecha_final TIMESTAMP,
-                doc_notificacion TEXT,
-                doc_renovado INTEGER DEFAULT 0,
-                doc_facturado INTEGER DEFAULT 0,
-                doc_comentarios TEXT,
-                
-                -- Metadatos
-                fecha_creacion TIMESTAMP NOT NULL,
-                fecha_actualizacion TIMESTAMP NOT NULL
+        if not existe:
+            raise RuntimeError(
+                "El esquema no está al día: ejecuta 'python -m app.repositories.migrations' antes de migrar"
             )
-        ''')
-        
-        # Crear índices
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_nit ON empresas(nit)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_estado ON empresas(estado)')
-        
-        pg_conn.commit()
-        print("✓ Tabla 'empresas' creada/verificada en PostgreSQL")
+        print("✓ Tablas 'empresas' y 'empresa_modulos' verificadas en PostgreSQL")
     
     def limpiar_tabla_postgresql(self, pg_conn):
         """Limpia la tabla empresas en PostgreSQL (opcional)"""
@@ -148,7 +117,7 @@ class MigracionSQLiteAPostgreSQL:
             return False
         
         try:
-            # Crear tabla en PostgreSQL
+            # Verificar el esquema en PostgreSQL
             self.crear_tabla_postgresql(pg_conn)
             
             # Limpiar tabla si se solicita
@@ -186,70 +155,48 @@ class MigracionSQLiteAPostgreSQL:
             print("\nMigrando empresas...")
             for row in empresas:
                 try:
-                    # Convertir fechas
-                    cert_fecha_inicio = self.convertir_fecha(row['cert_fecha_inicio'])
-                    cert_fecha_final = self.convertir_fecha(row['cert_fecha_final'])
-                    resol_fecha_inicio = self.convertir_fecha(row['resol_fecha_inicio'])
-                    resol_fecha_final = self.convertir_fecha(row['resol_fecha_final'])
-                    doc_fecha_inicio = self.convertir_fecha(row['doc_fecha_inicio'])
-                    doc_fecha_final = self.convertir_fecha(row['doc_fecha_final'])
                     fecha_creacion = self.convertir_fecha(row['fecha_creacion'])
                     fecha_actualizacion = self.convertir_fecha(row['fecha_actualizacion'])
                     
-                    # Insertar en PostgreSQL
+                    # Insertar la empresa en PostgreSQL
                     pg_cursor.execute('''
-                        INSERT INTO empresas (
-                            nit, nombre, tipo, estado,
-                            cert_activo, cert_fecha_inicio, cert_fecha_final, cert_notificacion,
-                            cert_renovado, cert_facturado, cert_comentarios,
-                            resol_activo, resol_fecha_inicio, resol_fecha_final, resol_notificacion,
-                            resol_renovado, resol_facturado, resol_comentarios,
-                            doc_activo, doc_fecha_inicio, doc_fecha_final, doc_notificacion,
-                            doc_renovado, doc_facturado, doc_comentarios,
-                            fecha_creacion, fecha_actualizacion
-                        ) VALUES (
-                            %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s, %s, %s,
-                            %s, %s
-                        )
+                        INSERT INTO empresas (nit, nombre, tipo, estado, fecha_creacion, fecha_actualizacion)
+                        VALUES (%s, %s, %s, %s, %s, %s)
                         ON CONFLICT (nit) DO UPDATE SET
                             nombre = EXCLUDED.nombre,
                             tipo = EXCLUDED.tipo,
                             estado = EXCLUDED.estado,
-                            cert_activo = EXCLUDED.cert_activo,
-                            cert_fecha_inicio = EXCLUDED.cert_fecha_inicio,
-                            cert_fecha_final = EXCLUDED.cert_fecha_final,
-                            cert_notificacion = EXCLUDED.cert_notificacion,
-                            cert_renovado = EXCLUDED.cert_renovado,
-                            cert_facturado = EXCLUDED.cert_facturado,
-                            cert_comentarios = EXCLUDED.cert_comentarios,
-                            resol_activo = EXCLUDED.resol_activo,
-                            resol_fecha_inicio = EXCLUDED.resol_fecha_inicio,
-                            resol_fecha_final = EXCLUDED.resol_fecha_final,
-                            resol_notificacion = EXCLUDED.resol_notificacion,
-                            resol_renovado = EXCLUDED.resol_renovado,
-                            resol_facturado = EXCLUDED.resol_facturado,
-                            resol_comentarios = EXCLUDED.resol_comentarios,
-                            doc_activo = EXCLUDED.doc_activo,
-                            doc_fecha_inicio = EXCLUDED.doc_fecha_inicio,
-                            doc_fecha_final = EXCLUDED.doc_fecha_final,
-                            doc_notificacion = EXCLUDED.doc_notificacion,
-                            doc_renovado = EXCLUDED.doc_renovado,
-                            doc_facturado = EXCLUDED.doc_facturado,
-                            doc_comentarios = EXCLUDED.doc_comentarios,
                             fecha_actualizacion = EXCLUDED.fecha_actualizacion
+                        RETURNING id
                     ''', (
                         row['nit'], row['nombre'], row['tipo'], row['estado'],
-                        row['cert_activo'], cert_fecha_inicio, cert_fecha_final, row['cert_notificacion'],
-                        row['cert_renovado'], row['cert_facturado'], row['cert_comentarios'],
-                        row['resol_activo'], resol_fecha_inicio, resol_fecha_final, row['resol_notificacion'],
-                        row['resol_renovado'], row['resol_facturado'], row['resol_comentarios'],
-                        row['doc_activo'], doc_fecha_inicio, doc_fecha_final, row['doc_notificacion'],
-                        row['doc_renovado'], row['doc_facturado'], row['doc_comentarios'],
                         fecha_creacion, fecha_actualizacion
                     ))
+                    empresa_id = pg_cursor.fetchone()[0]
+                    
+                    # Insertar sus módulos (una fila por tipo en empresa_modulos)
+                    for tipo, prefijo in self.MODULOS.items():
+                        pg_cursor.execute('''
+                            INSERT INTO empresa_modulos (
+                                empresa_id, tipo, activo, fecha_inicio, fecha_final,
+                                notificacion, renovado, facturado, comentarios
+                            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                            ON CONFLICT (empresa_id, tipo) DO UPDATE SET
+                                activo = EXCLUDED.activo,
+                                fecha_inicio = EXCLUDED.fecha_inicio,
+                                fecha_final = EXCLUDED.fecha_final,
+                                notificacion = EXCLUDED.notificacion,
+                                renovado = EXCLUDED.renovado,
+                                facturado = EXCLUDED.facturado,
+                                comentarios = EXCLUDED.comentarios
+                        ''', (
+                            empresa_id, tipo, row[f'{prefijo}_activo'] or 0,
+                            self.convertir_fecha(row[f'{prefijo}_fecha_inicio']),
+                            self.convertir_fecha(row[f'{prefijo}_fecha_final']),
+                            self.convertir_fecha(row[f'{prefijo}_notificacion']),
+                            row[f'{prefijo}_renovado'] or 0, row[f'{prefijo}_facturado'] or 0,
+                            row[f'{prefijo}_comentarios']
+                        ))
                     
                     migradas += 1
                     print(f"  ✓ {row['nombre']} (NIT: {row['nit']})")